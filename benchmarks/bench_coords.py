@@ -0,0 +1,85 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+"""
+- Microbenchmark of `Coords'. Run it from the repository root: `python benchmarks/bench_coords.py'.
+- The workload creates coords, walks the influence of every boost cog type from every coords, and tests membership in
+an `Empties_Set'-like `set'. It runs once with `coords.Coords' and once with `Legacy_Coords', a copy of the `Coords'
+class before interning.
+- The workload keeps every coords it creates, as `Coords_Iter' callers and `Empties_Set' do. For each type, the benchmark
+prints the run time, the number of memory blocks still alive at the end of the workload, and the peak traced memory, as
+measured by `tracemalloc'.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from constants import NUM_COGS_HORI, NUM_COGS_VERT
+from coords import Coords
+from cog_types import get_boost_cog_types
+
+class Legacy_Coords:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __hash__(self):
+        return hash((self.x,self.y))
+
+    def __add__(self, other):
+        return Legacy_Coords(self.x + other.x, self.y + other.y)
+
+    def __eq__(self, other):
+        return self.x == other.x and self.y == other.y
+
+def workload(coords_type, repeats):
+    empties = {coords_type(x, y) for x in range(NUM_COGS_HORI) for y in range(NUM_COGS_VERT) if (x + y) % 5 == 0}
+    offsets = [[coords_type(dx, dy) for dx, dy in cog_type.influence_offsets] for cog_type in get_boost_cog_types()]
+    kept = []
+    num_hits = 0
+    for _ in range(repeats):
+        for x in range(NUM_COGS_HORI):
+            for y in range(NUM_COGS_VERT):
+                coords = coords_type(x, y)
+                kept.append(coords)
+                for type_offsets in offsets:
+                    for offset in type_offsets:
+                        num_hits += (coords + offset) in empties
+    return num_hits, kept
+
+def measure(coords_type, repeats):
+    tic = time.perf_counter()
+    workload(coords_type, repeats)
+    seconds = time.perf_counter() - tic
+    tracemalloc.start()
+    result = workload(coords_type, repeats)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    stats = snapshot.statistics("filename")
+    return seconds, sum(stat.count for stat in stats), peak
+
+def main(repeats=200):
+    print("%-14s %10s %12s %12s" % ("", "seconds", "live blocks", "peak bytes"))
+    for name, coords_type in [("Legacy_Coords", Legacy_Coords), ("Coords", Coords)]:
+        print("%-14s %10.3f %12d %12d" % ((name,) + measure(coords_type, repeats)))
+
+if __name__ == "__main__":
+    main()
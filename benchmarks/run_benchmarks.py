@@ -0,0 +1,421 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+"""
+- Benchmarks of the hot paths of the genetic algorithm, on `cog_datas_sample.csv' and `empties_datas.csv'.
+- Run it from anywhere: `python benchmarks/run_benchmarks.py --output results.json'.
+- Every benchmark calls its function `number' times per repeat, `repeat' times, and records the minimum, median and mean
+time per call, in seconds. Setup (e.g. copying the input) is not timed.
+- Everything is seeded with `--seed', so two runs on the same commit do the same work. The end-to-end benchmark also
+records the best objective it found, so that a change of behavior shows up next to a change of speed.
+- `--compare old.json' prints the ratio of each median to the one in `old.json' and exits with status 1 if any ratio
+exceeds `--threshold'.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from checkpoint import Checkpointer
+from cog_array_stuff import Cog_Array, Empties_Set, cross_breed_genomes, get_excludes_dict, stack_genomes
+from cog_factory import cog_factory
+from file_readers import read_cog_datas, read_empties_datas
+from fitness_functions import Weighted_Obj_Fxn, average_affix_conversion_obj_fxn, weight_normalization
+from learning_algo import Iteration_Controller, Population, evolve, get_average_std_objs, learning_algo
+from local_search import make_cooling_schedule, simulated_annealing
+from vector_engine import Vector_Engine
+
+COG_DATAS_FILENAME = os.path.join(ROOT, "cog_datas_sample.csv")
+EMPTIES_DATAS_FILENAME = os.path.join(ROOT, "empties_datas.csv")
+
+"""
+- Calls `fxn(setup())' `number' times per repeat, `repeat' times, timing only `fxn'.
+- Returns a `dict' of the minimum, median and mean time per call over the repeats, in seconds.
+"""
+def time_calls(fxn, setup=None, number=1, repeat=5):
+    times = []
+    for _ in range(repeat):
+        total = 0.0
+        for _ in range(number):
+            arg = setup() if setup is not None else None
+            tic = time.perf_counter()
+            fxn(arg)
+            total += time.perf_counter() - tic
+        times.append(total / number)
+    return {
+        "unit": "s",
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "number": number,
+        "repeat": repeat
+    }
+
+"""
+The shared inputs of the benchmarks: the sample cogs with their warm-up statistics and strengths, the sample
+`Empties_Set' with three flaggies, the objective functions and a random population.
+"""
+class Bench_Inputs:
+    def __init__(self, seed, pop_size):
+        random.seed(seed)
+        bw, fw, ew = weight_normalization(1.0, 1.0, 1.0)
+        self.obj_fxns = [
+            Weighted_Obj_Fxn(average_affix_conversion_obj_fxn, bw, fw, ew),
+            Weighted_Obj_Fxn(average_affix_conversion_obj_fxn, bw, 0, 0),
+            Weighted_Obj_Fxn(average_affix_conversion_obj_fxn, 0, fw, 0),
+            Weighted_Obj_Fxn(average_affix_conversion_obj_fxn, 0, 0, ew)
+        ]
+        self.cog_datas = read_cog_datas(COG_DATAS_FILENAME)
+        self.cogs = cog_factory(self.cog_datas)
+        empties = read_empties_datas(EMPTIES_DATAS_FILENAME)
+        self.empties_set = Empties_Set(empties)
+        self.flaggies = set(sorted(empties, key=lambda coords: (coords.x, coords.y))[:3])
+        self.excludes_dict = get_excludes_dict(self.empties_set, self.cogs)
+        get_average_std_objs(self.cogs, self.empties_set, self.flaggies, self.obj_fxns[0])
+        template = self.new_array()
+        for cog in self.cogs:
+            cog.instantiate_strengths(template)
+        self.engine = Vector_Engine(self.cogs, self.empties_set, self.flaggies)
+        self.arrays = [self.new_array().randomize() for _ in range(pop_size)]
+
+    def new_array(self):
+        return Cog_Array(self.empties_set, self.flaggies, self.excludes_dict).extend_spares(self.cogs)
+
+    def new_population(self, arrays, values=None):
+        return Population(list(arrays), *self.obj_fxns, engine=self.engine, values=values)
+
+def bench_get_build_rate(inputs, args):
+    def setup():
+        cog_array = random.choice(inputs.arrays)
+        cog_array._reset_rates()
+        return cog_array
+    return time_calls(lambda cog_array: cog_array.get_build_rate(), setup, number=200, repeat=args.repeat)
+
+def bench_get_flaggy_rate(inputs, args):
+    def setup():
+        cog_array = random.choice(inputs.arrays)
+        cog_array._reset_rates()
+        return cog_array
+    return time_calls(lambda cog_array: cog_array.get_flaggy_rate(), setup, number=200, repeat=args.repeat)
+
+def bench_randomize(inputs, args):
+    return time_calls(lambda cog_array: cog_array.randomize(), inputs.new_array, number=50, repeat=args.repeat)
+
+def bench_instantiate_randomly(inputs, args):
+    return time_calls(
+        lambda cog_array: cog_array.instantiate_randomly(inputs.cogs),
+        lambda: Cog_Array(inputs.empties_set, inputs.flaggies, inputs.excludes_dict), number=50, repeat=args.repeat
+    )
+
+def bench_cross_breed(inputs, args):
+    return time_calls(
+        lambda pair: pair[0].cross_breed(pair[1]), lambda: random.sample(inputs.arrays, 2), number=200,
+        repeat=args.repeat
+    )
+
+"""
+Time per child of `cross_breed_genomes', cross breeding `pop_size' random pairs of the population at once.
+"""
+def bench_cross_breed_genomes(inputs, args):
+    genomes = stack_genomes(inputs.arrays)
+    def setup():
+        return [random.sample(range(len(inputs.arrays)), 2) for _ in range(args.pop_size)]
+    result = time_calls(
+        lambda pairs: cross_breed_genomes(inputs.arrays[0], genomes, pairs), setup, number=3, repeat=args.repeat
+    )
+    for key in ("min", "median", "mean"):
+        result[key] /= args.pop_size
+    return result
+
+def bench_one_point_mutation(inputs, args):
+    return time_calls(
+        lambda cog_array: cog_array.one_point_mutation(), lambda: random.choice(inputs.arrays), number=200,
+        repeat=args.repeat
+    )
+
+def bench_two_point_mutation(inputs, args):
+    return time_calls(
+        lambda cog_array: cog_array.two_point_mutation(), lambda: random.choice(inputs.arrays), number=200,
+        repeat=args.repeat
+    )
+
+def bench_update_strength(inputs, args):
+    def setup():
+        return random.choice(inputs.cogs), random.choice(inputs.empties_set.coords_list), random.uniform(0.5, 2)
+    def run(arg):
+        cog, coords, factor = arg
+        cog.update_strength(coords, factor, 4, 16)
+    return time_calls(run, setup, number=200, repeat=args.repeat)
+
+def bench_population_sort(inputs, args):
+    pop = inputs.new_population(inputs.arrays)
+    def setup():
+        order = random.sample(range(pop.get_size()), pop.get_size())
+        return inputs.new_population([pop.arrays[i] for i in order], pop.values[order])
+    return time_calls(lambda pop: pop.sort(), setup, number=10, repeat=args.repeat)
+
+"""
+Time to cull half again as many arrays as `--pop_size', with the options of `Population.set_cull_info'.
+"""
+def make_bench_population_cull(dedupe=False, niche_radius=0):
+    def bench(inputs, args):
+        pop = inputs.new_population(inputs.arrays)
+        extra = [inputs.new_array().randomize() for _ in range(pop.get_size() // 2)]
+        def setup():
+            culled = inputs.new_population(pop.arrays, pop.values).set_cull_info(dedupe, niche_radius)
+            culled.extend(extra)
+            return culled
+        return time_calls(lambda pop: pop.cull(), setup, number=3, repeat=args.repeat)
+    return bench
+
+"""
+- Time per child of choosing parents with `Population.select_indices', for each selection scheme, as the parents of one
+generation of `--pop_size' children.
+- The same is timed on populations of 10 and 100 times that size, whose values are drawn from those of the benchmark
+population. `per_pop_size' records the median of each. Selection should take the same time per child at every size.
+"""
+def make_bench_population_select(selection):
+    def bench(inputs, args):
+        pop = inputs.new_population(inputs.arrays)
+        per_pop_size = {}
+        for multiplier in [100, 10, 1]:
+            size = multiplier * args.pop_size
+            values = np.random.default_rng(args.seed).choice(pop.values, size)
+            big = inputs.new_population([None] * size, values)
+            def run(_):
+                for _ in range(args.pop_size):
+                    big.select_indices(2, selection, 3)
+            result = time_calls(run, number=1, repeat=args.repeat)
+            for key in ("min", "median", "mean"):
+                result[key] /= args.pop_size
+            per_pop_size[size] = result["median"]
+        result["per_pop_size"] = per_pop_size
+        return result
+    return bench
+
+"""
+Time to save a checkpoint of a population of `--pop_size' arrays, without a fitness cache. The size of the file is
+recorded as `file_size'.
+"""
+def bench_checkpoint_save(inputs, args):
+    pop = inputs.new_population(inputs.arrays)
+    controller = Iteration_Controller().set_restart_info(1).set_pop(pop)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpointer = Checkpointer(os.path.join(tmp_dir, "checkpoint.npz"))
+        result = time_calls(
+            lambda _: checkpointer.save(inputs.cogs, controller, pop, []), number=3, repeat=args.repeat
+        )
+        result["file_size"] = os.path.getsize(checkpointer.filename)
+    return result
+
+"""
+A fixed-seed run of `learning_algo' on fresh cogs, with a small population and a fixed number of generations. Output is
+suppressed. The best objective is recorded as `best_value', and the hit rate of the fitness cache as
+`fitness_cache_hit_rate'.
+"""
+def bench_learning_algo(inputs, args):
+    best_values = []
+    hit_rates = []
+    def setup():
+        random.seed(args.seed)
+        controller = (Iteration_Controller()
+            .set_restart_info(1)
+            .set_generation_info(args.generations, args.generations, 10, 0.01)
+            .set_mutation_info(args.pop_size // 2)
+            .set_breeding_scheme_info(0.5, 0.25, 0.25)
+            .set_fitness_cache_info(args.fitness_cache_size)
+        )
+        return cog_factory(inputs.cog_datas), controller
+    def run(arg):
+        cogs, controller = arg
+        with contextlib.redirect_stdout(io.StringIO()):
+            best = learning_algo(
+                cogs, inputs.empties_set, set(), args.pop_size, inputs.obj_fxns[0], 2, 4, 16, controller,
+                *inputs.obj_fxns[1:]
+            )
+        best_values.append(float(best[1]))
+        if controller.fitness_cache is not None:
+            hit_rates.append(controller.fitness_cache.get_hit_rate())
+    result = time_calls(run, setup, number=1, repeat=max(1, args.repeat // 2))
+    result["best_value"] = best_values[0]
+    if len(hit_rates) > 0:
+        result["fitness_cache_hit_rate"] = hit_rates[0]
+    return result
+
+"""
+- Time to target of `local_search.simulated_annealing' against `learning_algo', on fresh cogs. The target is the best
+objective that the run of `bench_learning_algo' reaches, and `ga_time' is the time it took to first reach it, warm-up
+included.
+- Annealing starts from a random array and stops at the target, or after `--anneal_steps' steps. Its time includes
+choosing the temperatures. `num_reached' counts the repeats that reached the target.
+"""
+def bench_time_to_target(inputs, args):
+    random.seed(args.seed)
+    cogs = cog_factory(inputs.cog_datas)
+    controller = (Iteration_Controller()
+        .set_restart_info(1)
+        .set_generation_info(args.generations, args.generations, 10, 0.01)
+        .set_mutation_info(args.pop_size // 2)
+        .set_breeding_scheme_info(0.5, 0.25, 0.25)
+    )
+    history = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        tic = time.perf_counter()
+        average_std_objs = get_average_std_objs(cogs, inputs.empties_set, set(), inputs.obj_fxns[0])
+        for pop in evolve(
+                cogs, inputs.empties_set, set(), args.pop_size, inputs.obj_fxns[0], 2, 4, 16, controller,
+                *inputs.obj_fxns[1:], average_std_objs
+        ):
+            history.append((time.perf_counter() - tic, float(pop.get_best()[1])))
+    target = max(value for _, value in history)
+    reached = []
+    def setup():
+        cogs = cog_factory(inputs.cog_datas)
+        excludes_dict = get_excludes_dict(inputs.empties_set, cogs)
+        return Cog_Array(inputs.empties_set, set(), excludes_dict).instantiate_randomly(cogs)
+    def run(start_array):
+        cooling = make_cooling_schedule("geometric", start_array, inputs.obj_fxns[0], args.anneal_steps)
+        best = simulated_annealing(start_array, inputs.obj_fxns[0], args.anneal_steps, cooling, target=target)
+        reached.append(best[1] >= target)
+    result = time_calls(run, setup, number=1, repeat=args.repeat)
+    result["target"] = target
+    result["ga_time"] = min(elapsed for elapsed, value in history if value >= target)
+    result["num_reached"] = sum(reached)
+    return result
+
+BENCHMARKS = {
+    "cog_array.get_build_rate": bench_get_build_rate,
+    "cog_array.get_flaggy_rate": bench_get_flaggy_rate,
+    "cog_array.randomize": bench_randomize,
+    "cog_array.instantiate_randomly": bench_instantiate_randomly,
+    "cog_array.cross_breed": bench_cross_breed,
+    "cog_array.cross_breed_genomes": bench_cross_breed_genomes,
+    "cog_array.one_point_mutation": bench_one_point_mutation,
+    "cog_array.two_point_mutation": bench_two_point_mutation,
+    "cog.update_strength": bench_update_strength,
+    "population.sort": bench_population_sort,
+    "population.cull": make_bench_population_cull(),
+    "population.cull.dedupe": make_bench_population_cull(dedupe=True),
+    "population.cull.niche": make_bench_population_cull(dedupe=True, niche_radius=8),
+    "population.select.uniform": make_bench_population_select("uniform"),
+    "population.select.tournament": make_bench_population_select("tournament"),
+    "population.select.rank": make_bench_population_select("rank"),
+    "population.select.roulette": make_bench_population_select("roulette"),
+    "checkpoint.save": bench_checkpoint_save,
+    "learning_algo.end_to_end": bench_learning_algo,
+    "local_search.time_to_target": bench_time_to_target
+}
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+"""
+Prints the ratio of each median in `results' to the median of the same benchmark in `baseline'. Returns `True' if no
+ratio exceeds `threshold'.
+"""
+def compare(results, baseline, threshold):
+    ok = True
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        ratio = result["median"] / baseline["benchmarks"][name]["median"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        ok = ok and ratio <= threshold
+        print("%-32s %12.6g %12.6g %8.3fx %s" % (
+            name, baseline["benchmarks"][name]["median"], result["median"], ratio, flag
+        ))
+    return ok
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks of the Cogstruction hot paths.")
+    parser.add_argument("--output", "-o", default=None,
+                        help="write the results to this JSON file instead of stdout")
+    parser.add_argument("--compare", default=None,
+                        help="a JSON file written by an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="with --compare, the slowdown ratio that counts as a regression")
+    parser.add_argument("--filter", "-k", default="",
+                        help="only run benchmarks whose name contains this string")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pop_size", type=int, default=200,
+                        help="the population size of the population and end-to-end benchmarks")
+    parser.add_argument("--generations", type=int, default=5,
+                        help="the number of generations of the end-to-end benchmark")
+    parser.add_argument("--fitness_cache_size", type=int, default=65536,
+                        help="the size of the fitness cache of the end-to-end benchmark; 0 disables it")
+    parser.add_argument("--anneal_steps", type=int, default=100000,
+                        help="the most steps of simulated annealing in the time to target benchmark")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    inputs = Bench_Inputs(args.seed, args.pop_size)
+    results = {
+        "meta": {
+            "commit": get_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cog_datas": os.path.basename(COG_DATAS_FILENAME),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "pop_size": args.pop_size,
+            "generations": args.generations,
+            "anneal_steps": args.anneal_steps,
+            "fitness_cache_size": args.fitness_cache_size
+        },
+        "benchmarks": {}
+    }
+    for name, bench in BENCHMARKS.items():
+        if args.filter in name:
+            random.seed(args.seed)
+            results["benchmarks"][name] = bench(inputs, args)
+            print("%-32s %12.6g s" % (name, results["benchmarks"][name]["median"]), file=sys.stderr)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+import os
+import random
+import time
+
+import numpy as np
+
+from cog_array_stuff import stack_genomes
+from cog_registry import _cog_registry
+
+CHECKPOINT_FILENAME = "checkpoint.npz"
+
+"""
+Bump this whenever the layout of checkpoint files changes. Files written with any other version are rejected.
+"""
+CHECKPOINT_VERSION = 1
+
+"""
+- `CHECKPOINT_INTERVAL' is the default number of seconds between two checkpoints.
+- Checkpoints are also spaced so that writing them takes at most `MAX_CHECKPOINT_COST' of the run time.
+"""
+CHECKPOINT_INTERVAL = 60.0
+MAX_CHECKPOINT_COST = 0.005
+
+"""
+The number of rates of `Cog_Array.get_rates'.
+"""
+_NUM_RATES = 5
+
+"""
+The counters of `Iteration_Controller' that a checkpoint saves, with their types. Its other attributes are settings,
+which come from the arguments of the resumed run.
+"""
+_CONTROLLER_COUNTERS = (
+    ("restart_count", int), ("generation_count", int), ("curr_running_total_len", int),
+    ("curr_running_total", float), ("previous_best_improve", float)
+)
+
+class Checkpoint_Error(Exception):
+    pass
+
+"""
+- Saves and restores the state of `learning_algo.evolve' between two generations, so that an interrupted run can be
+resumed. A resumed run continues exactly as the original run would have, provided that it is given the same inputs and
+settings.
+- The state is the population and the original population of the current restart (the genomes, objective values and
+cached rates of the arrays), the best array of each earlier restart, the warm-up statistics and strengths of the cogs,
+the counters of the `Iteration_Controller', the entries of the fitness cache and the state of `random'.
+- The file is a `numpy' `.npz' archive, replaced atomically by each `save'. Cogs are stored as their positions in the
+list `cogs' passed to `save' and `load', since `Cog_Registry' numbers are only meaningful within one process. The
+`csv_record' of each cog is stored too, so that a checkpoint of a different inventory is rejected.
+- `maybe_save' only saves once `interval' seconds have passed since the previous checkpoint, and at least
+`1/MAX_CHECKPOINT_COST' times as long as that checkpoint took to write.
+"""
+class Checkpointer:
+    def __init__(self, filename, interval=CHECKPOINT_INTERVAL):
+        self.filename = filename
+        self.interval = interval
+        self.next_time = None
+        self.num_saves = 0
+        self.save_time = 0.0
+
+    def exists(self):
+        return os.path.exists(self.filename)
+
+    def remove(self):
+        if self.exists():
+            os.remove(self.filename)
+        return self
+
+    """
+    - Calls `save' if a checkpoint is due. Returns `True' if it saved one.
+    - The first call only starts the clock.
+    """
+    def maybe_save(self, cogs, controller, pop, bests):
+        now = time.perf_counter()
+        if self.next_time is None:
+            self.next_time = now + self.interval
+            return False
+        if now < self.next_time:
+            return False
+        self.save(cogs, controller, pop, bests)
+        cost = time.perf_counter() - now
+        self.next_time = now + max(self.interval, cost / MAX_CHECKPOINT_COST)
+        return True
+
+    """
+    - Writes a checkpoint of the state described above. `pop' is the current `Population', and `bests' the `list' of
+    `(Cog_Array, value)' pairs of the earlier restarts.
+    - The arrays must have the template of `learning_algo.evolve': their flaggies are either none or those of the
+    template passed to `load'.
+    """
+    def save(self, cogs, controller, pop, bests):
+        start = time.perf_counter()
+        indices = [_cog_registry.index(cog) for cog in cogs]
+        positions = np.full(len(_cog_registry) + 1, -1, dtype=np.int16)
+        positions[indices] = np.arange(len(cogs))
+        version, random_state, gauss_next = random.getstate()
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "cog_records": np.array([cog.csv_record() for cog in cogs]),
+            "flat_indices": pop.arrays[0].empties_set.flat_indices,
+            "strengths": _cog_registry.strengths[indices],
+            "strength_totals": _cog_registry.strength_totals[indices],
+            "strength_start_values": np.array([_to_float(cog.strength_start_value) for cog in cogs]),
+            "average_objs": np.array([_to_float(cog.average_obj) for cog in cogs]),
+            "std_objs": np.array([_to_float(cog.std_obj) for cog in cogs]),
+            "controller_counters": np.array(
+                [getattr(controller, name) for name, _ in _CONTROLLER_COUNTERS], dtype=float
+            ),
+            "random_version": version,
+            "random_state": np.array(random_state, dtype=np.uint32),
+            "random_gauss_next": _to_float(gauss_next),
+            "pop_values": pop.values,
+            "pop_best": pop._best,
+            "pop_is_sorted": pop.is_sorted,
+            "orig_pop_values": controller.orig_pop.values,
+            "bests_values": np.array([value for _, value in bests], dtype=float)
+        }
+        data.update(_encode_arrays("pop", pop.arrays, positions))
+        data.update(_encode_arrays("orig_pop", controller.orig_pop.arrays, positions))
+        data.update(_encode_arrays("bests", [array for array, _ in bests], positions))
+        if pop.fitness_cache is not None:
+            entries = pop.fitness_cache.entries
+            values, rates = zip(*entries.values()) if len(entries) > 0 else ((), ())
+            data["cache_keys"] = np.fromiter(entries.keys(), dtype=np.uint64, count=len(entries))
+            data["cache_values"] = np.array(values, dtype=float)
+            data["cache_rates"] = _encode_rates(rates)
+            data["cache_counters"] = np.array([pop.fitness_cache.num_hits, pop.fitness_cache.num_misses])
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "wb") as fh:
+            np.savez(fh, **data)
+        os.replace(tmp_filename, self.filename)
+        self.num_saves += 1
+        self.save_time += time.perf_counter() - start
+        return self
+
+    """
+    - Restores the state saved by `save': the strengths of `cogs', the counters of `controller' and the state of
+    `random', and the entries of `fitness_cache', if given.
+    - `template' is a `Cog_Array' with the template and flaggies of the arrays, and `new_population(arrays, values)'
+    returns a `Population' of the given arrays and values, without scoring them.
+    - Returns `(pop, orig_pop, bests)'. `controller.restart_count' is one less than when the checkpoint was saved, so
+    that `controller.restart_loop' enters the same restart again.
+    - Raises `Checkpoint_Error' if the file cannot be read, or was written by another version, for other cogs or for
+    another `Empties_Set'.
+    """
+    def load(self, cogs, template, controller, new_population, fitness_cache=None):
+        data = self._read(cogs)
+        if not np.array_equal(data["flat_indices"], template.empties_set.flat_indices):
+            raise Checkpoint_Error("The checkpoint %s is for other empties." % self.filename)
+
+        indices = np.array([_cog_registry.index(cog) for cog in cogs] + [-1], dtype=np.int16)
+        for cog, start_value in zip(cogs, data["strength_start_values"].tolist()):
+            cog.strength_start_value = None if np.isnan(start_value) else start_value
+        _cog_registry.strengths[indices[:-1]] = data["strengths"]
+        _cog_registry.strength_totals[indices[:-1]] = data["strength_totals"]
+        for (name, counter_type), value in zip(_CONTROLLER_COUNTERS, data["controller_counters"].tolist()):
+            setattr(controller, name, counter_type(value))
+        controller.restart_count -= 1
+        gauss_next = data["random_gauss_next"].item()
+        random.setstate((
+            int(data["random_version"]), tuple(data["random_state"].tolist()), None if np.isnan(gauss_next) else gauss_next
+        ))
+        if fitness_cache is not None and "cache_keys" in data:
+            fitness_cache.clear()
+            for key, value, rates in zip(
+                    data["cache_keys"].tolist(), data["cache_values"].tolist(), _decode_rates(data["cache_rates"])
+            ):
+                fitness_cache.put(key, value, rates)
+            fitness_cache.num_hits, fitness_cache.num_misses = data["cache_counters"].tolist()
+
+        pop = new_population(_decode_arrays(data, "pop", template, indices), data["pop_values"])
+        pop._best = int(data["pop_best"])
+        pop.is_sorted = bool(data["pop_is_sorted"])
+        orig_pop = new_population(_decode_arrays(data, "orig_pop", template, indices), data["orig_pop_values"])
+        bests = list(zip(_decode_arrays(data, "bests", template, indices), data["bests_values"].tolist()))
+        controller.best = max(bests, key=lambda t: t[1]) if len(bests) > 0 else None
+        return pop, orig_pop, bests
+
+    """
+    - Restores the warm-up statistics of `cogs' (see `learning_algo.get_average_std_objs') from the checkpoint, so that
+    a resumed run does not need to, and may not, compute them again. Returns them like `get_average_std_objs'.
+    - Raises `Checkpoint_Error' like `load'.
+    """
+    def load_average_std_objs(self, cogs):
+        data = self._read(cogs)
+        for cog, average_obj, std_obj in zip(cogs, data["average_objs"], data["std_objs"]):
+            cog.average_obj = None if np.isnan(average_obj) else average_obj
+            cog.std_obj = None if np.isnan(std_obj) else std_obj
+        return {cog: cog.get_average_std_obj() for cog in cogs}
+
+    def _read(self, cogs):
+        try:
+            with np.load(self.filename) as archive:
+                data = dict(archive)
+        except (OSError, ValueError) as err:
+            raise Checkpoint_Error("Could not read the checkpoint %s: %s" % (self.filename, err))
+        if "version" not in data or int(data["version"]) != CHECKPOINT_VERSION:
+            raise Checkpoint_Error("The checkpoint %s was written by another version." % self.filename)
+        if data["cog_records"].tolist() != [cog.csv_record() for cog in cogs]:
+            raise Checkpoint_Error("The checkpoint %s is for other cogs." % self.filename)
+        return data
+
+"""
+Returns the entries of a checkpoint for `arrays', under names that start with `prefix'. The genomes are in the layout of
+`cog_array_stuff.stack_genomes', with each `Cog_Registry' number replaced by its entry in `positions'.
+"""
+def _encode_arrays(prefix, arrays, positions):
+    if len(arrays) == 0:
+        genomes = np.empty((0, 0), dtype=np.int16)
+    else:
+        genomes = positions[stack_genomes(arrays)]
+    return {
+        prefix + "_genomes": genomes,
+        prefix + "_has_flaggies": np.array([len(array.flaggies) > 0 for array in arrays], dtype=bool),
+        prefix + "_rates": _encode_rates([array.get_rates() for array in arrays])
+    }
+
+"""
+The inverse of `_encode_arrays'. `indices[k]' is the `Cog_Registry' number of the cog at position `k', and `indices[-1]'
+is `-1'.
+"""
+def _decode_arrays(data, prefix, template, indices):
+    arrays = []
+    for genome, has_flaggies, rates in zip(
+            data[prefix + "_genomes"], data[prefix + "_has_flaggies"].tolist(), _decode_rates(data[prefix + "_rates"])
+    ):
+        array = template.from_genome(indices[genome])
+        if has_flaggies:
+            array.flaggies = set(template.flaggies)
+        if rates is not None:
+            array.set_rates(rates)
+        arrays.append(array)
+    return arrays
+
+"""
+Returns a matrix with the `Cog_Array.get_rates' tuple `rates[i]' on row `i', or `nan' if it is `None'.
+"""
+def _encode_rates(rates):
+    missing = (np.nan,) * _NUM_RATES
+    return np.array(
+        [missing if array_rates is None else array_rates for array_rates in rates], dtype=float
+    ).reshape(-1, _NUM_RATES)
+
+def _decode_rates(encoded):
+    return [None if np.isnan(row[0]) else tuple(row) for row in encoded.tolist()]
+
+def _to_float(value):
+    return np.nan if value is None else float(value)
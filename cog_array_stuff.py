@@ -17,7 +17,8 @@ import copy
 import random
 import numpy as np
 
-from cog_types import Boost_Cog
+from cog_registry import COG_INDEX_DTYPE, _cog_registry
+from cog_types import Boost_Cog, get_boost_cog_types
 from constants import NUM_COGS_HORI, NUM_COGS_VERT, TOTAL_COORDS
 from coords import Coords
 
@@ -25,6 +26,17 @@ from coords import Coords
 - `Empties_Set.empties' should be a `set'.
 - `Empties_Set.coords_list' is a list of all the non-empty coords in the array.
 - There should be one `Empties_Set' per cog array template.
+- The non-empty coords are also called slots. Slot `s' is `Empties_Set.coords_list[s]' and
+`Empties_Set.slot_indices[coords]' is the slot of `coords'.
+- The influence tables below are built once, here, and shared by every `Cog_Array' of the template. For every boost cog
+type `cog_type' and slot `s':
+    > `influence_slots[cog_type][s]' is a `tuple' of the slots boosted by a cog of type `cog_type' placed on slot `s',
+    in the order of `cog_type.influence_offsets'. Out-of-bounds and empty coords are left out.
+    > `influence_empties[cog_type][s]' is a `tuple' of the empty (but in-bounds) coords that such a cog boosts. Flaggies
+    are placed on empty coords.
+    > `num_oob_influence[cog_type][s]' is how many of the coords it boosts are out of bounds.
+- `influencer_slots[s]' is the reverse of `influence_slots': a `tuple' of pairs `(p, cog_type)' such that a cog of type
+`cog_type' placed on slot `p' boosts slot `s'.
 """
 class Empties_Set:
     def __init__(self,empties):
@@ -35,6 +47,34 @@ class Empties_Set:
                 coords = Coords(x, y)
                 if coords not in self.empties:
                     self.coords_list.append(coords)
+        self.slot_indices = {coords: s for s, coords in enumerate(self.coords_list)}
+        self.influence_slots = {}
+        self.influence_empties = {}
+        self.num_oob_influence = {}
+        influencer_slots = [[] for _ in self.coords_list]
+        for cog_type in get_boost_cog_types():
+            type_slots, type_empties, type_num_oob = [], [], []
+            for p, coords in enumerate(self.coords_list):
+                adj_slots, adj_empties, num_oob = [], [], 0
+                for dx, dy in cog_type.influence_offsets:
+                    adj_coords = Coords(coords.x + dx, coords.y + dy)
+                    if adj_coords in self.slot_indices:
+                        adj_slots.append(self.slot_indices[adj_coords])
+                        influencer_slots[self.slot_indices[adj_coords]].append((p, cog_type))
+                    elif adj_coords.is_out_of_bounds():
+                        num_oob += 1
+                    else:
+                        adj_empties.append(adj_coords)
+                type_slots.append(tuple(adj_slots))
+                type_empties.append(tuple(adj_empties))
+                type_num_oob.append(num_oob)
+            self.influence_slots[cog_type] = tuple(type_slots)
+            self.influence_empties[cog_type] = tuple(type_empties)
+            self.num_oob_influence[cog_type] = tuple(type_num_oob)
+        self.influencer_slots = tuple(tuple(pairs) for pairs in influencer_slots)
+        self.flat_indices = np.array(
+            [coords.x * NUM_COGS_VERT + coords.y for coords in self.coords_list], dtype=np.intp
+        )
 
     def __eq__(self, other):
         return self.empties == other.empties
@@ -47,6 +87,17 @@ class Empties_Set:
     def __len__(self):
         return len(self.empties)
 
+_default_empties_set = None
+
+"""
+The `Empties_Set' of an array without any empties. It is shared, since building its influence tables is not free.
+"""
+def _get_default_empties_set():
+    global _default_empties_set
+    if _default_empties_set is None:
+        _default_empties_set = Empties_Set(set())
+    return _default_empties_set
+
 """
 - `excludes_dict[type(cog)]' is a `set' of all coordinates where `cog' should not be placed.
 - For example, if `cog' is of type `Up_Cog', then `excludes_dict[type(cog)]' should contain all coords on the top row of
@@ -54,36 +105,106 @@ the array.
 - This dict is not necessary for the genetic algorithm to find an optimal array. It merely improves the convergence rate. 
 """
 def get_excludes_dict(empties_set, cogs):
-    cog_array = Cog_Array(empties_set)
     excludes_dict = {}
     for cog in cogs:
         if type(cog) not in excludes_dict and isinstance(cog, Boost_Cog):
-            excludes_dict[type(cog)] = set()
-            for coords in Coords_Iter(cog_array):
-                num_oob_neighbors = sum((adj_coords.is_out_of_bounds()) for adj_coords in cog.get_influence(coords))
-                if num_oob_neighbors > cog.get_max_oob_neighbors():
-                    excludes_dict[type(cog)].add(coords)
+            num_oob_influence = empties_set.num_oob_influence[type(cog)]
+            excludes_dict[type(cog)] = set(
+                coords for s, coords in enumerate(empties_set.coords_list)
+                if num_oob_influence[s] > cog.get_max_oob_neighbors()
+            )
     return excludes_dict
 
+"""
+- Returns a `tuple' with one `frozenset' per slot of `empties_set' (in the order of `empties_set.coords_list'): the cog
+types that `excludes_dict' keeps off that slot. This is `excludes_dict' turned around, so that a slot can test a cog with
+a single lookup.
+- Consistent with `Cog_Array.excludes', only subtypes of `Boost_Cog' are ever excluded.
+"""
+def get_excluded_types(empties_set, excludes_dict):
+    excluded_types = [[] for _ in empties_set.coords_list]
+    for cog_type, excluded in excludes_dict.items():
+        if issubclass(cog_type, Boost_Cog):
+            for coords in excluded:
+                s = empties_set.slot_indices.get(coords)
+                if s is not None:
+                    excluded_types[s].append(cog_type)
+    return tuple(frozenset(cog_types) for cog_types in excluded_types)
+
+"""
+How many random spares `Cog_Array._pick_spare' tries before it looks for an allowed spare by scanning all of them.
+"""
+MAX_SPARE_REJECTIONS = 8
+
+"""
+`cross_breed_genomes' finishes batches of fewer children one child at a time; see `_resolve_contested_slots'.
+"""
+MIN_BULK_CHILDREN = 8
+
+"""
+Removes and returns `values[position]', moving the last value of the `list' `values' into its place.
+"""
+def _swap_pop(values, position):
+    last = values.pop()
+    if position == len(values):
+        return last
+    value = values[position]
+    values[position] = last
+    return value
+
+"""
+Returns a vector of `k' random `numpy.uint64' words drawn from `random', so that they follow `random.seed'.
+"""
+def _random_words(k):
+    return np.frombuffer(random.getrandbits(64 * k).to_bytes(8 * k, "little"), dtype=np.uint64)
+
 """
 A cog array consists of:
-- array: A `numpy.ndarray' of `Cogs' placed on the cog array.
 - empties_set: An `Empties_Set' of `Coords' that the user has not yet unlocked using flaggies. There is only one per
   cog array template.
 - flaggies: A collection of `Coords' where the user currently has flaggies placed.
-- spares: A spare collection of `Cogs'.
 - excludes_dict: A `dict` of `sets'. Each key of `excludes_dict' is a `Cog` subtype. Each `set' consists of `Coords' where
 `Cogs' should not be placed. There is only one per cog array template.
+- genome: A `COG_INDEX_DTYPE' vector of `Cog_Registry' numbers. The first `len(empties_set.coords_list)' entries are the
+  slots, in the order of `empties_set.coords_list', with `-1' on unoccupied slots. The next `num_spares' entries are the
+  spare cogs, in no particular order: spares are removed by moving the last spare into their place. The rest is unused
+  capacity.
+- excluded_types: The result of `get_excluded_types(empties_set, excludes_dict)', shared like `excludes_dict'.
+The cogs themselves are only referenced by the shared `_cog_registry', so copying a cog array copies a single small
+integer vector. The following are views built on demand, for reading only:
+- array: A `numpy.ndarray' of `Cogs' placed on the cog array.
+- spares: A `dict' whose keys are the spare cogs (the values are unused), in the order of `genome'.
+The placement hash (see `get_placement_hash') is cached like the rates, and so is a `dict' from the `Cog_Registry' number
+of each spare to its position among the spares (see `_find_spare_index'), which is kept up to date once built.
 """
 class Cog_Array:
+    __slots__ = (
+        "empties_set", "flaggies", "excludes_dict", "excluded_types", "genome", "num_slots", "num_spares", "_num_occupied",
+        "build_rate", "flaggy_rate", "total_exp_mult", "flaggy_base_rate", "flaggy_speed", "_hash", "_spare_positions"
+    )
+
     def __init__(self, empties_set = None, flaggies = None, excludes_dict = None):
-        self.array = np.empty((NUM_COGS_HORI, NUM_COGS_VERT), dtype=np.dtype(object))
-        self.empties_set = empties_set if empties_set is not None else Empties_Set(set())
+        self.empties_set = empties_set if empties_set is not None else _get_default_empties_set()
         self.flaggies = set(flaggies) if flaggies is not None else set()
-        self.spares = set()
-        self.build_rate = self.flaggy_rate = self.total_exp_mult = None
         self.excludes_dict = excludes_dict if excludes_dict is not None else {}
+        self.excluded_types = get_excluded_types(self.empties_set, self.excludes_dict)
+        self.num_slots = len(self.empties_set.coords_list)
+        self.genome = np.full(self.num_slots, -1, dtype=COG_INDEX_DTYPE)
+        self.num_spares = 0
         self._num_occupied = 0
+        self._hash = 0
+        self._spare_positions = None
+        self._reset_rates()
+
+    @property
+    def array(self):
+        array = np.full((NUM_COGS_HORI, NUM_COGS_VERT), None, dtype=object)
+        array.reshape(-1)[self.empties_set.flat_indices] = _cog_registry.objects[self.genome[:self.num_slots]]
+        return array
+
+    @property
+    def spares(self):
+        return dict.fromkeys(self._get_spare_cogs())
 
     """
     - Randomly places cogs on the cog array. Any leftover cogs are added to `self.spares'.
@@ -95,21 +216,50 @@ class Cog_Array:
         if self.get_num_spares() != 0 or self.get_num_occupied() != 0:
             raise RuntimeError("Cog_Array must be empty before instatiating.")
         self.extend_spares(cogs)
-        for coords in Coords_Iter(self,True):
-            if self.get_num_spares() > 0:
-                self.move_random_cog_from_spares(coords)
-            else:
-                return self
+        self._place_random_spares()
         return self
 
     """
-    Mostly used for copying.
+    Mostly used for copying. `array' is a `numpy.ndarray' of `Cogs' (or `None'), like `self.array'.
     """
     def instantiate_from_array(self,array):
         if self.get_num_spares() != 0 or self.get_num_occupied() != 0:
             raise RuntimeError("Cog_Array must be empty before instatiating.")
-        self.array = array
-        self._num_occupied = sum((self.array[i,j] is not None) for i,j in np.ndindex((NUM_COGS_HORI,NUM_COGS_VERT)))
+        for s, coords in enumerate(self.empties_set.coords_list):
+            cog = array[coords.x, coords.y]
+            if cog is not None:
+                self.genome[s] = _cog_registry.index(cog)
+        self._num_occupied = int(np.count_nonzero(self.genome[:self.num_slots] >= 0))
+        self._hash = None
+        self._reset_rates()
+        return self
+
+    """
+    - Places `cogs' as in `output_datas', the output of `file_readers.read_output_datas', e.g. to carry on from the
+    `output.csv' of a previous run.
+    - A cog matches a record if `cog.csv_record()' is the same, so cogs with identical stats are interchangeable. Each
+    cog matches at most one record.
+    - Records that match no cog (e.g. a cog that is gone since), or whose coords are no longer a slot, are skipped. Then
+    the slots left unoccupied are filled randomly from the remaining cogs, as in `instantiate_randomly', and the rest
+    are added to `self.spares'.
+    """
+    def instantiate_from_output(self, cogs, output_datas):
+        if self.get_num_spares() != 0 or self.get_num_occupied() != 0:
+            raise RuntimeError("Cog_Array must be empty before instatiating.")
+        self.extend_spares(cogs)
+        records = {}
+        for cog in cogs:
+            records.setdefault(cog.csv_record(), []).append(cog)
+        for output_data in output_datas:
+            coords = output_data["coords"]
+            matches = records.get(output_data["record"])
+            if (
+                coords is None or not matches or coords not in self.empties_set.slot_indices or
+                self.is_occupied(coords)
+            ):
+                continue
+            self.move_cog_from_spares(coords, matches.pop(0))
+        self._place_random_spares()
         return self
 
     """
@@ -117,30 +267,57 @@ class Cog_Array:
     - This method will not remove or replace cogs that have already been placed on the cog array.
     """
     def randomize(self):
+        if not self._place_random_spares():
+            raise Cog_Not_Found_Error
+        return self
+
+    """
+    - Goes through the coords in a random order and places a random spare (see `_pick_spare') on each unoccupied one,
+    until the spares run out. Returns `False' if an unoccupied coords was left without a spare.
+    - The slots and spares are worked on as `lists', and each spare is removed with `_swap_pop', so that this takes
+    time proportional to the number of slots.
+    """
+    def _place_random_spares(self):
         self._reset_rates()
+        slot_indices = self.empties_set.slot_indices
+        slots = self.get_slot_indices().tolist()
+        spares = self._get_spare_indices().tolist()
         for coords in Coords_Iter(self,True):
-            if not self.is_occupied(coords):
-                self.move_random_cog_from_spares(coords)
-        return self
+            s = slot_indices[coords]
+            if slots[s] < 0:
+                if len(spares) == 0:
+                    self._set_genome(slots, spares)
+                    return False
+                slots[s] = _swap_pop(spares, self._pick_spare(s, spares))
+                self._num_occupied += 1
+        self._set_genome(slots, spares)
+        return True
 
     """
     Place a cog by coords.
     """
     def __setitem__(self, coords, cog):
-        if coords.is_out_of_bounds() or coords in self.empties_set:
+        s = self.empties_set.slot_indices.get(coords)
+        if s is None:
             raise RuntimeError("invalid coords")
-        if not self.is_occupied(coords):
-            self._num_occupied += 1
-        self.array[coords.x, coords.y] = cog
+        old_index = int(self.genome[s])
+        if cog is None:
+            self.genome[s] = -1
+            self._num_occupied -= old_index >= 0
+        else:
+            self.genome[s] = _cog_registry.index(cog)
+            self._num_occupied += old_index < 0
+        self._update_hash(s, old_index)
         self._reset_rates()
 
     """
     Get a cog by coords.
     """
     def __getitem__(self, coords):
-        if coords.is_out_of_bounds() or coords in self.empties_set:
+        s = self.empties_set.slot_indices.get(coords)
+        if s is None:
             return None
-        return self.array[coords.x, coords.y]
+        return _cog_registry.objects[self.genome[s]]
 
     def __str__(self):
         ret = ""
@@ -173,19 +350,43 @@ class Cog_Array:
     def __iter__(self):
         return ((coords,self[coords]) for coords in Coords_Iter(self))
 
+    """
+    - Copies share `empties_set' and `excludes_dict', have the same flaggies, and start without cached rates.
+    - Copying allocates a single `numpy' vector; no cogs are copied.
+    """
     def __copy__(self):
-        cog_array = Cog_Array(self.empties_set, None, self.excludes_dict)
-        cog_array.instantiate_from_array(copy.copy(self.array))
-        cog_array.extend_spares(copy.copy(self.spares))
-        return cog_array
+        child = self._make_child(self.genome.copy(), self.num_spares, self._num_occupied)
+        child._hash = self._hash
+        return child
+
+    """
+    Registry numbers are only meaningful within one process, so pickles store the cogs themselves.
+    """
+    def __getstate__(self):
+        return {
+            "empties_set": self.empties_set,
+            "flaggies": self.flaggies,
+            "excludes_dict": self.excludes_dict,
+            "slot_cogs": self._get_slot_cogs(),
+            "spare_cogs": self._get_spare_cogs()
+        }
+
+    def __setstate__(self, state):
+        Cog_Array.__init__(self, state["empties_set"], state["flaggies"], state["excludes_dict"])
+        for coords, cog in zip(self.empties_set.coords_list, state["slot_cogs"]):
+            if cog is not None:
+                self[coords] = cog
+        self.extend_spares(state["spare_cogs"])
 
     def __eq__(self, other):
-        if self.empties_set != other.empties_set or self.spares != other.spares or self.flaggies != other.flaggies:
+        if (
+                self.empties_set != other.empties_set or self.flaggies != other.flaggies or
+                self.get_num_spares() != other.get_num_spares()
+        ):
             return False
-        for coords,cog in self:
-            if cog != other[coords]:
-                return False
-        return True
+        if not np.array_equal(self.get_slot_indices(), other.get_slot_indices()):
+            return False
+        return np.array_equal(np.sort(self._get_spare_indices()), np.sort(other._get_spare_indices()))
 
     def __ne__(self, other):
         return not(self==other)
@@ -256,56 +457,63 @@ class Cog_Array:
         > `self[coords].get_average_std_obj()[0]' and
         > `other[coords].get_average_std_obj()[0]'.
     - Under certain circumstances, `child[coord]' will be neither `self[coord]' nor `other[coord]'. This will happen if 
-    both of these cogs have already been placed somewhere else in `child'. 
+    both of these cogs have already been placed somewhere else in `child'.
+    - `other' must have the same `empties_set' as `self'. `child' is built directly from the genomes of its parents;
+    neither parent is copied.
+    - The slots are decided in a random order, in bulk; see `cross_breed_genomes', which cross breeds many pairs at once.
     """
     def cross_breed(self,other):
-        child = copy.copy(self)
-        child.move_all_to_spares()
-        for coords in Coords_Iter(self, True):
-            self_strength = self[coords].get_strength(coords)*self[coords].get_average_std_obj()[0]
-            other_strength = other[coords].get_strength(coords)*other[coords].get_average_std_obj()[0]
-            self_weight = self_strength/(self_strength + other_strength)
-            if random.uniform(0,1) <= self_weight:
-                if self[coords] in child.spares:
-                    child.move_cog_from_spares(coords, self[coords])
-                elif other[coords] in child.spares:
-                    child.move_cog_from_spares(coords, other[coords])
-                else:
-                    child.move_random_cog_from_spares(coords)
-            else:
-                if other[coords] in child.spares:
-                    child.move_cog_from_spares(coords, other[coords])
-                elif self[coords] in child.spares:
-                    child.move_cog_from_spares(coords, self[coords])
-                else:
-                    child.move_random_cog_from_spares(coords)
-        return child
+        genomes = stack_genomes([self, other])
+        return self.from_genome(cross_breed_genomes(self, genomes, [(0, 1)])[0])
+
+    """
+    - Returns a new `Cog_Array' with the template of `self' and the given genome, e.g. a row of the matrix returned by
+    `cross_breed_genomes': slots, then spares, then `-1' padding. The row is used as is, not copied.
+    - Like copies, the new array has the flaggies of `self'.
+    """
+    def from_genome(self, genome):
+        return self._make_child(
+            genome, int(np.count_nonzero(genome[self.num_slots:] >= 0)),
+            int(np.count_nonzero(genome[:self.num_slots] >= 0))
+        )
 
     """
     - This method produces a new `Cog_Array' called `child'. 
     - First, randomly choose a cog placed in `self'. Then, choose a random cog from `self.spares'. Switch these two.
+    - `old_cog' takes the place of the chosen spare among the spares.
     """
     def one_point_mutation(self):
         if self.get_num_spares() == 0:
             raise Cog_Not_Found_Error
-        child = copy.copy(self)
         coords = self.get_random_coords()
-        old_cog = child[coords]
-        child[coords] = None
-        child.move_random_cog_from_spares(coords)
-        child.add_spare(old_cog)
-        return child,coords,old_cog
+        s = self.empties_set.slot_indices[coords]
+        old_index = int(self.genome[s])
+        position = self._pick_spare(s, self._get_spare_indices().tolist())
+        child = copy.copy(self)
+        genome = child.genome
+        start = self.num_slots + position
+        genome[s] = genome[start]
+        if old_index >= 0:
+            genome[start] = old_index
+        else:
+            child._remove_spare(position)
+            child._num_occupied += 1
+        child._hash = None
+        child.derive_rates(self, [coords])
+        return child,coords,_cog_registry.objects[old_index]
 
     """
     - Switch two cogs that are currently placed in the array.
     - This method ignores the cog shelf, `self.spares`.
     """
     def two_point_mutation(self):
+        coords1,coords2 = self.get_random_coords(2)
+        s1 = self.empties_set.slot_indices[coords1]
+        s2 = self.empties_set.slot_indices[coords2]
         child = copy.copy(self)
-        coords1,coords2 = child.get_random_coords(2)
-        cog1 = child[coords1]
-        child[coords1] = child[coords2]
-        child[coords2] = cog1
+        child.genome[s1], child.genome[s2] = self.genome[s2], self.genome[s1]
+        child._hash = None
+        child.derive_rates(self, [coords1, coords2])
         return child, coords1, coords2
 
 
@@ -315,12 +523,10 @@ class Cog_Array:
     - This method ignores the return value of `self.excludes(coords, cog)'.
     """
     def move_cog_from_spares(self, coords, cog):
-        if cog not in self.spares:
+        position = self._find_spare(cog)
+        if position < 0:
             raise Cog_Not_Found_Error
-        self.spares.remove(cog)
-        self.move_cog_to_spares(coords)
-        self[coords] = cog
-        self._reset_rates()
+        self._place_spare(coords, position)
         return self
 
     """
@@ -333,32 +539,29 @@ class Cog_Array:
     def move_random_cog_from_spares(self,coords):
         if self.get_num_spares() == 0:
             raise Cog_Not_Found_Error
-        attempts = 0
-        while attempts < len(self.spares):
-            cog = random.sample(self.spares, 1)[0]
-            if not self.excludes(coords,cog):
-                break
-            attempts += 1
-        else:
-            cog = random.sample(self.spares, 1)[0]
-        self.move_cog_from_spares(coords,cog)
-        return cog
+        s = self.empties_set.slot_indices[coords]
+        return _cog_registry.cogs[self._place_spare(coords, self._pick_spare(s, self._get_spare_indices()))]
 
     def move_cog_to_spares(self,coords):
         if self.is_occupied(coords):
             self.add_spare(self[coords])
-            self.array[coords.x,coords.y] = None
-            self._reset_rates()
-            self._num_occupied -= 1
+            self[coords] = None
         return self
 
     def move_all_to_spares(self):
-        for coords in Coords_Iter(self):
-            self.move_cog_to_spares(coords)
+        spares = self._get_spare_indices().tolist()
+        for index in self.get_slot_indices().tolist():
+            if index >= 0 and index not in spares:
+                spares.append(index)
+        self._num_occupied = 0
+        self._reset_rates()
+        self._set_genome([-1] * self.num_slots, spares)
         return self
 
     def add_spare(self,cog):
-        self.spares.add(cog)
+        index = _cog_registry.index(cog)
+        if self._find_spare_index(index) < 0:
+            self._append_spare(index)
         return self
 
     def extend_spares(self,cogs):
@@ -366,14 +569,264 @@ class Cog_Array:
             self.add_spare(cog)
         return self
 
+    def is_spare(self,cog):
+        return self._find_spare(cog) >= 0
+
     def is_occupied(self,coords):
-        return self[coords] is not None
+        s = self.empties_set.slot_indices.get(coords)
+        return s is not None and self.genome[s] >= 0
 
     def is_flaggy(self,coords):
         return coords in self.flaggies
 
     def _reset_rates(self):
         self.build_rate = self.flaggy_rate = self.total_exp_mult = None
+        self.flaggy_base_rate = self.flaggy_speed = None
+
+    """
+    Returns `True' if all the rates of `self' are cached, so that the rate getters below return immediately.
+    """
+    def has_rates(self):
+        return (
+            self.build_rate is not None and self.flaggy_base_rate is not None and self.flaggy_speed is not None and
+            self.total_exp_mult is not None
+        )
+
+    """
+    Returns the cached rates of `self' as a `tuple' for `set_rates', or `None' if they are not all cached.
+    """
+    def get_rates(self):
+        if not self.has_rates():
+            return None
+        return self.build_rate, self.flaggy_base_rate, self.flaggy_speed, self.flaggy_rate, self.total_exp_mult
+
+    def set_rates(self, rates):
+        self.build_rate, self.flaggy_base_rate, self.flaggy_speed, self.flaggy_rate, self.total_exp_mult = rates
+        return self
+
+    """
+    - `parent' must differ from `self' only at the coords in `changed_coords'.
+    - If the rates of `parent' are cached, then this method sets the rates of `self' without walking the whole array. It
+    subtracts the parts of the rates of `parent' that involve `changed_coords' and adds those of `self'. This takes time
+    proportional to the size of the `get_influence' footprints of the changed coords.
+    - If `self' and `parent' have different flaggies (e.g. the flaggies of `self' were set by hand), the rates of
+    `self' are left to be computed from scratch, since the flaggy speed depends on the flaggies at every coords.
+    - Derived rates may differ from freshly computed ones in the last few bits, due to floating point rounding.
+    """
+    def derive_rates(self, parent, changed_coords):
+        if not parent.has_rates() or self.flaggies != parent.flaggies:
+            return self
+        old_build, old_flaggy, old_speed, old_exp = parent._get_partial_rates(changed_coords)
+        new_build, new_flaggy, new_speed, new_exp = self._get_partial_rates(changed_coords)
+        self.build_rate = parent.build_rate - old_build + new_build
+        self.flaggy_base_rate = parent.flaggy_base_rate - old_flaggy + new_flaggy
+        self.flaggy_speed = parent.flaggy_speed - old_speed + new_speed
+        self.flaggy_rate = self.flaggy_base_rate*(1+self.flaggy_speed)
+        self.total_exp_mult = parent.total_exp_mult - old_exp + new_exp
+        return self
+
+    """
+    - Returns the parts of the build rate, the flaggy rate (before flaggy speed), the flaggy speed and the exp mult that
+    involve the cogs at `changed_coords': their own rates, the boosts they give and the boosts they receive.
+    - Boosts between two changed coords are counted once.
+    """
+    def _get_partial_rates(self, changed_coords):
+        empties_set = self.empties_set
+        slots = [empties_set.slot_indices[coords] for coords in changed_coords]
+        slot_cogs = self._get_slot_cogs()
+        build = flaggy = speed = exp = 0.0
+        for s in slots:
+            cog = slot_cogs[s]
+            if cog is None:
+                continue
+            build += cog.build_rate
+            flaggy += cog.flaggy_rate
+            exp += cog.exp_mult
+            if isinstance(cog, Boost_Cog):
+                for adj_slot in empties_set.influence_slots[type(cog)][s]:
+                    adj_cog = slot_cogs[adj_slot]
+                    if adj_cog is not None:
+                        build += adj_cog.build_rate * cog.build_rate_boost
+                        flaggy += adj_cog.flaggy_rate * cog.flaggy_rate_boost
+                if cog.flaggy_speed_boost > 0 and len(self.flaggies) > 0:
+                    speed += self._get_num_flaggy_influence(cog, s) * (cog.flaggy_speed_boost/len(self.flaggies))
+            for p, cog_type in empties_set.influencer_slots[s]:
+                if p in slots:
+                    continue
+                src_cog = slot_cogs[p]
+                if type(src_cog) is cog_type:
+                    build += cog.build_rate * src_cog.build_rate_boost
+                    flaggy += cog.flaggy_rate * src_cog.flaggy_rate_boost
+        return build, flaggy, speed, exp
+
+    """
+    - Returns a 64-bit Zobrist hash of the placement of `self': the XOR of `_cog_registry.zobrist[i, f]' over the
+    occupied slots, where `i' is the number of the cog on the slot and `f' its flat position.
+    - Spares do not count, and neither does which of several cogs with the same `cog_registry.get_stats_key' sits on a
+    slot. So arrays with the same hash (barring collisions) have the same rates, if they share `empties_set' and
+    `flaggies'.
+    - `__setitem__' (and so `move_cog_from_spares' and `move_cog_to_spares') updates the hash of an array in constant
+    time. Other changes (e.g. the mutations, `randomize' and `from_genome') drop it, and it is recomputed here when next
+    needed. This is cheaper than updating it, since `get_placement_hashes' hashes a whole batch of children at once.
+    """
+    def get_placement_hash(self):
+        if self._hash is None:
+            zobrist = _cog_registry.zobrist[self.get_slot_indices(), self.empties_set.flat_indices]
+            self._hash = int(np.bitwise_xor.reduce(zobrist))
+        return self._hash
+
+    def _update_hash(self, s, old_index):
+        if self._hash is not None:
+            f = self.empties_set.flat_indices[s]
+            zobrist = _cog_registry.zobrist
+            self._hash ^= zobrist.item(old_index, f) ^ zobrist.item(self.genome[s], f)
+
+    """
+    Returns the `Cog_Registry' numbers of the cogs on each slot (`-1' if unoccupied), in the order of
+    `self.empties_set.coords_list'. The returned vector is a view of `self.genome' and must not be modified.
+    """
+    def get_slot_indices(self):
+        return self.genome[:self.num_slots]
+
+    """
+    Returns a `list' of the cogs (or `None') on each slot, in the order of `self.empties_set.coords_list'.
+    """
+    def _get_slot_cogs(self):
+        return _cog_registry.objects[self.genome[:self.num_slots]].tolist()
+
+    def _get_spare_indices(self):
+        return self.genome[self.num_slots:self.num_slots + self.num_spares]
+
+    def _get_spare_cogs(self):
+        return _cog_registry.objects[self._get_spare_indices()].tolist()
+
+    """
+    Returns the position of `cog' among the spares, or `-1'.
+    """
+    def _find_spare(self, cog):
+        index = _cog_registry.indices.get(cog)
+        return self._find_spare_index(index) if index is not None else -1
+
+    """
+    Returns the position of the cog with `Cog_Registry' number `index' among the spares, or `-1'. The first call builds
+    `self._spare_positions', in time proportional to the number of spares; later calls take constant time.
+    """
+    def _find_spare_index(self, index):
+        if self._spare_positions is None:
+            self._spare_positions = {index: p for p, index in enumerate(self._get_spare_indices().tolist())}
+        return self._spare_positions.get(index, -1)
+
+    """
+    - Returns the position in `spares', a non-empty `list' of `Cog_Registry' numbers, of a random spare to place on
+    slot `s'.
+    - `spares' may also be a `numpy' vector, e.g. `self._get_spare_indices()'.
+    - The spare is drawn uniformly among those that `self.excluded_types[s]' allows, or among all of them if none is
+    allowed. Slots that exclude nothing take a single draw. Otherwise up to `MAX_SPARE_REJECTIONS' random spares are
+    tried before the allowed ones are found by a scan, so a draw takes constant expected time whenever a fixed fraction
+    of the spares is allowed.
+    """
+    def _pick_spare(self, s, spares):
+        position = random.randrange(len(spares))
+        excluded = self.excluded_types[s]
+        if not excluded:
+            return position
+        registry_cogs = _cog_registry.cogs
+        for _ in range(MAX_SPARE_REJECTIONS):
+            if type(registry_cogs[spares[position]]) not in excluded:
+                return position
+            position = random.randrange(len(spares))
+        allowed = [p for p, index in enumerate(spares) if type(registry_cogs[index]) not in excluded]
+        return allowed[random.randrange(len(allowed))] if len(allowed) > 0 else position
+
+    """
+    - Returns a new `Cog_Array' with the template of `self' that takes ownership of `genome', which holds `num_spares'
+    spares and `num_occupied' occupied slots.
+    - Like copies, the new array has the flaggies of `self' and no cached rates.
+    """
+    def _make_child(self, genome, num_spares, num_occupied):
+        child = Cog_Array.__new__(Cog_Array)
+        child.empties_set = self.empties_set
+        child.flaggies = set(self.flaggies)
+        child.excludes_dict = self.excludes_dict
+        child.excluded_types = self.excluded_types
+        child.genome = genome
+        child.num_slots = self.num_slots
+        child.num_spares = num_spares
+        child._num_occupied = num_occupied
+        child._hash = None
+        child._spare_positions = None
+        child._reset_rates()
+        return child
+
+    """
+    Overwrites `self.genome' with the `list' of slot numbers `slots', followed by the `list' of spare numbers `spares'.
+    """
+    def _set_genome(self, slots, spares):
+        if self.num_slots + len(spares) > len(self.genome):
+            self.genome = np.full(self.num_slots + 2 * len(spares), -1, dtype=COG_INDEX_DTYPE)
+        self.genome[:self.num_slots] = slots
+        self.genome[self.num_slots:self.num_slots + len(spares)] = spares
+        self.genome[self.num_slots + len(spares):] = -1
+        self.num_spares = len(spares)
+        self._hash = None
+        self._spare_positions = None
+
+    """
+    Removes the spare at `position' by moving the last spare into its place.
+    """
+    def _remove_spare(self, position):
+        end = self.num_slots + self.num_spares
+        if self._spare_positions is not None:
+            del self._spare_positions[int(self.genome[self.num_slots + position])]
+            if position < self.num_spares - 1:
+                self._spare_positions[int(self.genome[end-1])] = position
+        self.genome[self.num_slots + position] = self.genome[end-1]
+        self.genome[end-1] = -1
+        self.num_spares -= 1
+
+    """
+    Adds the cog with `Cog_Registry' number `index', which must not be a spare yet, after the last spare.
+    """
+    def _append_spare(self, index):
+        end = self.num_slots + self.num_spares
+        if end == len(self.genome):
+            self.genome = np.concatenate((self.genome, np.full(max(end, 8), -1, dtype=COG_INDEX_DTYPE)))
+        self.genome[end] = index
+        if self._spare_positions is not None:
+            self._spare_positions[index] = self.num_spares
+        self.num_spares += 1
+
+    """
+    - Moves the spare at `position' to `coords', and the cog on `coords', if any, after the last spare. Returns the
+    `Cog_Registry' number of the placed cog.
+    - Raises a `RuntimeError' if `coords' is not a slot.
+    """
+    def _place_spare(self, coords, position):
+        s = self.empties_set.slot_indices.get(coords)
+        if s is None:
+            raise RuntimeError("invalid coords")
+        index = int(self.genome[self.num_slots + position])
+        old_index = int(self.genome[s])
+        self._remove_spare(position)
+        if old_index >= 0:
+            self._append_spare(old_index)
+        self.genome[s] = index
+        self._num_occupied += old_index < 0
+        self._update_hash(s, old_index)
+        self._reset_rates()
+        return index
+
+    """
+    Returns how many of the coords boosted by `cog' placed on slot `s' hold a flaggy.
+    """
+    def _get_num_flaggy_influence(self, cog, s):
+        if len(self.flaggies) == 0:
+            return 0
+        coords_list = self.empties_set.coords_list
+        return (
+            sum(coords_list[adj_slot] in self.flaggies for adj_slot in self.empties_set.influence_slots[type(cog)][s]) +
+            sum(adj_coords in self.flaggies for adj_coords in self.empties_set.influence_empties[type(cog)][s])
+        )
 
     """
     Calculate the total build rate of the array.
@@ -381,14 +834,16 @@ class Cog_Array:
     def get_build_rate(self):
         if self.build_rate is None:
             total = 0
-            for coords, cog in self:
-                if self.is_occupied(coords):
+            influence_slots = self.empties_set.influence_slots
+            slot_cogs = self._get_slot_cogs()
+            for s, cog in enumerate(slot_cogs):
+                if cog is not None:
                     if isinstance(cog, Boost_Cog):
                         rate = cog.build_rate_boost
                         if rate > 0:
-                            for adj_cog_coords in cog.get_influence(coords):
-                                if self.is_occupied(adj_cog_coords):
-                                    adj_cog = self[adj_cog_coords]
+                            for adj_slot in influence_slots[type(cog)][s]:
+                                adj_cog = slot_cogs[adj_slot]
+                                if adj_cog is not None:
                                     total += adj_cog.build_rate * rate
                     total += cog.build_rate
             self.build_rate = total
@@ -404,21 +859,24 @@ class Cog_Array:
     def get_flaggy_rate(self):
         if self.flaggy_rate is None:
             total_rate = total_speed = 0
-            for coords, cog in self:
-                if self.is_occupied(coords):
+            influence_slots = self.empties_set.influence_slots
+            slot_cogs = self._get_slot_cogs()
+            for s, cog in enumerate(slot_cogs):
+                if cog is not None:
                     if isinstance(cog, Boost_Cog):
                         rate = cog.flaggy_rate_boost
                         if rate > 0:
-                            for adj_cog_coords in cog.get_influence(coords):
-                                if self.is_occupied(adj_cog_coords):
-                                    adj_cog = self[adj_cog_coords]
+                            for adj_slot in influence_slots[type(cog)][s]:
+                                adj_cog = slot_cogs[adj_slot]
+                                if adj_cog is not None:
                                     total_rate += adj_cog.flaggy_rate * rate
                         speed = cog.flaggy_speed_boost
                         if speed > 0:
-                            for adj_cog_coords in cog.get_influence(coords):
-                                if self.is_flaggy(adj_cog_coords):
-                                    total_speed += speed/len(self.flaggies)
+                            for _ in range(self._get_num_flaggy_influence(cog, s)):
+                                total_speed += speed/len(self.flaggies)
                     total_rate += cog.flaggy_rate
+            self.flaggy_base_rate = total_rate
+            self.flaggy_speed = total_speed
             self.flaggy_rate = total_rate*(1+total_speed)
         return self.flaggy_rate
 
@@ -429,7 +887,7 @@ class Cog_Array:
     """
     def get_total_exp_mult(self):
         if self.total_exp_mult is None:
-            self.total_exp_mult = sum((cog.exp_mult if self.is_occupied(coords) else 0.0) for coords, cog in self)
+            self.total_exp_mult = sum((cog.exp_mult if cog is not None else 0.0) for cog in self._get_slot_cogs())
         # if self.exp_rate is None:
         #     total_rate = sum((cog.exp_rate if self.is_occupied(coords) else 0.0) for coords,cog in self)
         #     total_bonus = 0.0
@@ -445,7 +903,7 @@ class Cog_Array:
         return self.total_exp_mult
 
     def get_num_spares(self):
-        return len(self.spares)
+        return self.num_spares
 
     def get_num_non_empty(self):
         return TOTAL_COORDS - len(self.empties_set)
@@ -460,6 +918,212 @@ class Cog_Array:
         return self._num_occupied
 
 
+"""
+- Returns a `list' with `arrays[i].get_placement_hash()' at position `i'. `arrays' must share a template.
+- The hashes that are not cached are computed in a single batch, and cached.
+"""
+def get_placement_hashes(arrays):
+    unhashed = [array for array in arrays if array._hash is None]
+    if len(unhashed) > 0:
+        num_slots = unhashed[0].num_slots
+        slots = np.array([array.genome[:num_slots] for array in unhashed])
+        zobrist = _cog_registry.zobrist[slots, unhashed[0].empties_set.flat_indices]
+        for array, value in zip(unhashed, np.bitwise_xor.reduce(zobrist, axis=1).tolist()):
+            array._hash = value
+    return [array._hash for array in arrays]
+
+"""
+Returns a matrix with the `Cog_Registry.stats_classes' of the cogs on the slots of the `i'-th of `arrays' on row `i' (`-1'
+if unoccupied). `arrays' is any iterable of arrays that share a template.
+"""
+def get_stats_classes(arrays):
+    return _cog_registry.stats_classes[np.array([array.get_slot_indices() for array in arrays], dtype=COG_INDEX_DTYPE)]
+
+"""
+- Returns a `COG_INDEX_DTYPE' matrix with the genome of `arrays[i]' on row `i': its slots, then its spares, then `-1'
+padding up to the longest genome. `arrays' must share a template.
+"""
+def stack_genomes(arrays):
+    length = max(array.num_slots + array.num_spares for array in arrays)
+    genomes = np.full((len(arrays), length), -1, dtype=COG_INDEX_DTYPE)
+    for genome, array in zip(genomes, arrays):
+        end = array.num_slots + array.num_spares
+        genome[:end] = array.genome[:end]
+    return genomes
+
+"""
+- Cross breeds many pairs of parents at once. `genomes' is a matrix of parent genomes, as returned by `stack_genomes',
+and `pairs' is a sequence of `M' pairs of row numbers. Pair `(i, j)' stands for `self.cross_breed(other)' with the parents
+on rows `i' and `j'. `template' is any `Cog_Array' with the template of the parents.
+- Returns an `(M, genomes.shape[1])' matrix of child genomes, in the layout of `genomes'. Its first `template.num_slots'
+columns are the children's slots. `template.from_genome' turns a row into a `Cog_Array'.
+- For each child, the slots are decided one at a time, in a random order. Each slot draws the parent it prefers with the
+odds of `Cog_Array.cross_breed' and takes that parent's cog if it is still free, else the other parent's cog if that one
+is free, else a random free cog, as in `Cog_Array.move_random_cog_from_spares'. An unoccupied slot of a parent has no
+strength, so the other parent's cog is preferred there. The cogs of a child are those of its first parent.
+- This is done in bulk: the orders and all the draws are made at once, and every slot whose preferred cog is wanted by no
+other slot of the same child takes it right away. Only the remaining slots go through the order, rank by rank, for all
+the children at once (see `_resolve_contested_slots').
+"""
+def cross_breed_genomes(template, genomes, pairs):
+    n = template.num_slots
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    num_children = len(pairs)
+    parents = genomes[pairs[:, 0]]
+    self_slots = parents[:, :n]
+    other_slots = genomes[pairs[:, 1], :n]
+    flat_indices = template.empties_set.flat_indices
+    self_strengths = np.where(self_slots >= 0, _cog_registry.get_weighted_strengths(self_slots, flat_indices), 0.0)
+    other_strengths = np.where(other_slots >= 0, _cog_registry.get_weighted_strengths(other_slots, flat_indices), 0.0)
+    if np.isnan(self_strengths).any() or np.isnan(other_strengths).any():
+        indices = np.concatenate((self_slots.ravel(), other_slots.ravel()))
+        for cog in _cog_registry.objects[np.unique(indices[indices >= 0])].tolist():
+            cog.get_average_std_obj()
+    words = _random_words(num_children * n).reshape(num_children, n)
+    choose_self = (words >> np.uint64(32)) * 2.0**-32 <= self_strengths / (self_strengths + other_strengths)
+    firsts = np.where(choose_self, self_slots, other_slots)
+    seconds = np.where(choose_self, other_slots, self_slots)
+
+    width = len(_cog_registry) + 1
+    rows = np.arange(num_children)[:, None]
+    is_free = np.zeros((num_children, width), dtype=bool)
+    is_free[rows, parents] = True
+    is_free[:, -1] = False
+    wanted = np.concatenate((
+        (rows * width + firsts % width).ravel(), (rows * width + seconds % width)[seconds != firsts]
+    ))
+    num_wanted = np.bincount(wanted, minlength=num_children * width).reshape(num_children, width)
+    uncontested = is_free[rows, firsts] & (num_wanted[rows, firsts] == 1)
+    children = np.full(parents.shape, -1, dtype=COG_INDEX_DTYPE)
+    children[:, :n] = np.where(uncontested, firsts, -1)
+
+    order = np.argsort(words & np.uint64(0xFFFFFFFF), axis=1)
+    ranks = np.empty_like(order)
+    ranks[rows, order] = np.arange(n)
+    rank_of = np.full((num_children, width), -1, dtype=np.intp)
+    rank_of[rows, parents] = n
+    rank_of[rows, children[:, :n]] = np.where(uncontested, ranks, -1)
+    rank_of[:, -1] = -1
+    _resolve_contested_slots(template, children, rank_of, order, firsts, seconds, ~uncontested[rows, order])
+
+    is_spare = rank_of[rows, parents] == n
+    num_spares = np.count_nonzero(is_spare, axis=1)
+    spares = np.take_along_axis(parents, np.argsort(~is_spare, axis=1, kind="stable"), axis=1)
+    spares[np.arange(parents.shape[1]) >= num_spares[:, None]] = -1
+    children[:, n:] = spares[:, :parents.shape[1] - n]
+    return children
+
+"""
+- Finishes the slots of the children of `cross_breed_genomes'. `children' holds their genomes, with the uncontested slots
+decided and the other slots `-1'. `order[r, k]' is the slot of child `r' with rank `k' in its random order, and
+`pending[r, k]' tells if that slot is still to be decided. `firsts' and `seconds' are the preferred and other cog of each
+slot.
+- `rank_of[r, i]' is `-1' if the cog with `Cog_Registry' number `i' is not among the cogs of child `r' or has been placed,
+the rank of the uncontested slot that holds it if it is claimed, and `template.num_slots' if it is free.
+- The ranks are walked in order, and at each rank, the pending slot of every child is decided at once, as in
+`cross_breed_genomes'. A random cog is drawn like `Cog_Array._pick_spare' does, among the free cogs and those claimed by a
+slot of a higher rank. Such a slot loses its cog and becomes pending. `children', `rank_of' and `pending' are updated in
+place.
+- With fewer than `MIN_BULK_CHILDREN' children, the fixed cost of the `numpy' calls of each rank outweighs the work, so
+each child goes through `_resolve_child_slots' instead. A single child comes out the same either way.
+"""
+def _resolve_contested_slots(template, children, rank_of, order, firsts, seconds, pending):
+    n = template.num_slots
+    if len(children) < MIN_BULK_CHILDREN:
+        for r in range(len(children)):
+            inventory = np.flatnonzero(rank_of[r] >= 0)
+            slots = children[r, :n].tolist()
+            _resolve_child_slots(
+                template, slots, dict(zip(inventory.tolist(), rank_of[r, inventory].tolist())), order[r].tolist(),
+                firsts[r].tolist(), seconds[r].tolist(), pending[r].tolist()
+            )
+            children[r, :n] = slots
+            rank_of[r, children[r, :n]] = -1
+        return
+    allowed = None
+    active = pending.any(axis=0).tolist()
+    for k in range(n):
+        if not active[k]:
+            continue
+        r = np.flatnonzero(pending[:, k])
+        s = order[r, k]
+        first, second = firsts[r, s], seconds[r, s]
+        index = np.where(rank_of[r, first] > k, first, np.where(rank_of[r, second] > k, second, -1))
+        f = np.flatnonzero(index < 0)
+        if len(f) > 0:
+            if allowed is None:
+                allowed = _get_allowed_slots(template, rank_of.shape[1])
+            candidates = rank_of[r[f]] > k
+            allowed_candidates = candidates & allowed[s[f]]
+            candidates = np.where(allowed_candidates.any(axis=1)[:, None], allowed_candidates, candidates)
+            num_candidates = np.count_nonzero(candidates, axis=1)
+            if not np.all(num_candidates > 0):
+                raise Cog_Not_Found_Error
+            picks = ((_random_words(len(f)) >> np.uint64(11)) * (num_candidates * 2.0**-53)).astype(np.intp)
+            index[f] = np.argmax(np.cumsum(candidates, axis=1) > picks[:, None], axis=1)
+        claim_ranks = rank_of[r, index]
+        evicted = np.flatnonzero((claim_ranks > k) & (claim_ranks < n))
+        if len(evicted) > 0:
+            evicted_rows, evicted_ranks = r[evicted], claim_ranks[evicted]
+            children[evicted_rows, order[evicted_rows, evicted_ranks]] = -1
+            pending[evicted_rows, evicted_ranks] = True
+            for rank in evicted_ranks.tolist():
+                active[rank] = True
+        rank_of[r, index] = -1
+        children[r, s] = index
+
+"""
+`_resolve_contested_slots' for one child, on `lists': `slots' is its row of `children', `order', `firsts', `seconds' and
+`pending' are its rows of the matrices of the same names, and `rank_of' maps the `Cog_Registry' number of each of its cogs
+to its entry in `rank_of'. `slots' and `rank_of' are updated in place.
+"""
+def _resolve_child_slots(template, slots, rank_of, order, firsts, seconds, pending):
+    n = template.num_slots
+    for k in range(n):
+        if not pending[k]:
+            continue
+        s = order[k]
+        if rank_of.get(firsts[s], -1) > k:
+            index = firsts[s]
+        elif rank_of.get(seconds[s], -1) > k:
+            index = seconds[s]
+        else:
+            candidates = sorted(index for index, rank in rank_of.items() if rank > k)
+            if len(candidates) == 0:
+                raise Cog_Not_Found_Error
+            if template.excluded_types[s]:
+                allowed = _get_allowed_slots(template, len(_cog_registry) + 1)[s]
+                allowed_candidates = [index for index in candidates if allowed[index]]
+                if len(allowed_candidates) > 0:
+                    candidates = allowed_candidates
+            index = candidates[int((random.getrandbits(64) >> 11) * (len(candidates) * 2.0**-53))]
+        rank = rank_of[index]
+        if k < rank < n:
+            slots[order[rank]] = -1
+            pending[rank] = True
+        rank_of[index] = -1
+        slots[s] = index
+
+"""
+- Returns a `bool' matrix with a row per slot of `template' and `width' columns: entry `(s, i)' tells if
+`template.excluded_types[s]' allows the cog with `Cog_Registry' number `i' on slot `s'.
+- The matrix is cached by `excluded_types', for the latest `width'. It must not be modified.
+"""
+def _get_allowed_slots(template, width):
+    excluded_types = template.excluded_types
+    allowed = _allowed_slots_cache.get(excluded_types)
+    if allowed is not None and allowed.shape[1] == width:
+        return allowed
+    allowed = np.ones((template.num_slots, width), dtype=bool)
+    cog_types = [type(cog) for cog in _cog_registry.cogs[:width - 1]]
+    for s, excluded in enumerate(excluded_types):
+        if excluded:
+            allowed[s, :len(cog_types)] = [cog_type not in excluded for cog_type in cog_types]
+    _allowed_slots_cache[excluded_types] = allowed
+    return allowed
+
+_allowed_slots_cache = {}
+
 """
 Iterates through all the non-empty coordinates of an input `Cog_Array'.
 """
@@ -0,0 +1,164 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+import hashlib
+
+import numpy as np
+
+from constants import NUM_COGS_HORI, NUM_COGS_VERT
+
+"""
+The integer type of `Cog_Array.genome'. It bounds the number of distinct cogs per process.
+"""
+COG_INDEX_DTYPE = np.int16
+
+"""
+`Cog_Registry.strength_totals[i]' is renormalized to 1 once it leaves `[1/STRENGTH_TOTAL_BOUND, STRENGTH_TOTAL_BOUND]'.
+"""
+STRENGTH_TOTAL_BOUND = 2.0 ** 20
+
+"""
+Seeds the random numbers of `Cog_Registry.zobrist', together with the stats of each cog, so that the same placements
+hash to the same keys in every run and every process, whatever order the cogs are registered in.
+"""
+ZOBRIST_SEED = 20211
+
+"""
+- The `Cog_Registry' numbers every cog that has ever been placed on or added to a `Cog_Array', or given strengths, so
+that a `Cog_Array' can store small integers instead of references to `Cog' objects.
+- `registry.index(cog)' is the number of `cog', registering it first if need be. `registry.cogs[i]' is the cog with
+number `i'.
+- `registry.objects' is a `numpy' object array with `registry.cogs' at the front and `None' everywhere else. In particular
+`registry.objects[-1]' is `None', so that the number `-1', which stands for an unoccupied slot, maps to `None'.
+- The strengths of all the cogs (see `Cog.strengths') are kept in one tensor, row `i' for the cog with number `i':
+    > `registry.strengths' has shape `(capacity, NUM_COGS_HORI, NUM_COGS_VERT)' and holds unnormalized strengths.
+    > `registry.strength_totals[i]' is the sum of `registry.strengths[i]', so that the strengths of cog `i' are
+    `registry.strengths[i] / registry.strength_totals[i]'. It is kept up to date as single entries change, instead of
+    renormalizing the whole row. Unused rows, including the last one, are zero with a total of 1.
+- `registry.average_objs[i]' mirrors `cog.average_obj' of the cog with number `i', or is `nan' if that is `None'. `Cog'
+keeps it up to date.
+- Cogs with the same `get_stats_key' form a stats class. `registry.stats_classes[i]' is the number of the stats class of
+the cog with number `i', or `-1' for unused rows.
+- `registry.zobrist[i]' holds one random 64-bit number per flat position for the cog with number `i', for the placement
+hashes of `Cog_Array.get_placement_hash'. Cogs of the same stats class share the same numbers, so that a placement
+hashes the same whichever of several identical cogs is placed. The last row is zero, for unoccupied slots.
+- There is one registry per process, `_cog_registry', shared by every `Cog_Array'. Cogs are compared by identity and are
+never unregistered. Strengths are per process: they are not copied or pickled along with the cogs.
+"""
+class Cog_Registry:
+    def __init__(self):
+        self.cogs = []
+        self.indices = {}
+        self.objects = np.full(64, None, dtype=object)
+        self.strengths = np.zeros((64, NUM_COGS_HORI, NUM_COGS_VERT))
+        self.strength_totals = np.ones(64)
+        self.average_objs = np.full(64, np.nan)
+        self.stats_classes = np.full(64, -1, dtype=COG_INDEX_DTYPE)
+        self.stats_class_numbers = {}
+        self.zobrist = np.zeros((64, NUM_COGS_HORI * NUM_COGS_VERT), dtype=np.uint64)
+        self.zobrist_rows = []
+
+    def index(self, cog):
+        i = self.indices.get(cog)
+        if i is None:
+            i = len(self.cogs)
+            if i >= np.iinfo(COG_INDEX_DTYPE).max:
+                raise RuntimeError("Too many cogs for `COG_INDEX_DTYPE'.")
+            if i + 1 >= len(self.objects):
+                self._grow(2 * len(self.objects))
+            self.cogs.append(cog)
+            self.indices[cog] = i
+            self.objects[i] = cog
+            self.average_objs[i] = _to_float(getattr(cog, "average_obj", None))
+            self.stats_classes[i] = self._get_stats_class(cog)
+            self.zobrist[i] = self.zobrist_rows[self.stats_classes[i]]
+        return i
+
+    def __len__(self):
+        return len(self.cogs)
+
+    """
+    - Returns a `float' vector with the strength of the cog numbered `indices[k]' at the flat position `flat_indices[k]'
+    (`x*NUM_COGS_VERT + y'), for each `k'. The number `-1' has strength 0.
+    - This is a single gather from the strength tensor, e.g. of a whole `Cog_Array' with
+    `registry.get_strengths(cog_array.get_slot_indices(), cog_array.empties_set.flat_indices)'.
+    """
+    def get_strengths(self, indices, flat_indices):
+        rows = self.strengths.reshape(len(self.strengths), -1)
+        return rows[indices, flat_indices] / self.strength_totals[indices]
+
+    """
+    Returns `registry.strengths[k] * registry.average_objs[k]', as in `get_strengths'.
+    """
+    def get_weighted_strengths(self, indices, flat_indices):
+        return self.get_strengths(indices, flat_indices) * self.average_objs[indices]
+
+    def set_average_obj(self, cog, average_obj):
+        i = self.indices.get(cog)
+        if i is not None:
+            self.average_objs[i] = _to_float(average_obj)
+
+    """
+    Rescales row `i' so that its exact sum, and its total, are 1.
+    """
+    def renormalize_strengths(self, i):
+        total = np.sum(self.strengths[i])
+        if total > 0:
+            self.strengths[i] /= total
+        self.strength_totals[i] = 1.0
+
+    def _get_stats_class(self, cog):
+        key = get_stats_key(cog)
+        stats_class = self.stats_class_numbers.get(key)
+        if stats_class is None:
+            stats_class = self.stats_class_numbers[key] = len(self.zobrist_rows)
+            digest = hashlib.blake2b(repr((key[0].__name__,) + key[1:]).encode(), digest_size=8).digest()
+            rng = np.random.default_rng([ZOBRIST_SEED, int.from_bytes(digest, "little")])
+            self.zobrist_rows.append(rng.integers(
+                0, np.iinfo(np.uint64).max, size=self.zobrist.shape[1], dtype=np.uint64, endpoint=True
+            ))
+        return stats_class
+
+    def _grow(self, capacity):
+        n = len(self.cogs)
+        objects = np.full(capacity, None, dtype=object)
+        objects[:n] = self.objects[:n]
+        strengths = np.zeros((capacity, NUM_COGS_HORI, NUM_COGS_VERT))
+        strengths[:n] = self.strengths[:n]
+        strength_totals = np.ones(capacity)
+        strength_totals[:n] = self.strength_totals[:n]
+        average_objs = np.full(capacity, np.nan)
+        average_objs[:n] = self.average_objs[:n]
+        stats_classes = np.full(capacity, -1, dtype=COG_INDEX_DTYPE)
+        stats_classes[:n] = self.stats_classes[:n]
+        zobrist = np.zeros((capacity, NUM_COGS_HORI * NUM_COGS_VERT), dtype=np.uint64)
+        zobrist[:n] = self.zobrist[:n]
+        self.objects, self.strengths, self.strength_totals = objects, strengths, strength_totals
+        self.average_objs, self.stats_classes, self.zobrist = average_objs, stats_classes, zobrist
+
+"""
+Cogs with the same stats key have the same type and stats, so they are interchangeable for every objective function.
+"""
+def get_stats_key(cog):
+    return (
+        type(cog), cog.build_rate, cog.flaggy_rate, cog.exp_mult,
+        getattr(cog, "build_rate_boost", 0), getattr(cog, "flaggy_rate_boost", 0),
+        getattr(cog, "flaggy_speed_boost", 0), getattr(cog, "exp_boost", 0)
+    )
+
+def _to_float(value):
+    return np.nan if value is None else float(value)
+
+_cog_registry = Cog_Registry()
@@ -17,6 +17,7 @@ import itertools
 
 import numpy as np
 
+from cog_registry import STRENGTH_TOTAL_BOUND, _cog_registry
 from constants import ONE_SIG_PROB, NUM_COGS_HORI, NUM_COGS_VERT
 from coords import Coords
 
@@ -29,13 +30,14 @@ example, a `Right_Cog' might have low strength for coordinates on the far right
 - The `strengths' always add to 1.
 - The ndarray `strengths' is always instantiated uniformly (over non-empty coords) via the method 
 `Cog.instantiate_strengths(cog_array)'. 
+- The strengths of all cogs live in one tensor of the shared `cog_registry._cog_registry', row
+`_cog_registry.index(cog)'. `Cog.strengths' is a normalized copy of that row, for reading only.
 """
 class Cog:
     def __init__(self, build_rate, flaggy_rate, exp_mult):
         self.build_rate = build_rate
         self.flaggy_rate = flaggy_rate
         self.exp_mult = exp_mult
-        self.strengths = None
         self.strength_start_value = None
         self.average_obj = None
         self.std_obj = None
@@ -80,15 +82,36 @@ class Cog:
             self.std_obj = (np.percentile(objs,100*(0.50+ONE_SIG_PROB)) - np.percentile(objs,100*(0.50-ONE_SIG_PROB)))/2
         return self.average_obj, self.std_obj
 
+    """
+    Mirrored in `_cog_registry.average_objs', for `Cog_Array.cross_breed'.
+    """
+    @property
+    def average_obj(self):
+        return self._average_obj
+
+    @average_obj.setter
+    def average_obj(self, average_obj):
+        self._average_obj = average_obj
+        _cog_registry.set_average_obj(self, average_obj)
+
     """
     - Set each non-empty coordinate strength to 1/N, where N is the total number of non-empty coords of `cog_array'.
     """
     def instantiate_strengths(self,cog_array):
-        self.strengths = np.zeros((NUM_COGS_HORI,NUM_COGS_VERT))
+        i = _cog_registry.index(self)
+        strengths = _cog_registry.strengths[i]
+        strengths[...] = 0.0
         for coords,_ in cog_array:
-            self.strengths[coords.x,coords.y] = 1.0
-        self.strength_start_value = 1/np.sum(self.strengths)
-        self.strengths /= np.sum(self.strengths)
+            strengths[coords.x,coords.y] = 1.0
+        self.strength_start_value = 1/np.sum(strengths)
+        _cog_registry.renormalize_strengths(i)
+
+    @property
+    def strengths(self):
+        i = _cog_registry.indices.get(self)
+        if i is None or self.strength_start_value is None:
+            return None
+        return _cog_registry.strengths[i] / _cog_registry.strength_totals[i]
 
     """
     - Multiply `self.strengths[coords.x,coords.y]' by `factor` and renormalize.
@@ -98,6 +121,8 @@ class Cog:
     - If `max_multiplier is not None', then no non-zero entry of `self.strengths' is smaller than 
     `self.strength_start_value / max_multiplier' nor larger than `self.strength_start_value * max_multiplier'. This is to
     prevent accumulations of spuriously large or small factors.
+    - This takes constant time: only the entry at `coords' and the normalization constant of `self' change (see
+    `cog_registry.Cog_Registry').
     """
     def update_strength(self,coords,factor,max_factor=None,max_multiplier=None):
         if max_factor:
@@ -105,22 +130,31 @@ class Cog:
                 factor = max_factor
             elif factor < 1/max_factor:
                 factor = 1/max_factor
+        i = _cog_registry.indices[self]
+        strengths = _cog_registry.strengths
+        total = float(_cog_registry.strength_totals[i])
+        raw = float(strengths[i, coords.x, coords.y])
+        stre = raw / total
         if max_multiplier:
             max_str = max_multiplier * self.strength_start_value
             min_str = self.strength_start_value / max_multiplier
-            stre = self.strengths[coords.x,coords.y]
             if factor*stre > max_str:
-                self.strengths[coords.x, coords.y] = max_str
+                stre = max_str
             elif factor*stre < min_str:
-                self.strengths[coords.x, coords.y] = min_str
+                stre = min_str
             else:
-                self.strengths[coords.x, coords.y] = stre*factor
+                stre = stre*factor
         else:
-            self.strengths[coords.x, coords.y] *= factor
-        self.strengths /= np.sum(self.strengths)
+            stre *= factor
+        strengths[i, coords.x, coords.y] = stre * total
+        total += stre * total - raw
+        _cog_registry.strength_totals[i] = total
+        if not 1/STRENGTH_TOTAL_BOUND <= total <= STRENGTH_TOTAL_BOUND:
+            _cog_registry.renormalize_strengths(i)
 
     def get_strength(self,coords):
-        return self.strengths[coords.x,coords.y]
+        i = _cog_registry.indices[self]
+        return _cog_registry.strengths[i, coords.x, coords.y] / _cog_registry.strength_totals[i]
 
     def get_abbr(self):
         return "O"
@@ -155,6 +189,8 @@ class Character(Cog):
 
 
 class Boost_Cog(Cog):
+    influence_offsets = ()
+
     def __init__(self, build_rate, flaggy_rate, exp_mult, build_rate_boost, flaggy_rate_boost, flaggy_speed_boost, exp_boost):
         super().__init__(build_rate, flaggy_rate, exp_mult)
         self.build_rate_boost = build_rate_boost
@@ -182,15 +218,21 @@ class Boost_Cog(Cog):
                int(self.exp_boost * 100)) if self.exp_boost > 0 else "")
         ).strip()
 
-
-class Yang_Cog(Boost_Cog):
-
+    """
+    - Returns the coords that `self' boosts when placed at `coords', in the order given by `influence_offsets'.
+    - Some of the returned coords may be out of bounds.
+    """
     def get_influence(self,coords):
         return map(
             lambda t: coords + Coords(t[0], t[1]),
-            [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1), (-2, 0), (2, 0), (0, -2), (0, 2)]
+            self.influence_offsets
         )
 
+
+
+class Yang_Cog(Boost_Cog):
+    influence_offsets = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1), (-2, 0), (2, 0), (0, -2), (0, 2))
+
     def get_abbr(self):
         return "Y"
 
@@ -199,11 +241,8 @@ class Yang_Cog(Boost_Cog):
 
 
 class X_Cog(Boost_Cog):
-    def get_influence(self,coords):
-        return map(
-            lambda t: coords + Coords(t[0], t[1]),
-            [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        )
+    influence_offsets = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
     def get_abbr(self):
         return "X"
 
@@ -212,11 +251,7 @@ class X_Cog(Boost_Cog):
 
 
 class Plus_Cog(Boost_Cog):
-    def get_influence(self,coords):
-        return map(
-            lambda t: coords + Coords(t[0], t[1]),
-            [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        )
+    influence_offsets = ((-1, 0), (1, 0), (0, -1), (0, 1))
 
     def get_abbr(self):
         return "+"
@@ -226,11 +261,7 @@ class Plus_Cog(Boost_Cog):
 
 
 class Left_Cog(Boost_Cog):
-    def get_influence(self,coords):
-        return map(
-            lambda t: coords + Coords(t[0], t[1]),
-            [(-2, -1), (-2, 0), (-2, 1), (-1, -1), (-1, 0), (-1, 1)]
-        )
+    influence_offsets = ((-2, -1), (-2, 0), (-2, 1), (-1, -1), (-1, 0), (-1, 1))
 
     def get_abbr(self):
         return "<"
@@ -240,11 +271,8 @@ class Left_Cog(Boost_Cog):
 
 
 class Right_Cog(Boost_Cog):
-    def get_influence(self,coords):
-        return map(
-            lambda t: coords + Coords(t[0], t[1]),
-            [(2, -1), (2, 0), (2, 1), (1, -1), (1, 0), (1, 1)]
-        )
+    influence_offsets = ((2, -1), (2, 0), (2, 1), (1, -1), (1, 0), (1, 1))
+
     def get_abbr(self):
         return ">"
 
@@ -253,11 +281,7 @@ class Right_Cog(Boost_Cog):
 
 
 class Up_Cog(Boost_Cog):
-    def get_influence(self,coords):
-        return map(
-            lambda t: coords + Coords(t[0], t[1]),
-            [(-1, 1), (0, 1), (1, 1), (-1, 2), (0, 2), (1, 2)]
-        )
+    influence_offsets = ((-1, 1), (0, 1), (1, 1), (-1, 2), (0, 2), (1, 2))
 
     def get_abbr(self):
         return "^"
@@ -267,11 +291,7 @@ class Up_Cog(Boost_Cog):
 
 
 class Down_Cog(Boost_Cog):
-    def get_influence(self,coords):
-        return map(
-            lambda t: coords + Coords(t[0], t[1]),
-            [(-1, -1), (0, -1), (1, -1), (-1, -2), (0, -2), (1, -2)]
-        )
+    influence_offsets = ((-1, -1), (0, -1), (1, -1), (-1, -2), (0, -2), (1, -2))
 
     def get_abbr(self):
         return "v"
@@ -281,11 +301,7 @@ class Down_Cog(Boost_Cog):
 
 
 class Row_Cog(Boost_Cog):
-    def get_influence(self,coords):
-        return map(
-            lambda t: coords + Coords(t[0],t[1]),
-            [(x,0) for x in itertools.chain(range(-NUM_COGS_HORI,0),range(1,NUM_COGS_HORI+1))]
-        )
+    influence_offsets = tuple((x,0) for x in itertools.chain(range(-NUM_COGS_HORI,0),range(1,NUM_COGS_HORI+1)))
 
     def get_abbr(self):
         return "-"
@@ -295,11 +311,7 @@ class Row_Cog(Boost_Cog):
 
 
 class Col_Cog(Boost_Cog):
-    def get_influence(self,coords):
-        return map(
-            lambda t: coords + Coords(t[0],t[1]),
-            [(0,y) for y in itertools.chain(range(-NUM_COGS_VERT,0),range(1,NUM_COGS_VERT+1))]
-        )
+    influence_offsets = tuple((0,y) for y in itertools.chain(range(-NUM_COGS_VERT,0),range(1,NUM_COGS_VERT+1)))
 
     def get_abbr(self):
         return "|"
@@ -309,13 +321,23 @@ class Col_Cog(Boost_Cog):
 
 
 class Omni_Cog(Boost_Cog):
-    def get_influence(self,coords):
-        return map(
-            lambda t: coords + Coords(t[0], t[1]),
-            [(-2, -2), (-2, 2), (2, -2), (2, 2)]
-        )
+    influence_offsets = ((-2, -2), (-2, 2), (2, -2), (2, 2))
+
     def get_abbr(self):
         return "*"
 
     def get_max_oob_neighbors(self):
-        return 2
\ No newline at end of file
+        return 2
+
+
+"""
+Returns every concrete subclass of `Boost_Cog', i.e. every cog type with an adjacency bonus.
+"""
+def get_boost_cog_types():
+    types = []
+    pending = list(Boost_Cog.__subclasses__())
+    while pending:
+        cog_type = pending.pop(0)
+        types.append(cog_type)
+        pending.extend(cog_type.__subclasses__())
+    return types
@@ -16,21 +16,43 @@ Cogstruction: Optimizing cog arrays in Legends of Idleon
 from constants import NUM_COGS_HORI, NUM_COGS_VERT
 
 """
-This class is just a wrapper for a tuple (x,y).
+- This class is just a wrapper for a tuple (x,y).
+- `Coords' are values: never assign to `x' or `y' of an existing instance. Each instance stores its hash, which is the
+hash of the tuple (x,y).
+- In-bounds coords are interned: `Coords(x, y)' returns the same instance every time, so creating them does not
+allocate, and equality usually succeeds on identity. Out-of-bounds coords (e.g. the neighbors of a cog on the edge) are
+created as needed.
 """
 class Coords:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
+    __slots__ = ("x", "y", "_hash")
+
+    def __new__(cls, x, y):
+        if 0 <= x < NUM_COGS_HORI and 0 <= y < NUM_COGS_VERT:
+            return _interned_coords[x * NUM_COGS_VERT + y]
+        return cls._make(x, y)
+
+    @classmethod
+    def _make(cls, x, y):
+        coords = object.__new__(cls)
+        coords.x = x
+        coords.y = y
+        coords._hash = hash((x, y))
+        return coords
+
+    def __reduce__(self):
+        return Coords, (self.x, self.y)
 
     def is_out_of_bounds(self):
         return self.x < 0 or self.x >= NUM_COGS_HORI or self.y < 0 or self.y >= NUM_COGS_VERT
 
     def __copy__(self):
-        return Coords(self.x,self.y)
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __hash__(self):
-        return hash((self.x,self.y))
+        return self._hash
 
     def __str__(self):
         return "(%d, %d)" % (self.x, self.y)
@@ -45,7 +67,12 @@ class Coords:
         return Coords(self.x - other.x, self.y - other.y)
 
     def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
+        return self is other or (self.x == other.x and self.y == other.y)
 
     def __ne__(self, other):
-        return not (self == other)
\ No newline at end of file
+        return not (self == other)
+
+"""
+Every in-bounds `Coords', in the order `x * NUM_COGS_VERT + y'.
+"""
+_interned_coords = tuple(Coords._make(x, y) for x in range(NUM_COGS_HORI) for y in range(NUM_COGS_VERT))
@@ -0,0 +1,441 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+import math
+
+import numpy as np
+
+from cog_array_stuff import Cog_Array, get_excludes_dict
+from cog_registry import get_stats_key
+from cog_types import Boost_Cog
+from vector_engine import Array_Batch
+
+"""
+- `exact_solve' gives up on arrays with more than `EXACT_MAX_SLOTS' slots, before searching at all.
+- It also gives up after `EXACT_MAX_NODES' nodes of the search tree.
+"""
+EXACT_MAX_SLOTS = 16
+EXACT_MAX_NODES = 10 ** 6
+
+"""
+- Finds a provably optimal cog array by branch and bound, or returns `None' if the problem is too large (see
+`EXACT_MAX_SLOTS' and `EXACT_MAX_NODES'). Otherwise it returns a `(Cog_Array, value)' pair, like `learning_algo'.
+- The search space is that of the genetic algorithm: every slot is occupied, unless there are fewer cogs than slots, in
+which case every cog is placed. `excludes_dict' is only a heuristic of the genetic algorithm, so it is not used here.
+- `obj_fxn' must not decrease when the build rate, flaggy rate or exp multiplier increases (with the number of occupied
+slots fixed). All the objective functions of `fitness_functions' with non-negative weights qualify.
+- See `Branch_And_Bound' for the search and its bounds.
+"""
+def exact_solve(cogs, empties_set, flaggies, obj_fxn, max_nodes=EXACT_MAX_NODES):
+    if len(empties_set.coords_list) > EXACT_MAX_SLOTS:
+        return None
+    return Branch_And_Bound(cogs, empties_set, flaggies, obj_fxn).solve(max_nodes)
+
+"""
+- Branch and bound over the placements of `cogs' on the slots of `empties_set'. Cogs are grouped in classes of identical
+cogs (same type and same rates), so that swapping identical cogs is never searched twice. If there are fewer cogs than
+slots, the missing cogs are an extra class of empties.
+- The search has two phases:
+    > Each boost cog, in turn, is placed on a free slot or left as a spare. Identical boost cogs take increasing slots,
+    and once one is left as a spare, so are the identical ones after it.
+    > The free slots are then filled with the other cogs. These only matter through the boosts their slot receives, so
+    slots that receive the same boosts are interchangeable: the free slots are visited grouped by the boosts they
+    receive, and within a group the classes are placed in the order of `class_order'.
+- Each node bounds the rates of every completion of its partial array. For the build rate (and likewise the flaggy rate
+before the flaggy speed multiplier):
+    > The base rates and the boosts between placed cogs are known exactly. They are accumulated along the path, using
+    `empties_set.influence_slots' and `empties_set.influencer_slots'.
+    > A placed boost cog boosts each of its unfilled neighbors by at most the largest rate among the remaining cogs.
+    > A remaining cog `c' contributes at most `rate[c] + boost[c] * (sum of the largest `num_neighbors' rates of all
+    cogs)', where `num_neighbors' is the most slots its type can influence. The free slots are filled by the remaining
+    cogs with the largest such contributions.
+- The flaggy speed and the exp multiplier are bounded the same way, and `obj_fxn' of the bounded rates bounds the value
+of the node. A node is pruned if its bound does not exceed the best array found so far.
+- That bound lets every rate have the best remaining cogs for itself. If `obj_fxn' is a sum of convex functions of the
+build rate, flaggy rate and exp multiplier (as are all the objective functions of `fitness_functions'; this is checked
+numerically, see `_is_separable_convex'), a tighter bound is tried next. On the range of each rate allowed by the first
+bound, its term lies below its chord, so the value of the node is at most a linear function of the remaining cogs. The
+free slots are then filled by the remaining cogs with the best combined contributions to all three rates.
+"""
+class Branch_And_Bound:
+    def __init__(self, cogs, empties_set, flaggies, obj_fxn):
+        self.cogs = list(cogs)
+        self.empties_set = empties_set
+        self.flaggies = set(flaggies) if flaggies is not None else set()
+        self.obj_fxn = obj_fxn
+        self.num_slots = len(empties_set.coords_list)
+        self.num_occupied = min(len(self.cogs), self.num_slots)
+        self.num_extras = max(len(self.cogs) - self.num_slots, 0)
+
+        classes = {}
+        for cog in self.cogs:
+            classes.setdefault(get_stats_key(cog), []).append(cog)
+        self.class_cogs = list(classes.values())
+        self.class_counts = [len(members) for members in self.class_cogs]
+        self.class_types = [type(members[0]) if isinstance(members[0], Boost_Cog) else None
+                            for members in self.class_cogs]
+        if len(self.cogs) < self.num_slots:
+            self.class_cogs.append([])
+            self.class_counts.append(self.num_slots - len(self.cogs))
+            self.class_types.append(None)
+        self.num_classes = len(self.class_cogs)
+
+        self.build_rates = self._get_column(lambda cog: cog.build_rate)
+        self.flaggy_rates = self._get_column(lambda cog: cog.flaggy_rate)
+        self.exp_mults = self._get_column(lambda cog: cog.exp_mult)
+        self.build_boosts = self._get_column(lambda cog: cog.build_rate_boost, True)
+        self.flaggy_boosts = self._get_column(lambda cog: cog.flaggy_rate_boost, True)
+        self.speed_boosts = self._get_column(
+            lambda cog: cog.flaggy_speed_boost / len(self.flaggies) if len(self.flaggies) > 0 else 0.0, True
+        )
+
+        self.neighbors = {}
+        self.flaggy_counts = {}
+        for cog_type in set(self.class_types) - {None}:
+            self.neighbors[cog_type] = empties_set.influence_slots[cog_type]
+            self.flaggy_counts[cog_type] = tuple(
+                sum(empties_set.coords_list[adj_slot] in self.flaggies for adj_slot in adj_slots) +
+                sum(adj_coords in self.flaggies for adj_coords in adj_empties)
+                for adj_slots, adj_empties in zip(empties_set.influence_slots[cog_type],
+                                                  empties_set.influence_empties[cog_type])
+            )
+        self.influencers = tuple(
+            tuple((p, cog_type) for p, cog_type in pairs if cog_type in self.neighbors)
+            for pairs in empties_set.influencer_slots
+        )
+
+        build_bounds = self._get_remaining_bounds(self.build_rates, self.build_boosts)
+        flaggy_bounds = self._get_remaining_bounds(self.flaggy_rates, self.flaggy_boosts)
+        speed_bounds = [
+            self.speed_boosts[i] * max(self.flaggy_counts[cog_type], default=0) if cog_type is not None else 0.0
+            for i, cog_type in enumerate(self.class_types)
+        ]
+        self._columns = [build_bounds, flaggy_bounds, speed_bounds, self.exp_mults]
+        self._orders = [sorted(range(self.num_classes), key=lambda i: -column[i]) for column in self._columns]
+        self._build_rate_order = sorted(range(self.num_classes), key=lambda i: -self.build_rates[i])
+        self._flaggy_rate_order = sorted(range(self.num_classes), key=lambda i: -self.flaggy_rates[i])
+        self._received_build = [0.0] * self.num_slots
+        self._received_flaggy = [0.0] * self.num_slots
+
+        self._zero = self._evaluate(0.0, 0.0, 0.0, 0.0)
+        self.class_order = sorted(
+            range(self.num_classes),
+            key=lambda i: -(
+                self._evaluate(build_bounds[i], flaggy_bounds[i], speed_bounds[i], self.exp_mults[i]) - self._zero
+            )
+        )
+        self.booster_units = [i for i in self.class_order if self.class_types[i] is not None
+                              for _ in range(self.class_counts[i])]
+        self.ordinary_order = [i for i in self.class_order if self.class_types[i] is None]
+        self.slot_orders = {
+            cog_type: sorted(range(self.num_slots), key=lambda s: -len(adj_slots[s]))
+            for cog_type, adj_slots in self.neighbors.items()
+        }
+        self.is_separable_convex = self._is_separable_convex([
+            self._get_top(0, self.class_counts, self.num_slots),
+            self._get_top(1, self.class_counts, self.num_slots) * (1 + self._get_top(2, self.class_counts, self.num_slots)),
+            self._get_top(3, self.class_counts, self.num_slots)
+        ])
+
+        self.num_nodes = 0
+        self.max_nodes = EXACT_MAX_NODES
+        self.best_value = -math.inf
+        self.best_classes = None
+
+    def _get_column(self, attr, boost_only=False):
+        return [
+            float(attr(members[0])) if len(members) > 0 and (not boost_only or isinstance(members[0], Boost_Cog)) else 0.0
+            for members in self.class_cogs
+        ]
+
+    """
+    The most that one cog of each class can add to a rate if it is placed on a free slot.
+    """
+    def _get_remaining_bounds(self, rates, boosts):
+        top_rates = sorted((rate for members, rate in zip(self.class_cogs, rates) for _ in members), reverse=True)
+        bounds = []
+        for i, cog_type in enumerate(self.class_types):
+            bound = rates[i]
+            if cog_type is not None:
+                num_neighbors = max((len(adj_slots) for adj_slots in self.neighbors[cog_type]), default=0)
+                bound += boosts[i] * sum(top_rates[:num_neighbors])
+            bounds.append(bound)
+        return bounds
+
+    def _evaluate(self, build_rate, flaggy_base_rate, flaggy_speed, total_exp_mult):
+        return self.obj_fxn(Array_Batch(build_rate, flaggy_base_rate, flaggy_speed, total_exp_mult, self.num_occupied))
+
+    """
+    `obj_fxn' as a function of the build rate, flaggy rate or exp multiplier alone (`k' is 0, 1 or 2), less its value
+    at zero.
+    """
+    def _get_term(self, k, rate):
+        if k == 0:
+            return self._evaluate(rate, 0.0, 0.0, 0.0) - self._zero
+        elif k == 1:
+            return self._evaluate(0.0, rate, 0.0, 0.0) - self._zero
+        return self._evaluate(0.0, 0.0, 0.0, rate) - self._zero
+
+    """
+    - Checks, on a grid up to `max_rates' (the largest build rate, flaggy rate and exp multiplier), that `obj_fxn' is
+    the sum of its terms (see `_get_term') and that each term is non-decreasing and convex.
+    - Rounding errors are allowed for.
+    """
+    def _is_separable_convex(self, max_rates, num_points=9):
+        grids = [[max_rate * n / (num_points - 1) for n in range(num_points)] for max_rate in max_rates]
+        terms = [[self._get_term(k, rate) for rate in grid] for k, grid in enumerate(grids)]
+        tol = 1e-9 * (1 + max(abs(value) for values in terms for value in values))
+        for values in terms:
+            for a, b, c in zip(values, values[1:], values[2:]):
+                if b < a - tol or c < b - tol or b > (a + c) / 2 + tol:
+                    return False
+        for n in range(num_points):
+            m, l = (3 * n + 1) % num_points, (5 * n + 2) % num_points
+            value = self._evaluate(grids[0][n], grids[1][m], 0.0, grids[2][l])
+            if abs(value - (self._zero + terms[0][n] + terms[1][m] + terms[2][l])) > tol:
+                return False
+        return True
+
+    """
+    Returns the sum of the `num_slots' largest entries of `self._columns[k]' among the remaining cogs.
+    """
+    def _get_top(self, k, counts, num_slots):
+        column = self._columns[k]
+        total = 0.0
+        for i in self._orders[k]:
+            count = counts[i]
+            if count == 0:
+                continue
+            taken = min(count, num_slots)
+            total += taken * column[i]
+            num_slots -= taken
+            if num_slots == 0:
+                break
+        return total
+
+    """
+    - Bounds the boosts that the free slots receive from placed boost cogs, given the boost `received[t]' of each slot
+    `t' (see `_add_boosts'). Pairing the largest boosts with the largest `rates' among the remaining cogs is the most
+    they can add up to, since each slot takes a different cog.
+    - `order' sorts `rates' from largest to smallest.
+    """
+    def _get_received_bound(self, received, rates, order, assignment, counts):
+        boosts = sorted((received[t] for t, i in enumerate(assignment) if i is None and received[t] > 0), reverse=True)
+        bound = 0.0
+        k = 0
+        for i in order:
+            for _ in range(min(counts[i], len(boosts) - k)):
+                bound += boosts[k] * rates[i]
+                k += 1
+            if k == len(boosts):
+                break
+        return bound
+
+    """
+    Returns the terms (see `_get_term') of the build rate, flaggy rate and exp multiplier at each entry of `rates', a
+    `list' of triples, in a single call of `obj_fxn'.
+    """
+    def _get_terms(self, rates):
+        build_rates, flaggy_rates, exp_mults = (np.array(column, dtype=float) for column in zip(*rates))
+        zeros = np.zeros(len(rates))
+        batch = Array_Batch(
+            np.concatenate([build_rates, zeros, zeros]), np.concatenate([zeros, flaggy_rates, zeros]),
+            np.zeros(3 * len(rates)), np.concatenate([zeros, zeros, exp_mults]), self.num_occupied
+        )
+        return (np.asarray(self.obj_fxn(batch), dtype=float) - self._zero).reshape(3, len(rates)).T.tolist()
+
+    """
+    - Counts a node and returns `True' if it can be pruned: if the best array that fills its `num_free' free slots with
+    its remaining cogs (`counts') cannot beat the best array so far.
+    - `totals' are the `build', `flaggy', `speed' and `exp' of `_place'.
+    """
+    def _is_pruned(self, assignment, counts, num_free, totals):
+        self.num_nodes += 1
+        if self.num_nodes > self.max_nodes:
+            raise _Node_Limit_Exceeded()
+        if num_free == 0:
+            return False
+        build, flaggy, speed, exp = totals
+        build_received = self._get_received_bound(
+            self._received_build, self.build_rates, self._build_rate_order, assignment, counts
+        )
+        flaggy_received = self._get_received_bound(
+            self._received_flaggy, self.flaggy_rates, self._flaggy_rate_order, assignment, counts
+        )
+        build_range = build_received + self._get_top(0, counts, num_free)
+        flaggy_range = flaggy_received + self._get_top(1, counts, num_free)
+        multiplier = 1 + speed + self._get_top(2, counts, num_free)
+        exp_range = self._get_top(3, counts, num_free)
+        if not self.is_separable_convex:
+            return self._evaluate(build + build_range, flaggy + flaggy_range, multiplier - 1, exp + exp_range) <= \
+                self.best_value
+
+        starts, ends = self._get_terms([
+            (build, flaggy * multiplier, exp),
+            (build + build_range, (flaggy + flaggy_range) * multiplier, exp + exp_range)
+        ])
+        if self._zero + sum(ends) <= self.best_value:
+            return True
+        slopes = [(end - start) / rate_range if rate_range > 0 else 0.0
+                  for start, end, rate_range in zip(starts, ends, [build_range, flaggy_range * multiplier, exp_range])]
+        build_slope, flaggy_slope, exp_slope = slopes[0], slopes[1] * multiplier, slopes[2]
+        build_bounds, flaggy_bounds = self._columns[0], self._columns[1]
+        contributions = sorted(
+            ((build_slope * build_bounds[i] + flaggy_slope * flaggy_bounds[i] + exp_slope * self.exp_mults[i], counts[i])
+             for i in range(self.num_classes) if counts[i] > 0),
+            reverse=True
+        )
+        bound = self._zero + sum(starts) + build_slope * build_received + flaggy_slope * flaggy_received
+        for contribution, count in contributions:
+            taken = min(count, num_free)
+            bound += taken * contribution
+            num_free -= taken
+            if num_free == 0:
+                break
+        return bound <= self.best_value
+
+    """
+    - Returns `totals' (see `_is_pruned') after a cog of class `i' is placed on slot `s'.
+    - `build', `flaggy', `speed' and `exp' are the exact totals of the placed cogs (`build' and `flaggy' include the
+    boosts between placed cogs).
+    """
+    def _place(self, assignment, s, i, totals):
+        build, flaggy, speed, exp = totals
+        build_rate, flaggy_rate = self.build_rates[i], self.flaggy_rates[i]
+        build += build_rate + self._received_build[s] * build_rate
+        flaggy += flaggy_rate + self._received_flaggy[s] * flaggy_rate
+        exp += self.exp_mults[i]
+        cog_type = self.class_types[i]
+        if cog_type is not None:
+            for adj_slot in self.neighbors[cog_type][s]:
+                j = assignment[adj_slot]
+                if j is not None:
+                    build += self.build_boosts[i] * self.build_rates[j]
+                    flaggy += self.flaggy_boosts[i] * self.flaggy_rates[j]
+            speed += self.speed_boosts[i] * self.flaggy_counts[cog_type][s]
+        return build, flaggy, speed, exp
+
+    """
+    Adds `sign' times the boosts of a boost cog of class `i' on slot `s' to `self._received_build' and
+    `self._received_flaggy', the boosts each slot receives from the placed boost cogs.
+    """
+    def _add_boosts(self, s, i, sign):
+        for adj_slot in self.neighbors[self.class_types[i]][s]:
+            self._received_build[adj_slot] += sign * self.build_boosts[i]
+            self._received_flaggy[adj_slot] += sign * self.flaggy_boosts[i]
+
+    """
+    - Runs the search. Returns the best `(Cog_Array, value)' pair, or `None' if more than `max_nodes' nodes were needed.
+    - `self.num_nodes' is the number of nodes visited.
+    """
+    def solve(self, max_nodes=EXACT_MAX_NODES):
+        self.num_nodes = 0
+        self.max_nodes = max_nodes
+        self.best_value = -math.inf
+        self.best_classes = None
+        self._received_build = [0.0] * self.num_slots
+        self._received_flaggy = [0.0] * self.num_slots
+        assignment = [None] * self.num_slots
+        try:
+            self._search_boosters(0, -1, assignment, list(self.class_counts), self.num_slots, self.num_extras,
+                                  (0.0, 0.0, 0.0, 0.0))
+        except _Node_Limit_Exceeded:
+            return None
+        cog_array = self.get_cog_array(self.best_classes)
+        return cog_array, self.obj_fxn(cog_array)
+
+    """
+    The first phase: places `self.booster_units[u]' and the boost cogs after it. `last_slot' is the slot of the previous
+    unit, `num_free' the number of free slots and `num_extras' the number of cogs that may still be left as spares.
+    """
+    def _search_boosters(self, u, last_slot, assignment, counts, num_free, num_extras, totals):
+        if self._is_pruned(assignment, counts, num_free, totals):
+            return
+        if u == len(self.booster_units):
+            self._search_ordinary(assignment, counts, totals)
+            return
+        i = self.booster_units[u]
+        same_class = u > 0 and self.booster_units[u - 1] == i
+        counts[i] -= 1
+        if num_free > 0:
+            for s in self.slot_orders[self.class_types[i]]:
+                if assignment[s] is not None or (same_class and s <= last_slot):
+                    continue
+                new_totals = self._place(assignment, s, i, totals)
+                assignment[s] = i
+                self._add_boosts(s, i, 1)
+                self._search_boosters(u + 1, s, assignment, counts, num_free - 1, num_extras, new_totals)
+                self._add_boosts(s, i, -1)
+                assignment[s] = None
+        counts[i] += 1
+        num_spares = counts[i]
+        if num_spares <= num_extras:
+            counts[i] = 0
+            self._search_boosters(u + num_spares, -1, assignment, counts, num_free, num_extras - num_spares, totals)
+            counts[i] = num_spares
+
+    """
+    The second phase: fills the free slots with the other cogs, grouped by the boosts the slots receive.
+    """
+    def _search_ordinary(self, assignment, counts, totals):
+        received = {}
+        for s in range(self.num_slots):
+            if assignment[s] is None:
+                received[s] = tuple(sorted(
+                    (self.build_boosts[assignment[p]], self.flaggy_boosts[assignment[p]])
+                    for p, cog_type in self.influencers[s]
+                    if assignment[p] is not None and self.class_types[assignment[p]] is cog_type
+                ))
+        slots = sorted(received, key=lambda s: (-sum(sum(boosts) for boosts in received[s]), received[s], s))
+        same_group = [k > 0 and received[slots[k - 1]] == received[s] for k, s in enumerate(slots)]
+        self._fill(0, 0, slots, same_group, assignment, counts, totals)
+
+    def _fill(self, k, start, slots, same_group, assignment, counts, totals):
+        if k == len(slots):
+            value = self._evaluate(*totals)
+            if value > self.best_value:
+                self.best_value = value
+                self.best_classes = list(assignment)
+            return
+        s = slots[k]
+        if not same_group[k]:
+            start = 0
+        for rank in range(start, len(self.ordinary_order)):
+            i = self.ordinary_order[rank]
+            if counts[i] == 0:
+                continue
+            new_totals = self._place(assignment, s, i, totals)
+            counts[i] -= 1
+            assignment[s] = i
+            if not self._is_pruned(assignment, counts, len(slots) - k - 1, new_totals):
+                self._fill(k + 1, rank, slots, same_group, assignment, counts, new_totals)
+            assignment[s] = None
+            counts[i] += 1
+
+    """
+    Returns a new `Cog_Array' with one cog of class `classes[s]' on each slot `s', and the other cogs as spares.
+    """
+    def get_cog_array(self, classes):
+        cog_array = Cog_Array(self.empties_set, self.flaggies, get_excludes_dict(self.empties_set, self.cogs))
+        cog_array.extend_spares(self.cogs)
+        used = [0] * self.num_classes
+        for coords, i in zip(self.empties_set.coords_list, classes):
+            if len(self.class_cogs[i]) > 0:
+                cog_array.move_cog_from_spares(coords, self.class_cogs[i][used[i]])
+                used[i] += 1
+        return cog_array
+
+class _Node_Limit_Exceeded(Exception):
+    pass
@@ -80,6 +80,38 @@ def read_empties_datas(filename):
             empties_datas.append(Coords(int(row["empties_x"]), int(row["empties_y"])))
     return set(empties_datas)
 
+"""
+- Reads a cog array written by `Cog_Array.csv_record', e.g. the `output.csv' of a previous run, and outputs a `list' of
+`dicts', one per cog. Each `dict' has two keys, `coords' and `record'. The `coords' are the `Coords' of the cog, or
+`None' for a spare. The `record' is the `Cog.csv_record' of the cog.
+- See `Cog_Array.instantiate_from_output', which matches the records to cogs.
+"""
+def read_output_datas(filename):
+    output_datas = []
+    with open(filename, "r", newline="") as fh:
+        reader = csv.reader(fh)
+        next(reader, None)
+        for i, row in enumerate(reader):
+            if len(row) < 4:
+                raise Cog_Data_File_Error(i, "Type", filename, "Entry is missing.")
+            coords = None
+            if row[0] != "Spare":
+                for key, value, bound in (("Xpos", row[1], NUM_COGS_HORI), ("Ypos", row[2], NUM_COGS_VERT)):
+                    if not _is_non_neg_int(value):
+                        raise Cog_Data_File_Error(i, key, filename, "int")
+                    if int(value) >= bound:
+                        raise Cog_Data_File_Error(
+                            i, key, filename, "`Xpos` must be between 0 and %d and `Ypos` must be between 0 and %d." % (
+                                NUM_COGS_HORI - 1, NUM_COGS_VERT - 1
+                            )
+                        )
+                coords = Coords(int(row[1]), int(row[2]))
+            output_datas.append({
+                "coords": coords,
+                "record": ",".join(row[3:])
+            })
+    return output_datas
+
 """
 TODO
 """
@@ -0,0 +1,65 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+from collections import OrderedDict
+
+"""
+- An in-memory cache of objective values, keyed by `Cog_Array.get_placement_hash', so that a `Population' does not
+score the same placement twice.
+- Each entry is a pair `(value, rates)', where `rates' is `Cog_Array.get_rates()' of the array that was scored.
+- At most `max_entries' entries are kept. If there are more, the least recently used one is dropped.
+- The keys do not include the template, the flaggies or the objective function, so a cache must only be shared by
+arrays that agree on all three, e.g. those of one `Population'.
+- `num_hits' and `num_misses' count the lookups, over the life of the cache.
+"""
+class Fitness_Cache:
+    def __init__(self, max_entries=65536):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.num_hits = 0
+        self.num_misses = 0
+
+    """
+    - Returns the `(value, rates)' pair of `key', or `None' if there is none.
+    """
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.num_misses += 1
+            return None
+        self.num_hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value, rates):
+        self.entries[key] = (value, rates)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    """
+    - Returns the fraction of lookups that were hits, or 0 if there were none.
+    """
+    def get_hit_rate(self):
+        num_lookups = self.num_hits + self.num_misses
+        return self.num_hits / num_lookups if num_lookups > 0 else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.num_hits = self.num_misses = 0
+        return self
+
+    def __len__(self):
+        return len(self.entries)
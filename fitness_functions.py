@@ -20,6 +20,8 @@ Cogstruction: Optimizing cog arrays in Legends of Idleon
 - A convex combination (i.e. weighted average) of the build, flaggy,
   and exp rates. 
 - ''obj_fnx'' is an abbreviation of ''objective function''.
+- Every objective function accepts either a `Cog_Array' or a `vector_engine.Array_Batch'. Given a batch, it returns a
+  `numpy.ndarray' with one value per array of the batch.
 """
 
 import numpy as np
@@ -64,4 +66,22 @@ def average_affix_conversion_obj_fxn(cog_array, build_weight, flaggy_weight,
         ((0.0003808514 * pow(exp_sub_sum, 3.968829)) +
          pow(exp_sub_sum, 1.075056) +
          0.8517081)
-    return build_contrebution + flaggy_contrebution + exp_contrebution
\ No newline at end of file
+    return build_contrebution + flaggy_contrebution + exp_contrebution
+"""
+- One of the objective functions above with its weights bound, e.g.
+  `Weighted_Obj_Fxn(standard_obj_fxn, 0.5, 0.3, 0.2)(cog_array)'.
+- Unlike a lambda, it can be pickled, so it can be sent to worker processes.
+"""
+class Weighted_Obj_Fxn:
+    def __init__(self, fitness_fn, build_weight, flaggy_weight, exp_weight,
+                 debug=False):
+        self.fitness_fn = fitness_fn
+        self.build_weight = build_weight
+        self.flaggy_weight = flaggy_weight
+        self.exp_weight = exp_weight
+        self.debug = debug
+
+    def __call__(self, cog_array):
+        return self.fitness_fn(cog_array, self.build_weight,
+                               self.flaggy_weight, self.exp_weight,
+                               self.debug)
@@ -0,0 +1,158 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+import contextlib
+import multiprocessing
+import os
+import random
+
+import numpy as np
+
+from cog_array_stuff import get_excludes_dict
+from learning_algo import evolve, get_average_std_objs
+from vector_engine import Vector_Engine
+
+"""
+The island model: a parallel version of `learning_algo'.
+    - Each of `num_workers' processes (islands) runs `evolve' on its own `Population'. Every process works on its own
+    copy of `cogs', so the cog strengths of different islands are independent.
+    - Every `migration_interval' generations, each island sends its `num_migrants' best arrays to the next island in a
+    ring. The next island adds them to its population and culls.
+    - Island `i' seeds `random' with `"%s/%d" % (seed, i)'. Islands exchange migrants in lockstep, so the result only
+    depends on `seed' and `num_workers'.
+    - The warm-up (`get_average_std_objs') is done once, before the islands start, on a pool of `num_workers' processes and
+    with `stats_cache'.
+    - Only island 0 prints its status.
+    - If an island stops unexpectedly, e.g. because its process raised, the other islands are terminated and an
+    `Island_Error' naming it is raised.
+    - The other arguments are those of `learning_algo'. `obj_fxn', `build_obj_fxn', `flaggy_obj_fxn' and `exp_obj_fxn'
+    must be picklable, e.g. instances of `fitness_functions.Weighted_Obj_Fxn'.
+"""
+def island_learning_algo(
+        cogs,
+        empties_set,
+        flaggies,
+        pop_size,
+        obj_fxn,
+        factor_base,
+        max_factor,
+        max_multiplier,
+        controller,
+        build_obj_fxn,
+        flaggy_obj_fxn,
+        exp_obj_fxn,
+        num_workers,
+        seed,
+        migration_interval=10,
+        num_migrants=5,
+        stats_cache=None
+):
+
+    controller.print_init_info()
+
+    average_std_objs = get_average_std_objs(cogs, empties_set, flaggies, obj_fxn, num_workers, stats_cache)
+    evolve_args = (
+        cogs, empties_set, flaggies, pop_size, obj_fxn, factor_base, max_factor, max_multiplier, controller,
+        build_obj_fxn, flaggy_obj_fxn, exp_obj_fxn, average_std_objs
+    )
+
+    conns = []
+    processes = []
+    for island in range(num_workers):
+        conn, worker_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_island_worker,
+            args=(worker_conn, island, seed, migration_interval, num_migrants, evolve_args),
+            daemon=True
+        )
+        process.start()
+        worker_conn.close()
+        conns.append(conn)
+        processes.append(process)
+
+    results = [None] * num_workers
+    immigrants = [[] for _ in range(num_workers)]
+    while any(result is None for result in results):
+        running = [island for island in range(num_workers) if results[island] is None]
+        for island in running:
+            try:
+                conns[island].send(immigrants[island])
+            except OSError as error:
+                _stop_islands(processes, island, error)
+        immigrants = [[] for _ in range(num_workers)]
+        for island in running:
+            try:
+                done, genomes, value = conns[island].recv()
+            except (EOFError, OSError) as error:
+                _stop_islands(processes, island, error)
+            if done:
+                results[island] = (genomes[0], value)
+            else:
+                immigrants[(island + 1) % num_workers] = genomes
+
+    for process in processes:
+        process.join()
+
+    best_genome, best_value = max(results, key=lambda t: t[1])
+    engine = Vector_Engine(cogs, empties_set, flaggies)
+    best_array = engine.get_cog_array(np.array(best_genome), flaggies, get_excludes_dict(empties_set, cogs))
+    return best_array, best_value
+
+"""
+Called when the connection to island `island' is lost, e.g. because its process raised: terminates the processes of all
+the islands and raises an `Island_Error' that names the island.
+"""
+def _stop_islands(processes, island, error):
+    processes[island].join(1)
+    exitcode = processes[island].exitcode
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+    raise Island_Error("Island %d stopped unexpectedly (exit code %s)." % (island, exitcode)) from error
+
+"""
+- The body of each island process.
+- Each message from the main process is a `list' of immigrant genomes. The island adds them to its population, runs
+`migration_interval' more generations and replies with `(False, emigrant_genomes, None)'. Once `evolve' is exhausted, it
+replies with `(True, [best_genome], best_value)' instead and exits.
+"""
+def _island_worker(conn, island, seed, migration_interval, num_migrants, evolve_args):
+    random.seed("%s/%d" % (seed, island))
+    cogs, empties_set, flaggies = evolve_args[:3]
+    engine = Vector_Engine(cogs, empties_set, flaggies)
+    excludes_dict = get_excludes_dict(empties_set, cogs)
+    pop = None
+
+    with open(os.devnull, "w") as devnull, \
+            (contextlib.redirect_stdout(devnull) if island > 0 else contextlib.nullcontext()):
+        evolution = evolve(*evolve_args)
+        while True:
+            immigrants = conn.recv()
+            if pop is not None and len(immigrants) > 0:
+                pop.extend([engine.get_cog_array(genome, flaggies, excludes_dict) for genome in immigrants])
+                pop.cull()
+            for _ in range(migration_interval):
+                try:
+                    pop = next(evolution)
+                except StopIteration as stop:
+                    best_array, best_value = stop.value
+                    conn.send((True, [engine.get_genome(best_array).tolist()], best_value))
+                    conn.close()
+                    return
+            conn.send((False, [engine.get_genome(array).tolist() for array in pop.get_top(num_migrants)], None))
+
+class Island_Error(RuntimeError):
+    pass
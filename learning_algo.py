@@ -14,13 +14,40 @@ Cogstruction: Optimizing cog arrays in Legends of Idleon
 """
 
 import copy
+import math
 import random
 import numpy as np
 import pickle as pkl
 import time
+from concurrent.futures import ProcessPoolExecutor
 
-from cog_array_stuff import get_excludes_dict, Cog_Array
+from checkpoint import Checkpointer, CHECKPOINT_INTERVAL
+from cog_array_stuff import get_excludes_dict, Cog_Array, cross_breed_genomes, get_placement_hashes, \
+    get_stats_classes, stack_genomes
+from cog_registry import get_stats_key
 from constants import ONE_SIG_PROB, EARLY_STOP_FACTOR
+from fitness_cache import Fitness_Cache
+from local_search import get_neighbor
+from vector_engine import Vector_Engine
+
+"""
+The parent selection schemes of `Population.select_indices'.
+"""
+SELECTION_SCHEMES = ("uniform", "tournament", "rank", "roulette")
+
+"""
+- `WARM_START_FRACTION' is the default fraction of the initial population that `evolve' seeds from a previous array;
+see `Iteration_Controller.set_warm_start_info'.
+- Each seeded array but the first differs from the previous array by 1 to `WARM_START_MAX_MUTATIONS' mutations.
+"""
+WARM_START_FRACTION = 0.25
+WARM_START_MAX_MUTATIONS = 3
+
+"""
+How many times in a row `Population.select_indices' draws an index it already has, before it chooses uniformly among
+the others.
+"""
+MAX_SELECTION_REJECTIONS = 8
 
 """
 - This singleton controls the loops of the genetic algorithm. 
@@ -39,9 +66,9 @@ class Iteration_Controller:
         self.max_running_total_len = None
         self.req_running_total = None
         self.curr_running_total_len = 0
-        self.curr_running_total = 0
+        self.curr_running_total = 0.0
         self.generation_count = 0
-        self.previous_best_improve = 0
+        self.previous_best_improve = 0.0
 
         self.orig_pop = None
         self.curr_pop = None
@@ -54,6 +81,27 @@ class Iteration_Controller:
         self.prob_two_point_mutation = None
         self.cross_breed_count = 0
 
+        self.replacement = None
+        self.tournament_size = None
+
+        self.selection = "uniform"
+        self.selection_size = 2
+
+        self.fitness_cache_size = 0
+        self.fitness_cache = None
+
+        self.dedupe = False
+        self.niche_radius = 0
+        self.niche_capacity = 1
+
+        self.checkpointer = None
+        self.resume = False
+
+        self.output_datas = None
+        self.warm_start_fraction = WARM_START_FRACTION
+
+        self.metrics = None
+
     """
     `num_restarts' in the number of random restarts.
     """
@@ -89,6 +137,86 @@ class Iteration_Controller:
         self.prob_two_point_mutation = prob_two_point_mutation
         return self
 
+    """
+    - Switches the genetic algorithm to steady-state evolution. By default (`replacement=None'), each generation adds
+    `num_mutations' children to the population and then culls it back to its original size.
+    - In steady state, each child is scored as soon as it is bred and is offered to the population at once, which keeps
+    its size fixed (see `Population.offer'). `replacement' is either `"worst"' (the child replaces the worst array) or
+    `"tournament"' (the child replaces the worst of `tournament_size' random arrays). Either way, it only replaces an
+    array with a lower value.
+    - A generation is still `num_mutations' children, for the purpose of the generation loop and the status output.
+    """
+    def set_steady_state_info(self, replacement, tournament_size=2):
+        if replacement not in (None, "worst", "tournament"):
+            raise ValueError("`replacement' must be among `None', `\"worst\"' and `\"tournament\"'.")
+        self.replacement = replacement
+        self.tournament_size = tournament_size
+        return self
+
+    """
+    - `selection' is how parents are chosen from the population, among `SELECTION_SCHEMES' (see
+    `Population.select_indices'). The default is `"uniform"'.
+    - `selection_size' is the number of arrays in each tournament, if `selection' is `"tournament"'.
+    """
+    def set_selection_info(self, selection, selection_size=2):
+        if selection not in SELECTION_SCHEMES:
+            raise ValueError("`selection' must be among `\"uniform\"', `\"tournament\"', `\"rank\"' and `\"roulette\"'.")
+        self.selection = selection
+        self.selection_size = selection_size
+        return self
+
+    """
+    - If `fitness_cache_size' is positive, each run of `evolve' scores its arrays through a `fitness_cache.Fitness_Cache'
+    of that many entries, so that placements seen before are not scored again. The cache of the latest run is
+    `self.fitness_cache', for its hit counters.
+    """
+    def set_fitness_cache_info(self, fitness_cache_size):
+        self.fitness_cache_size = fitness_cache_size
+        return self
+
+    """
+    How `evolve' culls its populations; see `Population.set_cull_info'.
+    """
+    def set_cull_info(self, dedupe, niche_radius=0, niche_capacity=1):
+        if niche_radius < 0 or niche_capacity < 1:
+            raise ValueError("`niche_radius' must be non-negative and `niche_capacity' positive.")
+        self.dedupe = dedupe
+        self.niche_radius = niche_radius
+        self.niche_capacity = niche_capacity
+        return self
+
+    """
+    - If `checkpoint_filename' is not `None', `evolve' saves its state to that file every `checkpoint_interval' seconds
+    or so, between two generations (see `checkpoint.Checkpointer'). Only for a single process: the islands of
+    `island_model' must not share a checkpoint.
+    - If `resume' is `True' and the file exists, `evolve' starts from the state saved in it instead of from scratch.
+    """
+    def set_checkpoint_info(self, checkpoint_filename, checkpoint_interval=CHECKPOINT_INTERVAL, resume=False):
+        self.checkpointer = None
+        if checkpoint_filename is not None:
+            self.checkpointer = Checkpointer(checkpoint_filename, checkpoint_interval)
+        self.resume = resume
+        return self
+
+    """
+    - If `output_datas' (the output of `file_readers.read_output_datas') is not `None', each restart of `evolve' seeds
+    `warm_start_fraction' of its initial population from the array in it (see `get_warm_start_arrays'), instead of
+    placing every cog randomly. This is for carrying on from a previous run, e.g. after a small change of inventory.
+    """
+    def set_warm_start_info(self, output_datas, warm_start_fraction=WARM_START_FRACTION):
+        if not 0 <= warm_start_fraction <= 1:
+            raise ValueError("`warm_start_fraction' must be between 0 and 1.")
+        self.output_datas = output_datas
+        self.warm_start_fraction = warm_start_fraction
+        return self
+
+    """
+    `metrics' is a `metrics.Metrics_Stream' that `evolve' gives one record per generation, or `None'.
+    """
+    def set_metrics_info(self, metrics):
+        self.metrics = metrics
+        return self
+
     def set_pop(self,pop):
         self.orig_pop = copy.copy(pop)
         self.curr_pop = pop
@@ -105,14 +233,16 @@ class Iteration_Controller:
 
     def generation_loop(self):
         if ((
-                self.generation_count <= (self.max_generations - self.min_generations) * EARLY_STOP_FACTOR + self.min_generations or
+                self.generation_count <=
+                (self.max_generations - self.min_generations) * EARLY_STOP_FACTOR + self.min_generations or
                 self.curr_running_total_len <= self.max_running_total_len
         ) and self.generation_count <= self.max_generations):
             if (
-                self.best_improve_from_original() - self.previous_best_improve + self.curr_running_total >= self.req_running_total or
+                self.best_improve_from_original() - self.previous_best_improve + self.curr_running_total >=
+                self.req_running_total or
                 self.generation_count <= self.min_generations
             ):
-                self.curr_running_total = 0
+                self.curr_running_total = 0.0
                 self.curr_running_total_len = 0
 
             else:
@@ -169,7 +299,8 @@ class Iteration_Controller:
                       (100 * round_best[0].get_total_exp_mult())).ljust(8) +
                       ("%.4f" % (round_best[4])).ljust(13))
                 print(self.curr_pop.get_best()[0].str_with_abbr())
-                # print("\t\t%% cross-breeds:                      %d%%\n" % int(100*self.cross_breed_count/self.mutation_count))
+                # print("\t\t%% cross-breeds:                      %d%%\n" %
+                #       int(100*self.cross_breed_count/self.mutation_count))
 
     def perc_improve_from_original(self,perc):
         return self.curr_pop.get_percentile(perc)[1] / self.orig_pop.get_percentile(perc)[1]
@@ -187,6 +318,8 @@ class Iteration_Controller:
         print("Build rate:".ljust(20) + "%d" % self.best[0].get_build_rate())
         print("Flaggy rate:".ljust(20) + "%d" % self.best[0].get_flaggy_rate())
         print("Exp mult:".ljust(20) + "%d%%" % (100 * self.best[0].get_total_exp_mult()))
+        if self.fitness_cache is not None:
+            print("Fitness cache hits:".ljust(20) + "%.1f%%" % (100 * self.fitness_cache.get_hit_rate()))
 
     def print_init_info(self):
         print("NUM RESTARTS:   %d" % self.num_restarts)
@@ -195,43 +328,325 @@ class Iteration_Controller:
 
 """
 - A population of `Cog_Arrays'.
+- If `engine' is a `Vector_Engine', then arrays are scored in batches by the engine rather than one at a time.
+- `values' is a `numpy' vector of the objective values, in the same order as `arrays'. If `values' is passed to the
+constructor, the arrays are not scored again.
+- The arrays are kept in no particular order. The index of the best array is tracked as arrays are added, and order
+statistics are found by selection (`numpy.argpartition'), so that neither `cull' nor the getters below sort the whole
+population. `sort' is still available, for callers that want the arrays in order.
+- Parents are chosen as indices into `arrays' and `values' (see `select_indices'), so that choosing a parent never
+copies the population.
+- If `fitness_cache' is a `fitness_cache.Fitness_Cache', then arrays are scored through it (see `evaluate').
+- `num_evaluations' counts the arrays scored by the objective function or the engine, over the life of the population.
+- `cull' keeps the best arrays, and optionally keeps them diverse; see `set_cull_info'.
 """
 class Population:
     def __init__(self, arrays, obj_fxn,
-                 build_obj_fxn, flaggy_obj_fxn, exp_obj_fxn):
-        self.arrays = arrays
+                 build_obj_fxn, flaggy_obj_fxn, exp_obj_fxn, engine=None, values=None, fitness_cache=None):
+        self.arrays = list(arrays)
         self.obj_fxn = obj_fxn
-        self.values = list(map(self.obj_fxn,self.arrays))
+        self.engine = engine
+        self.fitness_cache = fitness_cache
+        self.num_evaluations = 0
+        self._values = np.empty(max(16, 2 * len(self.arrays)))
+        self._values[:len(self.arrays)] = self.evaluate(self.arrays) if values is None else values
+        self._best = int(np.argmax(self.values)) if len(self.arrays) > 0 else None
+        self._rank_order = None
         self.is_sorted = False
+        self.dedupe = False
+        self.niche_radius = 0
+        self.niche_capacity = 1
         self.pop_size = len(arrays)
         self.build_obj_fxn = build_obj_fxn
         self.flaggy_obj_fxn = flaggy_obj_fxn
         self.exp_obj_fxn = exp_obj_fxn
 
+    @property
+    def values(self):
+        return self._values[:len(self.arrays)]
+
     def add(self,array):
-        self.arrays.append(array)
-        self.values.append(self.obj_fxn(array))
+        values = self.evaluate([array])
+        self._append([array], values)
+        return array, values.item(0)
+
+    """
+    Add all of `arrays' to the population, scoring them in a single batch. Returns their values.
+    """
+    def extend(self,arrays):
+        values = self.evaluate(arrays)
+        self._append(arrays, values)
+        return values.tolist()
+
+    """
+    - Returns a `numpy' vector of the objective values of `arrays', which are not added to the population.
+    - With a `fitness_cache', the placements found in it are not scored again; their values come from the cache, and
+    their rates too, if they have none. The other arrays are scored in one batch, with each placement scored once even
+    if several arrays share it, and are added to the cache.
+    """
+    def evaluate(self,arrays):
+        if self.fitness_cache is None or len(arrays) == 0:
+            return self._score(arrays)
+        values = np.empty(len(arrays))
+        misses = {}
+        for i, (array, key) in enumerate(zip(arrays, get_placement_hashes(arrays))):
+            if key in misses:
+                misses[key].append(i)
+                self.fitness_cache.num_hits += 1
+                continue
+            entry = self.fitness_cache.get(key)
+            if entry is None:
+                misses[key] = [i]
+                continue
+            values[i], rates = entry
+            if rates is not None and not array.has_rates():
+                array.set_rates(rates)
+        if len(misses) > 0:
+            scored = [arrays[positions[0]] for positions in misses.values()]
+            for (key, positions), array, value in zip(misses.items(), scored, self._score(scored).tolist()):
+                values[positions] = value
+                rates = array.get_rates()
+                self.fitness_cache.put(key, value, rates)
+                for i in positions[1:]:
+                    if rates is not None and not arrays[i].has_rates():
+                        arrays[i].set_rates(rates)
+        return values
+
+    def _score(self, arrays):
+        self.num_evaluations += len(arrays)
+        if self.engine is None or len(arrays) == 0:
+            return np.array([self.obj_fxn(array) for array in arrays], dtype=float)
+        return self.engine.evaluate_arrays(arrays,self.obj_fxn)
+
+    def _append(self, arrays, values):
+        if len(arrays) == 0:
+            return
+        start = len(self.arrays)
+        if start + len(arrays) > len(self._values):
+            buffer = np.empty(2 * (start + len(arrays)))
+            buffer[:start] = self.values
+            self._values = buffer
+        self._values[start:start + len(arrays)] = values
+        self.arrays.extend(arrays)
+        i = int(np.argmax(values))
+        if self._best is None or values[i] > self._values[self._best]:
+            self._best = start + i
+        self._rank_order = None
         self.is_sorted = False
-        return array, self.values[-1]
 
+    """
+    - Sets how `cull' chooses the survivors. By default, they are simply the best arrays.
+    - If `dedupe' is `True', arrays with the same placement (see `Cog_Array.get_placement_hash', which does not tell
+    apart cogs with identical stats) count as one: only the best of them survives, unless there are too few distinct
+    placements to fill the population.
+    - If `niche_radius' is positive, `cull' also clears niches (Petrowski's clearing). The distance between two arrays
+    is the number of slots on which their cogs have different stats (see `Cog_Registry.stats_classes'). From best to
+    worst, each array that has not been cleared yet is the winner of a niche: it survives with the best
+    `niche_capacity - 1' other arrays within `niche_radius' of it, and the rest of those arrays are cleared. Cleared
+    arrays only survive if the winners and their niches do not fill the population.
+    - Duplicates are found in linear time, but clearing compares each winner to every array not cleared yet, so it costs
+    up to `O(n^2)' slot comparisons for a population of `n' arrays of very different placements.
+    - The arrays must be `Cog_Arrays' with the same template, unless both options are off.
+    """
+    def set_cull_info(self, dedupe, niche_radius=0, niche_capacity=1):
+        self.dedupe = dedupe
+        self.niche_radius = niche_radius
+        self.niche_capacity = niche_capacity
+        return self
+
+    """
+    Keep only the best `pop_size' arrays (by default, the size the population was created with), or the best diverse
+    ones; see `set_cull_info'. The survivors keep their relative order.
+    """
     def cull(self,pop_size = None):
-        self.sort()
         N = self.pop_size if pop_size is None else pop_size
-        self.arrays = self.arrays[:N]
-        self.values = self.values[:N]
+        if len(self.arrays) <= N:
+            return
+        if N > 0 and (self.dedupe or self.niche_radius > 0):
+            keep = np.sort(self._get_diverse_survivors(N))
+        elif self.is_sorted or N == 0:
+            keep = np.arange(N)
+        else:
+            keep = np.sort(np.argpartition(-self.values, N - 1)[:N])
+        self._values[:N] = self.values[keep]
+        self.arrays = [self.arrays[i] for i in keep.tolist()]
+        self._best = int(np.argmax(self.values)) if N > 0 else None
+        self._rank_order = None
+
+    """
+    Returns the indices of `N' survivors of `cull', when `self.dedupe' is set or `self.niche_radius' is positive.
+    """
+    def _get_diverse_survivors(self, N):
+        order = np.argsort(-self.values, kind="stable")
+        preferred = np.ones(len(order), dtype=bool)
+        if self.dedupe:
+            keys = np.array(get_placement_hashes(self.arrays), dtype=np.uint64)[order]
+            preferred[:] = False
+            preferred[np.unique(keys, return_index=True)[1]] = True
+        if self.niche_radius > 0:
+            candidates = np.flatnonzero(preferred)
+            classes = get_stats_classes(self.arrays[i] for i in order[candidates].tolist())
+            preferred[:] = False
+            uncleared = np.ones(len(candidates), dtype=bool)
+            num_survivors = 0
+            for c in range(len(candidates)):
+                if not uncleared[c]:
+                    continue
+                uncleared[c] = False
+                preferred[candidates[c]] = True
+                num_survivors += 1
+                if num_survivors >= N:
+                    break
+                niche = (classes[c + 1:] != classes[c]).sum(axis=1, dtype=classes.dtype) <= self.niche_radius
+                niche = np.flatnonzero(niche & uncleared[c + 1:]) + c + 1
+                preferred[candidates[niche[:self.niche_capacity - 1]]] = True
+                num_survivors += min(len(niche), self.niche_capacity - 1)
+                uncleared[niche] = False
+        return np.concatenate((order[preferred], order[~preferred]))[:N]
+
+    """
+    - Offers `array', whose objective value is `value', to the population, without changing its size.
+    - If `replacement' is `"worst"', the candidate for replacement is the worst array. If it is `"tournament"', it is
+    the worst of `tournament_size' distinct arrays chosen at random.
+    - `array' replaces the candidate in place if `value' is higher. Returns `True' if it did.
+    """
+    def offer(self, array, value, replacement="worst", tournament_size=2):
+        if replacement == "worst":
+            i = int(np.argmin(self.values))
+        elif replacement == "tournament":
+            contestants = random.sample(range(len(self.arrays)), min(tournament_size, len(self.arrays)))
+            i = min(contestants, key=self._values.item)
+        else:
+            raise ValueError("`replacement' must be among `\"worst\"' and `\"tournament\"'.")
+        if value <= self._values[i]:
+            return False
+        self.arrays[i] = array
+        self._values[i] = value
+        if value > self._values[self._best]:
+            self._best = i
+        self._rank_order = None
+        self.is_sorted = False
+        return True
 
+    """
+    Returns `k' distinct `(array, value)' pairs, chosen uniformly at random.
+    """
     def sample(self,k=1):
-        return random.sample(list(zip(self.arrays,self.values)),k)
+        return [(self.arrays[i], self._values.item(i)) for i in self.sample_indices(k)]
+
+    """
+    Returns `k' distinct `(array, value)' pairs, chosen by `selection'; see `select_indices'.
+    """
+    def select(self, k=1, selection="uniform", selection_size=2):
+        return [(self.arrays[i], self._values.item(i)) for i in self.select_indices(k, selection, selection_size)]
+
+    """
+    - Returns `k' distinct indices into `self.arrays', chosen by `selection', one of `SELECTION_SCHEMES':
+        > `"uniform"': every array is equally likely (this is `sample_indices').
+        > `"tournament"': the best of `selection_size' distinct arrays chosen uniformly at random.
+        > `"rank"': linear ranking. The array of rank `r' (0 for the best) is chosen with probability proportional to
+        `n - r', where `n' is the size of the population.
+        > `"roulette"': the array with value `v' is chosen with probability proportional to `v'. The values must not be
+        negative.
+    - Distinct indices are found by drawing again on a repeat. After `MAX_SELECTION_REJECTIONS' repeats in a row (e.g.
+    the worst array never wins a tournament), the next index is chosen uniformly among those not drawn yet.
+    - Each draw takes constant time, whatever the size of the population. `"roulette"' uses stochastic acceptance: a
+    uniform index is accepted with probability `v / max_v', which takes `max_v / mean_v' tries on average. `"rank"'
+    maps a rank to an index with an order of the population that is computed once, and again only after the values
+    change.
+    """
+    def select_indices(self, k=1, selection="uniform", selection_size=2):
+        if selection == "uniform":
+            return self.sample_indices(k)
+        n = len(self.arrays)
+        if k > n:
+            raise ValueError("Cannot select %d distinct arrays from a population of %d." % (k, n))
+        if selection == "tournament":
+            draw = lambda: self._select_tournament(selection_size)
+        elif selection == "rank":
+            draw = self._select_rank
+        elif selection == "roulette":
+            draw = self._select_roulette
+        else:
+            raise ValueError(
+                "`selection' must be among `\"uniform\"', `\"tournament\"', `\"rank\"' and `\"roulette\"'."
+            )
+        indices = []
+        rejections = 0
+        while len(indices) < k:
+            i = draw()
+            if i not in indices:
+                indices.append(i)
+                rejections = 0
+            elif rejections < MAX_SELECTION_REJECTIONS:
+                rejections += 1
+            else:
+                indices.append(random.choice([j for j in range(n) if j not in indices]))
+                rejections = 0
+        return indices
+
+    def _select_tournament(self, selection_size):
+        contestants = random.sample(range(len(self.arrays)), min(selection_size, len(self.arrays)))
+        return max(contestants, key=self._values.item)
+
+    def _select_rank(self):
+        n = len(self.arrays)
+        if self._rank_order is None:
+            self._rank_order = np.argsort(-self.values, kind="stable").tolist()
+        t = random.randrange(n * (n + 1) // 2)
+        return self._rank_order[n - 1 - (math.isqrt(8 * t + 1) - 1) // 2]
+
+    def _select_roulette(self):
+        n = len(self.arrays)
+        max_value = self._values.item(self._best)
+        if max_value <= 0:
+            return random.randrange(n)
+        while True:
+            i = random.randrange(n)
+            if random.random() * max_value < self._values.item(i):
+                return i
+
+    """
+    Returns `k' distinct indices into `self.arrays', chosen uniformly at random.
+    """
+    def sample_indices(self,k=1):
+        return random.sample(range(len(self.arrays)), k)
+
+    """
+    Returns `m' pairs of distinct indices into `self.arrays', each pair chosen by `selection'; see `select_indices'.
+    """
+    def select_pairs(self, m, selection="uniform", selection_size=2):
+        if selection == "uniform":
+            return self.sample_pairs(m)
+        return [tuple(self.select_indices(2, selection, selection_size)) for _ in range(m)]
+
+    """
+    Returns `m' pairs of distinct indices into `self.arrays', each chosen uniformly at random.
+    """
+    def sample_pairs(self,m):
+        n = len(self.arrays)
+        pairs = []
+        for _ in range(m):
+            i = random.randrange(n)
+            j = random.randrange(n - 1)
+            pairs.append((i, j + (j >= i)))
+        return pairs
+
+    """
+    Returns the genomes of `self.arrays' as the rows of a matrix; see `cog_array_stuff.stack_genomes'.
+    """
+    def get_genome_matrix(self):
+        return stack_genomes(self.arrays)
 
     def get_best(self):
-        return self.sort().arrays[0], self.values[0]
+        return self.arrays[self._best], self._values.item(self._best)
 
     def get_best_with_contributions(self):
-        self.sort()
-        return self.arrays[0], self.values[0],\
-            self.build_obj_fxn(self.arrays[0]),\
-            self.flaggy_obj_fxn(self.arrays[0]),\
-            self.exp_obj_fxn(self.arrays[0])
+        best_array, best_value = self.get_best()
+        return best_array, best_value,\
+            self.build_obj_fxn(best_array),\
+            self.flaggy_obj_fxn(best_array),\
+            self.exp_obj_fxn(best_array)
 
     def get_mean(self):
         return np.mean(self.values)
@@ -239,10 +654,15 @@ class Population:
     def get_median(self):
         return self.get_percentile(0.50)
 
+    """
+    Returns the pair that would be at position `int((1-perc)*self.get_size())' if the population were sorted from best
+    to worst.
+    """
     def get_percentile(self,perc):
-        self.sort()
         i = int((1-perc)*self.get_size())
-        return self.arrays[i],self.values[i]
+        if not self.is_sorted:
+            i = int(np.argpartition(-self.values, i)[i])
+        return self.arrays[i],self._values.item(i)
 
     def get_perc_std(self):
         return self.get_percentile(0.50 + ONE_SIG_PROB)[1] - self.get_median()[1]
@@ -250,11 +670,23 @@ class Population:
     def get_z_score(self,other):
         return (other.get_median()[1] - self.get_median()[1])/self.get_perc_std()
 
+    """
+    Returns the best `k' arrays, from best to worst.
+    """
+    def get_top(self, k):
+        if self.is_sorted or k >= len(self.arrays):
+            return self.sort().arrays[:k]
+        top = np.argpartition(-self.values, k - 1)[:k]
+        top = top[np.argsort(-self.values[top], kind="stable")]
+        return [self.arrays[i] for i in top.tolist()]
+
     def sort(self):
         if not self.is_sorted:
-            sorted_pairs = sorted(zip(self.values, self.arrays),key=lambda t:-t[0])
-            self.values = [v for (v,_) in sorted_pairs]
-            self.arrays = [a for (_,a) in sorted_pairs]
+            order = np.argsort(-self.values, kind="stable")
+            self._values[:len(self.arrays)] = self.values[order]
+            self.arrays = [self.arrays[i] for i in order.tolist()]
+            self._best = 0 if len(self.arrays) > 0 else None
+            self._rank_order = None
             self.is_sorted = True
         return self
 
@@ -264,7 +696,8 @@ class Population:
     def __copy__(self):
         return Population([copy.copy(array) for array in self.arrays],
                           self.obj_fxn, self.build_obj_fxn,
-                          self.flaggy_obj_fxn, self.exp_obj_fxn)
+                          self.flaggy_obj_fxn, self.exp_obj_fxn, self.engine, self.values.copy(), self.fitness_cache
+                          ).set_cull_info(self.dedupe, self.niche_radius, self.niche_capacity)
 
 """
 The genetic algorithm.
@@ -280,6 +713,8 @@ The genetic algorithm.
     - max_factor: See `Cog.update_strengths'.
     - max_multiplier: See `Cog.update_strengths'.
     - controller: A singleton of class `Iteration_Controller'.
+If `controller' resumes from a checkpoint (see `Iteration_Controller.set_checkpoint_info'), the warm-up statistics are
+read from it instead of computed.
 """
 def learning_algo(
         cogs,
@@ -293,153 +728,404 @@ def learning_algo(
         controller,
         build_obj_fxn,
         flaggy_obj_fxn,
-        exp_obj_fxn
+        exp_obj_fxn,
+        num_workers=1,
+        stats_cache=None
 ):
 
     controller.print_init_info()
 
-    excludes_dict = get_excludes_dict(empties_set,cogs)
-    cog_array_template = Cog_Array(empties_set,None,excludes_dict).extend_spares(cogs)
+    checkpointer = controller.checkpointer
+    if checkpointer is not None and controller.resume and checkpointer.exists():
+        average_std_objs = checkpointer.load_average_std_objs(cogs)
+    else:
+        average_std_objs = get_average_std_objs(cogs, empties_set, flaggies, obj_fxn, num_workers, stats_cache)
 
-    can_do_one_point_mutation = cog_array_template.get_num_non_empty() < cog_array_template.get_num_spares()
+    evolution = evolve(
+        cogs, empties_set, flaggies, pop_size, obj_fxn, factor_base, max_factor, max_multiplier, controller,
+        build_obj_fxn, flaggy_obj_fxn, exp_obj_fxn, average_std_objs
+    )
+    while True:
+        try:
+            next(evolution)
+        except StopIteration as stop:
+            return stop.value
 
-    bests = []
+"""
+- The warm-up stage of `learning_algo'. Returns a `dict' mapping each cog of `cogs' to `cog.get_average_std_obj(...)'.
+- As a side effect, each cog caches its own average and standard deviation.
+- Each cog is a separate task, with a fresh cog array template and its own seed, derived from a single draw of
+`random'. If `num_workers > 1', the tasks are spread over a pool of that many processes. Either way, the results and the
+state of `random' afterwards are the same for a fixed seed.
+- Cogs with the same `cog_registry.get_stats_key' (e.g. identical cogs) share the computation of the first of them, with
+or without `stats_cache'.
+- If `stats_cache' (a `stats_cache.Stats_Cache') is given, cogs found in it are not recomputed, and the statistics of
+the others are added to it. The cache is then saved, so the statistics survive even if the run is interrupted. On a
+cold cache, the results are the same as without one.
+"""
+def get_average_std_objs(cogs, empties_set, flaggies, obj_fxn, num_workers=1, stats_cache=None):
     # with open("hello.pkl", "rb") as fh:
     #     cogs = pkl.load(fh)
-    average_std_objs = {}
+    base_seed = random.getrandbits(64)
+    firsts = [None] * len(cogs)
+    first_indices = {}
+    keys = [None] * len(cogs)
+    tasks = []
+    for i, cog in enumerate(cogs):
+        firsts[i] = first_indices.setdefault(get_stats_key(cog), i)
+        if firsts[i] != i:
+            continue
+        if stats_cache is not None:
+            keys[i] = stats_cache.get_key(cog, empties_set, flaggies, obj_fxn)
+            cached = stats_cache.get(keys[i])
+            if cached is not None:
+                cog.average_obj, cog.std_obj = cached
+                continue
+        tasks.append((i, "%d/%d" % (base_seed, i)))
+    if num_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(
+                num_workers, initializer=_init_average_std_obj_task, initargs=(cogs, empties_set, flaggies, obj_fxn)
+        ) as executor:
+            results = list(executor.map(_average_std_obj_task, tasks))
+    else:
+        state = random.getstate()
+        _init_average_std_obj_task(cogs, empties_set, flaggies, obj_fxn)
+        results = list(map(_average_std_obj_task, tasks))
+        random.setstate(state)
+    for (i, _), (average_obj, std_obj) in zip(tasks, results):
+        cogs[i].average_obj, cogs[i].std_obj = average_obj, std_obj
+        if stats_cache is not None:
+            stats_cache.put(keys[i], average_obj, std_obj)
     for i, cog in enumerate(cogs):
-        average_std_objs[cog] = cog.get_average_std_obj(cog_array_template, obj_fxn)
+        if firsts[i] != i:
+            cog.average_obj, cog.std_obj = cogs[firsts[i]].get_average_std_obj()
+    if stats_cache is not None:
+        stats_cache.save()
+    average_std_objs = {cog: cog.get_average_std_obj() for cog in cogs}
     # with open("hello.pkl", "wb") as fh:
     #     pkl.dump(cogs,fh)
     # raise Exception
+    return average_std_objs
+
+_average_std_obj_task_args = None
+
+def _init_average_std_obj_task(cogs, empties_set, flaggies, obj_fxn):
+    global _average_std_obj_task_args
+    _average_std_obj_task_args = (cogs, empties_set, flaggies, get_excludes_dict(empties_set,cogs), obj_fxn)
+
+def _average_std_obj_task(task):
+    i, seed = task
+    cogs, empties_set, flaggies, excludes_dict, obj_fxn = _average_std_obj_task_args
+    random.seed(seed)
+    cog_array_template = Cog_Array(empties_set,flaggies,excludes_dict).extend_spares(cogs)
+    return cogs[i].get_average_std_obj(cog_array_template, obj_fxn)
+
+"""
+- The restart, generation and mutation loops of `learning_algo', written as a generator. The arguments are those of
+`learning_algo', plus the output of `get_average_std_objs'.
+- See `Iteration_Controller.set_steady_state_info' for the steady-state alternative to the generational loop.
+- It yields the current `Population' after every generation. A caller may add arrays to it between generations, which
+is how `island_model' migrates arrays between islands.
+- When it is exhausted, the `value' of its `StopIteration' is the best `(Cog_Array, value)' pair over all restarts.
+- With a checkpoint (see `Iteration_Controller.set_checkpoint_info'), it saves its state just before it yields, and
+may start from the state saved by an earlier run, right after the generation it was saved in.
+"""
+def evolve(
+        cogs,
+        empties_set,
+        flaggies,
+        pop_size,
+        obj_fxn,
+        factor_base,
+        max_factor,
+        max_multiplier,
+        controller,
+        build_obj_fxn,
+        flaggy_obj_fxn,
+        exp_obj_fxn,
+        average_std_objs
+):
+
+    excludes_dict = get_excludes_dict(empties_set,cogs)
+    cog_array_template = Cog_Array(empties_set,flaggies,excludes_dict).extend_spares(cogs)
+    engine = Vector_Engine(cogs, empties_set, flaggies)
+
+    can_do_one_point_mutation = cog_array_template.get_num_non_empty() < cog_array_template.get_num_spares()
+
+    fitness_cache = None
+    if controller.fitness_cache_size > 0:
+        fitness_cache = Fitness_Cache(controller.fitness_cache_size)
+    controller.fitness_cache = fitness_cache
+
+    def new_population(arrays, values=None):
+        return Population(arrays, obj_fxn,
+                          build_obj_fxn, flaggy_obj_fxn, exp_obj_fxn, engine, values, fitness_cache
+                          ).set_cull_info(controller.dedupe, controller.niche_radius, controller.niche_capacity)
+
+    bests = []
+    metrics = controller.metrics
+    checkpointer = controller.checkpointer
+    resumed = None
+    if checkpointer is not None and controller.resume and checkpointer.exists():
+        resumed = checkpointer.load(
+            cogs, Cog_Array(empties_set,flaggies,excludes_dict), controller, new_population, fitness_cache
+        )
+        bests = resumed[2]
 
     while controller.restart_loop():
 
-        for cog in cogs:
-            cog.instantiate_strengths(cog_array_template)
+        if resumed is not None:
+            pop, orig_pop, _ = resumed
+            controller.orig_pop, controller.curr_pop = orig_pop, pop
+            resumed = None
 
-        pop = []
-        for _ in range(pop_size):
-            cog_array = Cog_Array(empties_set,None,excludes_dict)
-            cog_array.instantiate_randomly(cogs)
-            pop.append(cog_array)
-        pop = Population(pop, obj_fxn,
-                         build_obj_fxn, flaggy_obj_fxn, exp_obj_fxn)
+        else:
+            for cog in cogs:
+                cog.instantiate_strengths(cog_array_template)
+
+            pop = []
+            if controller.output_datas is not None:
+                pop.extend(get_warm_start_arrays(
+                    cogs, empties_set, flaggies, excludes_dict, controller.output_datas,
+                    int(round(controller.warm_start_fraction * pop_size)), controller.prob_one_point_mutation
+                ))
+            for _ in range(pop_size - len(pop)):
+                cog_array = Cog_Array(empties_set,flaggies,excludes_dict)
+                cog_array.instantiate_randomly(cogs)
+                pop.append(cog_array)
+            pop = new_population(pop)
 
-        controller.set_pop(pop)
+            controller.set_pop(pop)
         controller.print_restart_status_open()
 
         while controller.generation_loop():
 
+            if metrics is not None:
+                metrics.start_generation(pop)
             controller.print_generation_status()
+            if metrics is not None:
+                metrics.lap("status")
+
+            if controller.replacement is None:
+                children = []
+                breedings = []
+                num_cross_breeds = 0
+                while controller.mutation_loop():
+                    breeding_scheme = controller.breeding_scheme()
+                    if breeding_scheme == "cross_breed":
+                        num_cross_breeds += 1
+                        continue
+                    new_array, breeding = breed(pop, controller, can_do_one_point_mutation, breeding_scheme)
+                    children.append(new_array)
+                    breedings.append(breeding)
+                children.extend(
+                    cross_breed_many(pop, num_cross_breeds, controller.selection, controller.selection_size)
+                )
+                breedings.extend([("cross_breed",)] * num_cross_breeds)
+                if metrics is not None:
+                    metrics.add_breedings(breedings)
+                    metrics.lap("breed")
+
+                new_objs = pop.extend(children)
+                if metrics is not None:
+                    metrics.lap("evaluate")
+
+                for new_array, new_obj, breeding in zip(children, new_objs, breedings):
+                    update_strengths(
+                        new_array, new_obj, breeding, average_std_objs, factor_base, max_factor, max_multiplier
+                    )
+                if metrics is not None:
+                    metrics.lap("update_strengths")
+
+            else:
+                while controller.mutation_loop():
+                    new_array, breeding = breed(pop, controller, can_do_one_point_mutation)
+                    if metrics is not None:
+                        metrics.add_breedings([breeding])
+                        metrics.lap("breed")
+                    new_obj = pop.evaluate([new_array]).item(0)
+                    if metrics is not None:
+                        metrics.lap("evaluate")
+                    pop.offer(new_array, new_obj, controller.replacement, controller.tournament_size)
+                    if metrics is not None:
+                        metrics.lap("replace")
+                    update_strengths(
+                        new_array, new_obj, breeding, average_std_objs, factor_base, max_factor, max_multiplier
+                    )
+                    if metrics is not None:
+                        metrics.lap("update_strengths")
 
-            while controller.mutation_loop():
-
-                breeding_scheme = controller.breeding_scheme()
-                if breeding_scheme == "cross_breed":
-                    (array1,_),(array2,_) = pop.sample(2)
-                    pop.add(array1.cross_breed(array2))
-
-                elif breeding_scheme == "two_point_mutation" or not can_do_one_point_mutation:
-                    old_array,old_obj = pop.sample(1)[0]
-                    new_array, coords1, coords2 = old_array.two_point_mutation()
-                    cog1 = old_array[coords1]
-                    cog2 = old_array[coords2]
-                    _, new_obj = pop.add(new_array)
-                    try:
-                        prop_new = new_obj / (old_obj + new_obj)
-                        factor = factor_base ** ((prop_new-1/2)*old_array.get_num_occupied())
-                        cog1.update_strength(coords2,factor,max_factor,max_multiplier)
-                        cog1.update_strength(coords1,1/factor,max_factor,max_multiplier)
-                        cog2.update_strength(coords1, factor, max_factor,max_multiplier)
-                        cog2.update_strength(coords2, 1/factor,max_factor,max_multiplier)
-                        pass
-                    except ZeroDivisionError:
-                        pass
-
-                elif breeding_scheme == "one_point_mutation":
-                    old_array,old_obj = pop.sample(1)[0]
-                    new_array,coords,old_cog = old_array.one_point_mutation()
-                    new_cog = new_array[coords]
-                    _, new_obj = pop.add(new_array)
-                    median_diff = average_std_objs[new_cog][0] - average_std_objs[old_cog][0]
-                    std_diff = np.sqrt(average_std_objs[new_cog][1] ** 2 + average_std_objs[old_cog][1] ** 2)
-                    try:
-                        z_score = (new_obj - old_obj - median_diff) / std_diff
-                        factor = factor_base ** z_score
-                        old_cog.update_strength(coords, 1 / factor, max_factor, max_multiplier)
-                        new_cog.update_strength(coords, factor, max_factor, max_multiplier)
-                        pass
-                        # if (
-                        #         (
-                        #         new_cog.__class__.__name__ == "Up_Cog" and
-                        #         coords.y == 7 and
-                        #         np.max(new_cog.get_strength(coords))>=0.03
-                        #         ) or (
-                        #
-                        #     )
-                        # ):
-                        #     print("NEW")
-                        #     print(new_array.str_with_abbr())
-                        #     print("OLD")
-                        #     print(old_array.str_with_abbr())
-                        #     print("new_cog:                      %s" % str(new_cog).replace("\n","\t"))
-                        #     print("new_obj:                      %1.5f" % new_obj)
-                        #     print("old_cog:                      %s" % str(old_cog).replace("\n","\t"))
-                        #     print("old_obj:                      %1.5f" % old_obj)
-                        #     print("Coords:                       %s" % coords)
-                        #     print("average_std_objs[new_cog][0]: %1.5f" % average_std_objs[new_cog][0])
-                        #     print("average_std_objs[old_cog][0]: %1.5f" % average_std_objs[old_cog][0])
-                        #     print("median_diff:                  %1.5f" % median_diff)
-                        #     print("average_std_objs[new_cog][1]: %1.5f" % average_std_objs[new_cog][1])
-                        #     print("average_std_objs[old_cog][1]: %1.5f" % average_std_objs[old_cog][1])
-                        #     print("std_diff:                     %1.5f" % std_diff)
-                        #     print("z_score:                      %1.5f" % z_score)
-                        #     print("pre_factor:                   %1.5f" % pre_factor)
-                        #     print("new_cog factor:               %1.5f" % factor)
-                        #     print("old_cog factor:               %1.5f" % (1/factor))
-                        #     print("new_cog.get_strength(coords): %1.5f" % new_cog.get_strength(coords))
-                        #     print("old_cog.get_strength(coords): %1.5f" % old_cog.get_strength(coords))
-                        #     print("new_cog.strengths:\n%s" % np.array2string(new_cog.strengths.transpose(),precision=5,max_line_width=120))
-                        #     print("old_cog.strengths:\n%s" % np.array2string(old_cog.strengths.transpose(),precision=5,max_line_width=120))
-                        # elif (
-                        #     old_cog.__class__.__name__ == "Up_Cog" and
-                        #     # old_cog.build_rate == 28 and
-                        #     # old_cog.exp_rate == 0.07 and
-                        #     # old_cog.build_rate_boost == 0.09 and
-                        #     coords.y == 7 and
-                        #     np.max(old_cog.get_strength(coords)) >= 0.03
-                        # ):
-                        #     print("OLD")
-                        #     print(old_array.str_with_abbr())
-                        #     print("NEW")
-                        #     print(new_array.str_with_abbr())
-                        #     print("old_cog:                      %s" % str(old_cog).replace("\n","\t"))
-                        #     print("old_obj:                      %1.5f" % old_obj)
-                        #     print("new_cog:                      %s" % str(new_cog).replace("\n","\t"))
-                        #     print("new_obj:                      %1.5f" % new_obj)
-                        #     print("Coords:                       %s" % coords)
-                        #     print("average_std_objs[old_cog][0]: %1.5f" % average_std_objs[old_cog][0])
-                        #     print("average_std_objs[new_cog][0]: %1.5f" % average_std_objs[new_cog][0])
-                        #     print("median_diff:                  %1.5f" % median_diff)
-                        #     print("average_std_objs[old_cog][1]: %1.5f" % average_std_objs[old_cog][1])
-                        #     print("average_std_objs[new_cog][1]: %1.5f" % average_std_objs[new_cog][1])
-                        #     print("std_diff:                     %1.5f" % std_diff)
-                        #     print("z_score:                      %1.5f" % z_score)
-                        #     print("pre_factor:                   %1.5f" % pre_factor)
-                        #     print("old_cog factor:               %1.5f" % (1/factor))
-                        #     print("new_cog factor:               %1.5f" % factor)
-                        #     print("old_cog.get_strength(coords): %1.5f" % old_cog.get_strength(coords))
-                        #     print("new_cog.get_strength(coords): %1.5f" % new_cog.get_strength(coords))
-                        #     print("old_cog.strengths:\n%s" % np.array2string(old_cog.strengths.transpose(),precision=5,max_line_width=120))
-                        #     print("new_cog.strengths\n%s" % np.array2string(new_cog.strengths.transpose(),precision=5,max_line_width=120))
-                    except ZeroDivisionError:
-                        pass
-
-                else:
-                    raise RuntimeError("Breeding scheme must be among `cross_breed`, `one_point_mutation`, and `two_point_mutation`.")
             pop.cull()
+            if metrics is not None:
+                metrics.lap("cull")
+            if checkpointer is not None:
+                checkpointer.maybe_save(cogs, controller, pop, bests)
+                if metrics is not None:
+                    metrics.lap("checkpoint")
+            if metrics is not None:
+                metrics.end_generation(controller, pop)
+            yield pop
         controller.print_restart_status_close()
 
         bests.append(pop.get_best())
-    return max(bests, key=lambda t:t[1])
\ No newline at end of file
+    return max(bests, key=lambda t:t[1])
+
+"""
+- Returns `num_arrays' arrays for an initial population, seeded from `output_datas', the output of
+`file_readers.read_output_datas'.
+- The first is `Cog_Array.instantiate_from_output(cogs, output_datas)': the cogs of the previous array keep their
+places, as far as they are still in `cogs' and their places still slots. Each of the others is the first with 1 to
+`WARM_START_MAX_MUTATIONS' random mutations (see `local_search.get_neighbor').
+"""
+def get_warm_start_arrays(
+        cogs, empties_set, flaggies, excludes_dict, output_datas, num_arrays, prob_one_point_mutation=0.5
+):
+    if num_arrays <= 0:
+        return []
+    seed = Cog_Array(empties_set,flaggies,excludes_dict).instantiate_from_output(cogs, output_datas)
+    arrays = [seed]
+    can_move = seed.get_num_spares() > 0 or seed.num_slots >= 2
+    while len(arrays) < num_arrays:
+        cog_array = seed
+        for _ in range(random.randint(1, WARM_START_MAX_MUTATIONS) if can_move else 0):
+            cog_array = get_neighbor(cog_array, prob_one_point_mutation)
+        arrays.append(cog_array if cog_array is not seed else copy.copy(seed))
+    return arrays
+
+"""
+- Produces one child of `pop', by `breeding_scheme', or else by the breeding scheme chosen by `controller'.
+- Returns the child and a `tuple' describing how it was bred, for `update_strengths':
+    > `("cross_breed",)',
+    > `("one_point_mutation", old_array, old_obj, coords, old_cog)' or
+    > `("two_point_mutation", old_array, old_obj, coords1, coords2)'.
+"""
+def breed(pop, controller, can_do_one_point_mutation, breeding_scheme=None):
+    if breeding_scheme is None:
+        breeding_scheme = controller.breeding_scheme()
+    if breeding_scheme == "cross_breed":
+        (array1,_),(array2,_) = pop.select(2, controller.selection, controller.selection_size)
+        return array1.cross_breed(array2), (breeding_scheme,)
+
+    elif breeding_scheme == "two_point_mutation" or not can_do_one_point_mutation:
+        old_array,old_obj = pop.select(1, controller.selection, controller.selection_size)[0]
+        new_array, coords1, coords2 = old_array.two_point_mutation()
+        return new_array, ("two_point_mutation", old_array, old_obj, coords1, coords2)
+
+    elif breeding_scheme == "one_point_mutation":
+        old_array,old_obj = pop.select(1, controller.selection, controller.selection_size)[0]
+        new_array,coords,old_cog = old_array.one_point_mutation()
+        return new_array, (breeding_scheme, old_array, old_obj, coords, old_cog)
+
+    else:
+        raise RuntimeError("Breeding scheme must be among `cross_breed`, `one_point_mutation`, and `two_point_mutation`.")
+
+"""
+- Produces `num_children' children of `pop' by cross breeding, all at once (see `cog_array_stuff.cross_breed_genomes').
+Each child has two distinct parents, chosen by `selection' (see `Population.select_indices').
+- The children's genomes are rows of one matrix.
+"""
+def cross_breed_many(pop, num_children, selection="uniform", selection_size=2):
+    if num_children == 0:
+        return []
+    template = pop.arrays[0]
+    pairs = pop.select_pairs(num_children, selection, selection_size)
+    genomes = cross_breed_genomes(template, pop.get_genome_matrix(), pairs)
+    return [template.from_genome(genome) for genome in genomes]
+
+"""
+Updates the strengths of the cogs involved in producing `new_array', whose objective value is `new_obj'. `breeding' is
+the second return value of `breed'. Cross breeds do not update any strengths.
+"""
+def update_strengths(new_array, new_obj, breeding, average_std_objs, factor_base, max_factor, max_multiplier):
+    breeding_scheme = breeding[0]
+    if breeding_scheme == "two_point_mutation":
+        _, old_array, old_obj, coords1, coords2 = breeding
+        cog1 = old_array[coords1]
+        cog2 = old_array[coords2]
+        try:
+            prop_new = new_obj / (old_obj + new_obj)
+            factor = factor_base ** ((prop_new-1/2)*old_array.get_num_occupied())
+            cog1.update_strength(coords2,factor,max_factor,max_multiplier)
+            cog1.update_strength(coords1,1/factor,max_factor,max_multiplier)
+            cog2.update_strength(coords1, factor, max_factor,max_multiplier)
+            cog2.update_strength(coords2, 1/factor,max_factor,max_multiplier)
+            pass
+        except ZeroDivisionError:
+            pass
+
+    elif breeding_scheme == "one_point_mutation":
+        _, old_array, old_obj, coords, old_cog = breeding
+        new_cog = new_array[coords]
+        median_diff = average_std_objs[new_cog][0] - average_std_objs[old_cog][0]
+        std_diff = np.sqrt(average_std_objs[new_cog][1] ** 2 + average_std_objs[old_cog][1] ** 2)
+        try:
+            z_score = (new_obj - old_obj - median_diff) / std_diff
+            factor = factor_base ** z_score
+            old_cog.update_strength(coords, 1 / factor, max_factor, max_multiplier)
+            new_cog.update_strength(coords, factor, max_factor, max_multiplier)
+            pass
+            # if (
+            #         (
+            #         new_cog.__class__.__name__ == "Up_Cog" and
+            #         coords.y == 7 and
+            #         np.max(new_cog.get_strength(coords))>=0.03
+            #         ) or (
+            #
+            #     )
+            # ):
+            #     print("NEW")
+            #     print(new_array.str_with_abbr())
+            #     print("OLD")
+            #     print(old_array.str_with_abbr())
+            #     print("new_cog:                      %s" % str(new_cog).replace("\n","\t"))
+            #     print("new_obj:                      %1.5f" % new_obj)
+            #     print("old_cog:                      %s" % str(old_cog).replace("\n","\t"))
+            #     print("old_obj:                      %1.5f" % old_obj)
+            #     print("Coords:                       %s" % coords)
+            #     print("average_std_objs[new_cog][0]: %1.5f" % average_std_objs[new_cog][0])
+            #     print("average_std_objs[old_cog][0]: %1.5f" % average_std_objs[old_cog][0])
+            #     print("median_diff:                  %1.5f" % median_diff)
+            #     print("average_std_objs[new_cog][1]: %1.5f" % average_std_objs[new_cog][1])
+            #     print("average_std_objs[old_cog][1]: %1.5f" % average_std_objs[old_cog][1])
+            #     print("std_diff:                     %1.5f" % std_diff)
+            #     print("z_score:                      %1.5f" % z_score)
+            #     print("pre_factor:                   %1.5f" % pre_factor)
+            #     print("new_cog factor:               %1.5f" % factor)
+            #     print("old_cog factor:               %1.5f" % (1/factor))
+            #     print("new_cog.get_strength(coords): %1.5f" % new_cog.get_strength(coords))
+            #     print("old_cog.get_strength(coords): %1.5f" % old_cog.get_strength(coords))
+            #     print("new_cog.strengths:\n%s" % np.array2string(new_cog.strengths.transpose(),precision=5,max_line_width=120))
+            #     print("old_cog.strengths:\n%s" % np.array2string(old_cog.strengths.transpose(),precision=5,max_line_width=120))
+            # elif (
+            #     old_cog.__class__.__name__ == "Up_Cog" and
+            #     # old_cog.build_rate == 28 and
+            #     # old_cog.exp_rate == 0.07 and
+            #     # old_cog.build_rate_boost == 0.09 and
+            #     coords.y == 7 and
+            #     np.max(old_cog.get_strength(coords)) >= 0.03
+            # ):
+            #     print("OLD")
+            #     print(old_array.str_with_abbr())
+            #     print("NEW")
+            #     print(new_array.str_with_abbr())
+            #     print("old_cog:                      %s" % str(old_cog).replace("\n","\t"))
+            #     print("old_obj:                      %1.5f" % old_obj)
+            #     print("new_cog:                      %s" % str(new_cog).replace("\n","\t"))
+            #     print("new_obj:                      %1.5f" % new_obj)
+            #     print("Coords:                       %s" % coords)
+            #     print("average_std_objs[old_cog][0]: %1.5f" % average_std_objs[old_cog][0])
+            #     print("average_std_objs[new_cog][0]: %1.5f" % average_std_objs[new_cog][0])
+            #     print("median_diff:                  %1.5f" % median_diff)
+            #     print("average_std_objs[old_cog][1]: %1.5f" % average_std_objs[old_cog][1])
+            #     print("average_std_objs[new_cog][1]: %1.5f" % average_std_objs[new_cog][1])
+            #     print("std_diff:                     %1.5f" % std_diff)
+            #     print("z_score:                      %1.5f" % z_score)
+            #     print("pre_factor:                   %1.5f" % pre_factor)
+            #     print("old_cog factor:               %1.5f" % (1/factor))
+            #     print("new_cog factor:               %1.5f" % factor)
+            #     print("old_cog.get_strength(coords): %1.5f" % old_cog.get_strength(coords))
+            #     print("new_cog.get_strength(coords): %1.5f" % new_cog.get_strength(coords))
+            #     print("old_cog.strengths:\n%s" % np.array2string(old_cog.strengths.transpose(),precision=5,max_line_width=120))
+            #     print("new_cog.strengths\n%s" % np.array2string(new_cog.strengths.transpose(),precision=5,max_line_width=120))
+        except ZeroDivisionError:
+            pass
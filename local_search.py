@@ -0,0 +1,159 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+import copy
+import math
+import random
+
+"""
+- The probability that `simulated_annealing' accepts a move that worsens the objective by the average amount, at the
+first and at the last step. See `make_cooling_schedule'.
+- `WARM_START_ACCEPTANCE' replaces `START_ACCEPTANCE' when the search starts from an array that is already good, e.g.
+the one from a previous run, so that the search refines it instead of scrambling it.
+"""
+START_ACCEPTANCE = 0.5
+WARM_START_ACCEPTANCE = 0.05
+END_ACCEPTANCE = 0.001
+
+"""
+Every `REFRESH_INTERVAL' steps, `simulated_annealing' recomputes the rates of the current array from scratch, so that
+the rounding errors of `Cog_Array.derive_rates' do not build up.
+"""
+REFRESH_INTERVAL = 10000
+
+"""
+- A cooling schedule is any callable that maps the step number, from 0 to `num_steps - 1', to a temperature. These go
+from `start_temperature' down to `end_temperature' over `num_steps' steps:
+    > `Geometric_Cooling' multiplies the temperature by the same factor every step.
+    > `Linear_Cooling' subtracts the same amount every step.
+    > `Logarithmic_Cooling' divides `start_temperature' by `1 + c*log(1 + step)', which cools quickly at first and slowly
+    later on.
+"""
+class Geometric_Cooling:
+    def __init__(self, start_temperature, end_temperature, num_steps):
+        self.start_temperature = start_temperature
+        self.ratio = (end_temperature / start_temperature) ** (1 / max(num_steps - 1, 1))
+
+    def __call__(self, step):
+        return self.start_temperature * self.ratio ** step
+
+class Linear_Cooling:
+    def __init__(self, start_temperature, end_temperature, num_steps):
+        self.start_temperature = start_temperature
+        self.decrement = (start_temperature - end_temperature) / max(num_steps - 1, 1)
+
+    def __call__(self, step):
+        return self.start_temperature - self.decrement * step
+
+class Logarithmic_Cooling:
+    def __init__(self, start_temperature, end_temperature, num_steps):
+        self.start_temperature = start_temperature
+        self.c = (start_temperature / end_temperature - 1) / math.log(max(num_steps, 2))
+
+    def __call__(self, step):
+        return self.start_temperature / (1 + self.c * math.log(1 + step))
+
+COOLING_SCHEDULES = {
+    "geometric": Geometric_Cooling,
+    "linear": Linear_Cooling,
+    "logarithmic": Logarithmic_Cooling
+}
+
+"""
+- Returns a random neighbor of `cog_array': a one point mutation with probability `prob_one_point_mutation' (if
+`cog_array' has spares), and a two point mutation otherwise. These are the mutations of the genetic algorithm.
+- The neighbor derives its rates from those of `cog_array' (see `Cog_Array.derive_rates'), so if `cog_array' has cached
+rates, `obj_fxn(neighbor)' does not walk the whole array.
+"""
+def get_neighbor(cog_array, prob_one_point_mutation=0.5):
+    if cog_array.get_num_spares() > 0 and (
+            cog_array.num_slots < 2 or random.random() < prob_one_point_mutation
+    ):
+        return cog_array.one_point_mutation()[0]
+    return cog_array.two_point_mutation()[0]
+
+"""
+Returns the average amount by which `num_samples' random neighbors of `cog_array' (see `get_neighbor') are worse than
+`cog_array', among those that are worse, or 0 if none is.
+"""
+def get_average_worsening(cog_array, obj_fxn, prob_one_point_mutation=0.5, num_samples=200):
+    value = obj_fxn(cog_array)
+    worsenings = []
+    for _ in range(num_samples):
+        delta = value - obj_fxn(get_neighbor(cog_array, prob_one_point_mutation))
+        if delta > 0:
+            worsenings.append(delta)
+    return sum(worsenings) / len(worsenings) if len(worsenings) > 0 else 0.0
+
+"""
+- Returns the cooling schedule named `name' (see `COOLING_SCHEDULES') for `num_steps' steps of `simulated_annealing'
+from `start_array'.
+- The temperatures are chosen so that a move that is worse by `get_average_worsening(start_array, ...)' is accepted with
+probability `start_acceptance' at the first step and `end_acceptance' at the last.
+- If no neighbor of `start_array' is worse, the temperature is 0 throughout, so that the search only climbs.
+"""
+def make_cooling_schedule(
+        name,
+        start_array,
+        obj_fxn,
+        num_steps,
+        start_acceptance=START_ACCEPTANCE,
+        end_acceptance=END_ACCEPTANCE,
+        prob_one_point_mutation=0.5
+):
+    if name not in COOLING_SCHEDULES:
+        raise ValueError("`name' must be among `\"geometric\"', `\"linear\"' and `\"logarithmic\"'.")
+    worsening = get_average_worsening(start_array, obj_fxn, prob_one_point_mutation)
+    if worsening == 0:
+        return lambda step: 0.0
+    return COOLING_SCHEDULES[name](
+        worsening / -math.log(start_acceptance), worsening / -math.log(end_acceptance), num_steps
+    )
+
+"""
+- A single-trajectory alternative to `learning_algo'. Starting from `start_array', each step draws a random neighbor
+(see `get_neighbor') of the current array. A better neighbor always replaces it; a neighbor worse by `delta' replaces
+it with probability `exp(-delta / cooling(step))'.
+- `start_array' is not modified. It should hold every cog, with the others as spares, and its `excludes_dict' guides the
+one point mutations, as in the genetic algorithm.
+- Each step costs one mutation and one evaluation of the rates it changed, so it is far cheaper than a generation.
+Starting from a previous best array (see `Cog_Array.instantiate_from_output'), it usually only needs a few thousand
+steps to adjust to a small change of inventory.
+- Stops after `num_steps' steps, or as soon as the best value reaches `target', if given.
+- Returns the best `(Cog_Array, value)' pair found, like `learning_algo'. The value is recomputed from scratch.
+"""
+def simulated_annealing(start_array, obj_fxn, num_steps, cooling, prob_one_point_mutation=0.5, target=None):
+    current = copy.copy(start_array)
+    current_value = obj_fxn(current)
+    best, best_value = current, current_value
+    can_move = current.get_num_spares() > 0 or current.num_slots >= 2
+    for step in range(num_steps if can_move else 0):
+        if target is not None and best_value >= target:
+            break
+        if step > 0 and step % REFRESH_INTERVAL == 0:
+            current = copy.copy(current)
+            current_value = obj_fxn(current)
+        neighbor = get_neighbor(current, prob_one_point_mutation)
+        value = obj_fxn(neighbor)
+        delta = value - current_value
+        if delta < 0:
+            temperature = cooling(step)
+            if temperature <= 0 or random.random() >= math.exp(delta / temperature):
+                continue
+        current, current_value = neighbor, value
+        if value > best_value:
+            best, best_value = neighbor, value
+    best = copy.copy(best)
+    return best, obj_fxn(best)
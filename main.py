@@ -14,18 +14,27 @@ Cogstruction: Optimizing cog arrays in Legends of Idleon
 """
 
 
+import os
 import random
 import numpy as np
 import argparse
 import time
 from datetime import datetime
 
-from learning_algo import Iteration_Controller, learning_algo
+from learning_algo import Iteration_Controller, learning_algo, WARM_START_FRACTION
+from island_model import island_learning_algo
+from exact_solver import exact_solve
+from local_search import COOLING_SCHEDULES, START_ACCEPTANCE, WARM_START_ACCEPTANCE, make_cooling_schedule,\
+    simulated_annealing
 from fitness_functions import standard_obj_fxn, inversion_matrix,\
-    average_affix_conversion_obj_fxn, weight_normalization
-from file_readers import read_cog_datas, read_empties_datas, read_flaggies_datas
+    average_affix_conversion_obj_fxn, weight_normalization, Weighted_Obj_Fxn
+from file_readers import read_cog_datas, read_empties_datas, read_flaggies_datas,\
+    read_output_datas, Cog_Data_File_Error
 from cog_factory import cog_factory
-from cog_array_stuff import Empties_Set
+from cog_array_stuff import Cog_Array, Empties_Set, get_excludes_dict
+from stats_cache import Stats_Cache, STATS_CACHE_FILENAME
+from checkpoint import CHECKPOINT_FILENAME, CHECKPOINT_INTERVAL, Checkpoint_Error
+from metrics import Metrics_Stream
 
 
 VERSION = 'Cogstruction 1.1.2 L'
@@ -35,7 +44,8 @@ def parseArgs():
                                      + "for optemizing the distrebution of "
                                      + "gears in the construction skill in "
                                      + "idleon. All arguments are optional.")
-    parser.add_argument("-s", "--seed", type=int, default=datetime.now(),
+    parser.add_argument("-s", "--seed", type=int,
+                        default=int(datetime.now().timestamp()),
                         help="the random seed to use for this run")
     parser.add_argument("-f", "--function",
                         choices=["aac", "average_affix_conversion",
@@ -63,6 +73,107 @@ def parseArgs():
                         help="size of the cog_array population")
     parser.add_argument("--runs", type=int, default=1,
                         help="number of times to try running the simulation")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes to run in parallel; each " +
+                        "process evolves its own population (island model). " +
+                        "The warm-up is also spread over this many processes")
+    parser.add_argument("--migration_interval", type=int, default=10,
+                        help="with more than one worker, the number of " +
+                        "generations between migrations of arrays")
+    parser.add_argument("--migrants", type=int, default=5,
+                        help="with more than one worker, the number of best " +
+                        "arrays each island sends to the next")
+    parser.add_argument("--steady_state", choices=["worst", "tournament"],
+                        default=None,
+                        help="evolve in steady state: each child replaces " +
+                        "the worst array, or the worst of a tournament, " +
+                        "as soon as it is bred, instead of growing and " +
+                        "culling the population every generation")
+    parser.add_argument("--tournament_size", type=int, default=2,
+                        help="with --steady_state tournament, the number " +
+                        "of arrays in each tournament")
+    parser.add_argument("--selection",
+                        choices=["uniform", "tournament", "rank", "roulette"],
+                        default="uniform",
+                        help="how parents are chosen: uniformly, by " +
+                        "tournament, by linear ranking or in proportion " +
+                        "to their objective values")
+    parser.add_argument("--selection_size", type=int, default=2,
+                        help="with --selection tournament, the number of " +
+                        "arrays in each tournament")
+    parser.add_argument("--solver", choices=["ga", "exact", "anneal"],
+                        default="ga",
+                        help="the genetic algorithm, an exact branch " +
+                        "and bound search that proves its array optimal, " +
+                        "or simulated annealing, which starts from the " +
+                        "array in output.csv if there is one. The exact " +
+                        "search falls back to the genetic algorithm if " +
+                        "the problem is too large")
+    parser.add_argument("--anneal_steps", type=int, default=100000,
+                        help="with --solver anneal, the number of steps")
+    parser.add_argument("--cooling", choices=list(COOLING_SCHEDULES),
+                        default="geometric",
+                        help="with --solver anneal, how the temperature " +
+                        "decreases from step to step")
+    parser.add_argument("--warm_start", action='store_true',
+                        help="seed the genetic algorithm with the array " +
+                        "in output.csv, if there is one, and mutations " +
+                        "of it, e.g. to re-optimize after a small change " +
+                        "of inventory")
+    parser.add_argument("--warm_start_fraction", type=float,
+                        default=WARM_START_FRACTION,
+                        help="with --warm_start, the fraction of the " +
+                        "initial population seeded from output.csv; the " +
+                        "rest is random")
+    parser.add_argument("--no_stats_cache", action='store_true',
+                        help="do not read or write the cache of per-cog " +
+                        "warm-up statistics stored next to cog_datas.csv")
+    parser.add_argument("--clear_stats_cache", action='store_true',
+                        help="delete the cache of per-cog warm-up " +
+                        "statistics before running")
+    parser.add_argument("--stats_cache_size", type=int, default=4096,
+                        help="the maximum number of entries kept in the " +
+                        "cache of per-cog warm-up statistics")
+    parser.add_argument("--fitness_cache_size", type=int, default=65536,
+                        help="the maximum number of objective values the " +
+                        "genetic algorithm remembers, so that it does not " +
+                        "score the same cog placement twice; 0 disables " +
+                        "the cache")
+    parser.add_argument("--no_dedupe", action='store_true',
+                        help="let the genetic algorithm keep several " +
+                        "arrays with the same cog placement; by default " +
+                        "only the best of them survives each generation")
+    parser.add_argument("--niche_radius", type=int, default=0,
+                        help="if positive, keep the population diverse: " +
+                        "arrays that differ from a better array on at " +
+                        "most this many slots are culled first, except " +
+                        "for the best --niche_capacity-1 of them")
+    parser.add_argument("--niche_capacity", type=int, default=1,
+                        help="with --niche_radius, the number of arrays " +
+                        "that survive in each niche")
+    parser.add_argument("--checkpoint_interval", type=float,
+                        default=CHECKPOINT_INTERVAL,
+                        help="the number of seconds between two saves of " +
+                        "the state of the genetic algorithm to " +
+                        CHECKPOINT_FILENAME + ", with one worker; " +
+                        "0 saves after every generation, as long as " +
+                        "saving stays cheap. The file is deleted once " +
+                        "the run is over")
+    parser.add_argument("--no_checkpoint", action='store_true',
+                        help="do not save the state of the genetic algorithm")
+    parser.add_argument("--resume", action='store_true',
+                        help="continue the run saved in " +
+                        CHECKPOINT_FILENAME + " by an interrupted run " +
+                        "with the same inputs and arguments, exactly as " +
+                        "it would have gone on. Only with one worker")
+    parser.add_argument("--metrics_file", default=None,
+                        help="with one worker, write one line of JSON per " +
+                        "generation of the genetic algorithm to this " +
+                        "file: the best, median and 90th percentile " +
+                        "objective values, the breeding schemes used, " +
+                        "the number of evaluations and cache hits, and " +
+                        "the time spent in each phase. With --resume, " +
+                        "the lines are appended")
     parser.add_argument("--verbose", action='store_true',
                         help="increase output verbosity")
     parser.add_argument("-d", "--debug", action='store_true',
@@ -71,6 +182,13 @@ def parseArgs():
     parser.add_argument("-v", "--version", action='version',
                         version=VERSION)
     args = parser.parse_args()
+    if args.resume and args.workers > 1:
+        parser.error("--resume needs --workers 1: runs with more than " +
+                     "one worker are not checkpointed")
+    if args.metrics_file is not None and args.workers > 1:
+        parser.error("--metrics_file needs --workers 1: the islands of " +
+                     "a run with more than one worker do not report " +
+                     "their generations")
     return args
 
 
@@ -136,6 +254,8 @@ def main():
     output_filename = "output.txt"
     # CSV output file
     previous_output_filename = "output.csv"
+    # Saved state of an unfinished run, for --resume
+    checkpoint_filename = None if args.no_checkpoint or args.workers > 1 else CHECKPOINT_FILENAME
     #####################
 
     
@@ -167,33 +287,118 @@ def main():
         .set_generation_info(min_generations, max_generations, max_running_total_len, req_running_total)
         .set_mutation_info(num_mutations)
         .set_breeding_scheme_info(prob_cross_breed, prob_one_point_mutation, prob_two_point_mutation)
+        .set_steady_state_info(args.steady_state, args.tournament_size)
+        .set_selection_info(args.selection, args.selection_size)
+        .set_fitness_cache_info(args.fitness_cache_size)
+        .set_cull_info(not args.no_dedupe, args.niche_radius, args.niche_capacity)
+        .set_checkpoint_info(checkpoint_filename, args.checkpoint_interval, args.resume)
                   )
     cog_datas = read_cog_datas(cog_datas_filename)
     empties = read_empties_datas(empties_datas_filename)
     empties_set = Empties_Set(empties)
     cogs = cog_factory(cog_datas)
 
+    stats_cache = None
+    if not args.no_stats_cache:
+        stats_cache = Stats_Cache(
+            os.path.join(os.path.dirname(cog_datas_filename), STATS_CACHE_FILENAME), args.stats_cache_size)
+        if args.clear_stats_cache:
+            stats_cache.clear()
+
     if debug:
         print("Timer started")
     tic = time.perf_counter()
-    best = learning_algo(
+    algo_args = (
         cogs,
         empties_set,
         set(),
         pop_size,
-        lambda cog: fitness_fn(
-            cog, build_weight, flaggy_weight, exp_weight, debug),
+        Weighted_Obj_Fxn(
+            fitness_fn, build_weight, flaggy_weight, exp_weight, debug),
         factor_base,
         max_factor,
         max_multiplier,
         controller,
-        lambda cog: fitness_fn(
-            cog, build_weight, 0, 0, debug),
-        lambda cog: fitness_fn(
-            cog, 0, flaggy_weight, 0, debug),
-        lambda cog: fitness_fn(
-            cog, 0, 0, exp_weight, debug)
+        Weighted_Obj_Fxn(
+            fitness_fn, build_weight, 0, 0, debug),
+        Weighted_Obj_Fxn(
+            fitness_fn, 0, flaggy_weight, 0, debug),
+        Weighted_Obj_Fxn(
+            fitness_fn, 0, 0, exp_weight, debug)
     )
+    output_datas = None
+    if args.solver == "anneal" or args.warm_start:
+        try:
+            output_datas = read_output_datas(previous_output_filename)
+        except (OSError, Cog_Data_File_Error):
+            print("No previous array file found at "
+                  + previous_output_filename + ", starting from random "
+                  + "cog arrays")
+    if args.warm_start and output_datas is not None:
+        controller.set_warm_start_info(output_datas, args.warm_start_fraction)
+        print("Seeding the genetic algorithm with the previous cog array "
+              + "in %s" % previous_output_filename)
+
+    best = None
+    if args.solver == "anneal":
+        start_array = Cog_Array(
+            empties_set, set(), get_excludes_dict(empties_set, cogs))
+        start_acceptance = START_ACCEPTANCE
+        if output_datas is not None:
+            start_array.instantiate_from_output(cogs, output_datas)
+            start_acceptance = WARM_START_ACCEPTANCE
+            print("Annealing from the previous cog array in %s"
+                  % previous_output_filename)
+        else:
+            start_array.instantiate_randomly(cogs)
+        cooling = make_cooling_schedule(
+            args.cooling, start_array, algo_args[4], args.anneal_steps,
+            start_acceptance)
+        best = simulated_annealing(
+            start_array, algo_args[4], args.anneal_steps, cooling)
+    elif args.solver == "exact":
+        best = exact_solve(cogs, empties_set, set(), algo_args[4])
+        if best is None:
+            print("Too large to solve exactly, running the genetic algorithm")
+        elif verbose or debug:
+            print("Solved exactly")
+    if best is None and args.workers > 1:
+        if debug:
+            print("Workers: ", args.workers)
+        best = island_learning_algo(*algo_args, args.workers, args.seed,
+                                    args.migration_interval, args.migrants,
+                                    stats_cache)
+    elif best is None:
+        if args.resume:
+            if controller.checkpointer is not None and controller.checkpointer.exists():
+                print("Resuming from %s" % checkpoint_filename)
+            else:
+                print("No checkpoint found at " + CHECKPOINT_FILENAME
+                      + ", starting from scratch")
+        if args.metrics_file is not None:
+            controller.set_metrics_info(
+                Metrics_Stream(args.metrics_file, append=args.resume))
+        try:
+            best = learning_algo(*algo_args, args.workers, stats_cache)
+        except Checkpoint_Error as err:
+            if debug:
+                raise
+            print(err)
+            return -1
+        finally:
+            if controller.metrics is not None:
+                controller.metrics.close()
+        if controller.checkpointer is not None:
+            if debug:
+                print("Checkpoints: ", controller.checkpointer.num_saves,
+                      " seconds: ", controller.checkpointer.save_time)
+            controller.checkpointer.remove()
+    if debug and stats_cache is not None:
+        print("Stats cache hits: ", stats_cache.num_hits,
+              " misses: ", stats_cache.num_misses)
+    if debug and controller.fitness_cache is not None:
+        print("Fitness cache hits: ", controller.fitness_cache.num_hits,
+              " misses: ", controller.fitness_cache.num_misses)
 
     toc = time.perf_counter()
     if verbose or debug:
@@ -0,0 +1,126 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+import json
+import time
+
+"""
+The breeding schemes counted by `Metrics_Stream', in the order of `Iteration_Controller.breeding_scheme'.
+"""
+BREEDING_SCHEMES = ("cross_breed", "one_point_mutation", "two_point_mutation")
+
+"""
+- A stream of one record per generation of `learning_algo.evolve', for graphing convergence and throughput across runs.
+Each record is a `dict', which is passed to `callback', if given, and written as one line of JSON to `filename', if
+given (appended to it if `append' is `True').
+- A record holds:
+    > `restart', `generation': the numbers printed by `Iteration_Controller', from 0.
+    > `pop_size', `best', `median', `p90': the size of the population and its best, median and 90th percentile
+    objective values, after the cull.
+    > `breedings': how many children each breeding scheme of `BREEDING_SCHEMES' produced.
+    > `evaluations': how many arrays were scored (see `Population.num_evaluations'). With a fitness cache, `cache_hits'
+    and `cache_misses' count its lookups.
+    > `wall', `cpu': the wall clock and CPU seconds spent in each phase of the generation (`"status"' for the status
+    output, `"breed"', `"evaluate"', `"update_strengths"', `"cull"', and `"replace"' in steady state or `"checkpoint"'
+    with a checkpoint), and in total under `"total"'.
+    > `elapsed': the wall clock seconds since the first generation of the stream began.
+- `evolve' marks the phases with `lap'. It only calls into the stream if there is one, so that a run without metrics
+pays nothing but a few `None' checks per generation (per child, in steady state).
+"""
+class Metrics_Stream:
+    def __init__(self, filename=None, callback=None, append=False):
+        self.filename = filename
+        self.callback = callback
+        self.fh = open(filename, "a" if append else "w") if filename is not None else None
+        self.start_time = None
+        self.num_records = 0
+        self._lap_wall = self._lap_cpu = None
+        self._wall = {}
+        self._cpu = {}
+        self._breedings = dict.fromkeys(BREEDING_SCHEMES, 0)
+        self._pop_counters = None
+
+    """
+    Starts the record of a generation of `pop'.
+    """
+    def start_generation(self, pop):
+        self._lap_wall, self._lap_cpu = time.perf_counter(), time.process_time()
+        if self.start_time is None:
+            self.start_time = self._lap_wall
+        self._wall = {}
+        self._cpu = {}
+        self._breedings = dict.fromkeys(BREEDING_SCHEMES, 0)
+        self._pop_counters = self._get_pop_counters(pop)
+
+    """
+    Adds the time since the previous `lap' (or `start_generation') to `phase'.
+    """
+    def lap(self, phase):
+        wall, cpu = time.perf_counter(), time.process_time()
+        self._wall[phase] = self._wall.get(phase, 0.0) + wall - self._lap_wall
+        self._cpu[phase] = self._cpu.get(phase, 0.0) + cpu - self._lap_cpu
+        self._lap_wall, self._lap_cpu = wall, cpu
+
+    """
+    Counts `breedings', the `tuples' returned by `learning_algo.breed'.
+    """
+    def add_breedings(self, breedings):
+        for breeding in breedings:
+            self._breedings[breeding[0]] += 1
+
+    """
+    Finishes the record of the generation, and passes it on. Returns it.
+    """
+    def end_generation(self, controller, pop):
+        self._wall["total"] = sum(self._wall.values())
+        self._cpu["total"] = sum(self._cpu.values())
+        evaluations, cache_hits, cache_misses = [
+            after - before for after, before in zip(self._get_pop_counters(pop), self._pop_counters)
+        ]
+        record = {
+            "restart": controller.restart_count - 1,
+            "generation": controller.generation_count - 1,
+            "pop_size": pop.get_size(),
+            "best": pop.get_best()[1],
+            "median": pop.get_percentile(0.50)[1],
+            "p90": pop.get_percentile(0.90)[1],
+            "breedings": self._breedings,
+            "evaluations": evaluations,
+            "wall": self._wall,
+            "cpu": self._cpu,
+            "elapsed": time.perf_counter() - self.start_time
+        }
+        if pop.fitness_cache is not None:
+            record["cache_hits"] = cache_hits
+            record["cache_misses"] = cache_misses
+        if self.callback is not None:
+            self.callback(record)
+        if self.fh is not None:
+            self.fh.write(json.dumps(record) + "\n")
+            self.fh.flush()
+        self.num_records += 1
+        return record
+
+    def close(self):
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
+        return self
+
+    @staticmethod
+    def _get_pop_counters(pop):
+        if pop.fitness_cache is None:
+            return pop.num_evaluations, 0, 0
+        return pop.num_evaluations, pop.fitness_cache.num_hits, pop.fitness_cache.num_misses
@@ -0,0 +1,131 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+STATS_CACHE_FILENAME = "cog_stats_cache.npz"
+
+"""
+- Bump this whenever `Cog.get_average_std_obj' changes in a way that makes previously cached statistics wrong. Files
+written with any other version are ignored.
+"""
+STATS_CACHE_VERSION = 1
+
+"""
+- The attributes of a cog that are not part of its stats.
+"""
+_NON_STAT_ATTRS = ("strengths", "strength_start_value", "average_obj", "_average_obj", "std_obj", "name")
+
+"""
+- A persistent cache of the warm-up statistics `(cog.average_obj, cog.std_obj)', keyed by `get_key'.
+- The cache lives in memory and is only written to `filename' by `save'. The file is a `numpy' `.npz' archive of three
+parallel arrays: the 64-bit keys, the statistics and the run in which each entry was last used.
+- A missing, unreadable or outdated (see `STATS_CACHE_VERSION') file is treated as an empty cache.
+- At most `max_entries' entries are saved. If there are more, the least recently used ones are dropped.
+"""
+class Stats_Cache:
+    def __init__(self, filename, max_entries=4096):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.run = 0
+        self.entries = {}
+        self.num_hits = 0
+        self.num_misses = 0
+        self.load()
+
+    """
+    - Reads `filename', replacing the entries in memory.
+    """
+    def load(self):
+        self.entries = {}
+        self.run = 0
+        try:
+            with np.load(self.filename) as data:
+                if int(data["version"]) != STATS_CACHE_VERSION:
+                    return self
+                keys, stats, last_used = data["keys"], data["stats"], data["last_used"]
+        except (OSError, KeyError, ValueError):
+            return self
+        for key, (average_obj, std_obj), run in zip(keys.tolist(), stats, last_used.tolist()):
+            self.entries[key] = (average_obj, std_obj, run)
+        self.run = max(last_used.tolist(), default=0) + 1
+        return self
+
+    """
+    - Writes the (at most `max_entries' most recently used) entries to `filename'. The file is replaced atomically.
+    """
+    def save(self):
+        items = sorted(self.entries.items(), key=lambda item: item[1][2], reverse=True)[:self.max_entries]
+        keys = np.array([key for key, _ in items], dtype=np.uint64)
+        stats = np.array([entry[:2] for _, entry in items], dtype=np.float64).reshape(-1, 2)
+        last_used = np.array([entry[2] for _, entry in items], dtype=np.uint64)
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "wb") as fh:
+            np.savez(fh, version=STATS_CACHE_VERSION, keys=keys, stats=stats, last_used=last_used)
+        os.replace(tmp_filename, self.filename)
+        return self
+
+    """
+    - Removes every entry, both from memory and from disk.
+    """
+    def clear(self):
+        self.entries = {}
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+        return self
+
+    """
+    - Returns the cached `(average_obj, std_obj)' of `key', or `None' if there is none.
+    """
+    def get(self, key):
+        if key is None or key not in self.entries:
+            self.num_misses += 1
+            return None
+        self.num_hits += 1
+        average_obj, std_obj, _ = self.entries[key]
+        self.entries[key] = (average_obj, std_obj, self.run)
+        return average_obj, std_obj
+
+    def put(self, key, average_obj, std_obj):
+        if key is not None:
+            self.entries[key] = (average_obj, std_obj, self.run)
+
+    """
+    - Returns a 64-bit key for the warm-up statistics of `cog' in a `Cog_Array' with `empties_set' and `flaggies', scored
+    by `obj_fxn'.
+    - The key hashes the type and stats of `cog', the non-empty coordinates, the flaggies, the name of the fitness
+    function and the weights. The rest of the inventory is not part of the key, so changing one cog only invalidates the
+    statistics of that cog.
+    - Returns `None' if `obj_fxn' does not name its fitness function and weights (see
+    `fitness_functions.Weighted_Obj_Fxn'); such statistics are not cached.
+    """
+    @staticmethod
+    def get_key(cog, empties_set, flaggies, obj_fxn):
+        fitness_fn = getattr(obj_fxn, "fitness_fn", None)
+        if fitness_fn is None:
+            return None
+        stats = sorted((attr, value) for attr, value in vars(cog).items() if attr not in _NON_STAT_ATTRS)
+        description = repr((
+            cog.__class__.__name__,
+            stats,
+            [(coords.x, coords.y) for coords in empties_set.coords_list],
+            sorted((coords.x, coords.y) for coords in (flaggies or ())),
+            fitness_fn.__name__,
+            (obj_fxn.build_weight, obj_fxn.flaggy_weight, obj_fxn.exp_weight)
+        ))
+        return int.from_bytes(hashlib.blake2b(description.encode(), digest_size=8).digest(), "little")
@@ -0,0 +1,89 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from checkpoint import Checkpoint_Error, Checkpointer
+from cog_array_stuff import Empties_Set
+from cog_factory import cog_factory
+from file_readers import read_cog_datas, read_empties_datas
+from fitness_functions import Weighted_Obj_Fxn, standard_obj_fxn
+from learning_algo import Iteration_Controller, evolve, get_average_std_objs
+
+
+class Test_Checkpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.empties_set = Empties_Set(read_empties_datas("empties_datas_static1.csv"))
+        self.flaggies = set(self.empties_set.coords_list[:2])
+        self.obj_fxn = Weighted_Obj_Fxn(standard_obj_fxn, 0.2, 0.3, 0.5)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, "checkpoint.npz")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_evolve(self, checkpoint_filename=None, resume=False, max_yields=None, generation_info=(3, 6, 10, 0.01)):
+        cogs = cog_factory(read_cog_datas("cog_datas_static1.csv"))
+        controller = (Iteration_Controller()
+            .set_restart_info(2)
+            .set_generation_info(*generation_info)
+            .set_mutation_info(20)
+            .set_breeding_scheme_info(0.5, 0.25, 0.25)
+            .set_fitness_cache_info(1000)
+            .set_cull_info(True)
+            .set_checkpoint_info(checkpoint_filename, 0.0, resume))
+        random.seed(21 if not resume else 22)
+        if resume:
+            average_std_objs = controller.checkpointer.load_average_std_objs(cogs)
+        else:
+            average_std_objs = get_average_std_objs(cogs, self.empties_set, self.flaggies, self.obj_fxn)
+        obj_fxns = [Weighted_Obj_Fxn(standard_obj_fxn, *weights) for weights in [(0.2, 0, 0), (0, 0.3, 0), (0, 0, 0.5)]]
+        evolution = evolve(
+            cogs, self.empties_set, self.flaggies, 30, self.obj_fxn, 2, 4, 16, controller, *obj_fxns, average_std_objs
+        )
+        history = []
+        while max_yields is None or len(history) < max_yields:
+            try:
+                pop = next(evolution)
+            except StopIteration as stop:
+                best_array, best_value = stop.value
+                return history, best_array.csv_record(), best_value, random.getstate()
+            history.append(pop.values.tolist())
+        return history, None, None, None
+
+    def test_resume_matches_uninterrupted_run(self):
+        history, best_record, best_value, state = self.run_evolve()
+        self.assertGreater(len(history), 8)
+        for max_yields in [3, len(history) - 2]:
+            with mock.patch("checkpoint.MAX_CHECKPOINT_COST", 1.0):
+                interrupted = self.run_evolve(self.filename, max_yields=max_yields)[0]
+            self.assertEqual(interrupted, history[:max_yields])
+            resumed_history, resumed_record, resumed_value, resumed_state = self.run_evolve(self.filename, resume=True)
+            self.assertGreaterEqual(len(resumed_history), len(history) - max_yields)
+            self.assertLess(len(resumed_history), len(history))
+            self.assertEqual(resumed_history, history[len(history) - len(resumed_history):])
+            self.assertEqual((resumed_record, resumed_value, resumed_state), (best_record, best_value, state))
+
+    def test_resume_keeps_running_total(self):
+        generation_info = (1, 40, 3, 0.05)
+        history, best_record, best_value, state = self.run_evolve(generation_info=generation_info)
+        self.assertLess(len(history), 2 * 40)
+        for max_yields in [14, 20]:
+            with mock.patch("checkpoint.MAX_CHECKPOINT_COST", 1.0):
+                self.run_evolve(self.filename, max_yields=max_yields, generation_info=generation_info)
+            resumed = self.run_evolve(self.filename, resume=True, generation_info=generation_info)
+            self.assertEqual(resumed[0], history[len(history) - len(resumed[0]):])
+            self.assertEqual(resumed[1:], (best_record, best_value, state))
+
+    def test_load_rejects_other_cogs(self):
+        with mock.patch("checkpoint.MAX_CHECKPOINT_COST", 1.0):
+            self.run_evolve(self.filename, max_yields=3)
+        cogs = cog_factory(read_cog_datas("cog_datas_static2.csv"))
+        with self.assertRaises(Checkpoint_Error):
+            Checkpointer(self.filename).load_average_std_objs(cogs)
+        with open(self.filename, "wb") as fh:
+            fh.write(b"not a checkpoint")
+        with self.assertRaises(Checkpoint_Error):
+            Checkpointer(self.filename).load_average_std_objs(cogs)
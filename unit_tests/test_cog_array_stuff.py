@@ -1,7 +1,67 @@
+import copy
+import pickle
+import random
 import unittest
+from collections import Counter
+from unittest import mock
 
-from cog_array_stuff import Cog_Array, Empties_Set
+import numpy as np
+
+from cog_array_stuff import (
+    Cog_Array, Coords_Iter, Empties_Set, cross_breed_genomes, get_excludes_dict, get_placement_hashes, stack_genomes
+)
+from cog_factory import cog_factory
+from cog_registry import _cog_registry
+from cog_types import Boost_Cog, Yang_Cog
 from file_readers import read_cog_datas, read_empties_datas
+from fitness_functions import Weighted_Obj_Fxn, standard_obj_fxn
+from learning_algo import Iteration_Controller, evolve, get_average_std_objs
+
+
+def random_cog_array(empties_set, cogs, flaggies=None):
+    cog_array = Cog_Array(empties_set, flaggies).extend_spares(cogs)
+    shuffled = random.sample(cogs, len(cogs))
+    for coords, cog in zip(Coords_Iter(cog_array), shuffled):
+        cog_array.move_cog_from_spares(coords, cog)
+    return cog_array
+
+"""
+The slots of a child of `self.cross_breed(other)', decided one slot at a time in a random order, as a reference for the
+bulk `cross_breed_genomes'.
+"""
+def sequential_cross_breed(self, other):
+    n = self.num_slots
+    flat_indices = self.empties_set.flat_indices
+    self_slots, other_slots = self.get_slot_indices(), other.get_slot_indices()
+    self_strengths = np.where(self_slots >= 0, _cog_registry.get_weighted_strengths(self_slots, flat_indices), 0.0)
+    other_strengths = np.where(other_slots >= 0, _cog_registry.get_weighted_strengths(other_slots, flat_indices), 0.0)
+    spares = [index for index in self.genome[:n + self.num_spares].tolist() if index >= 0]
+    slots = [-1] * n
+    for s in random.sample(range(n), n):
+        total = self_strengths[s] + other_strengths[s]
+        if total > 0 and random.uniform(0, 1) <= self_strengths[s] / total:
+            first, second = int(self_slots[s]), int(other_slots[s])
+        else:
+            first, second = int(other_slots[s]), int(self_slots[s])
+        if first in spares:
+            index = first
+        elif second in spares:
+            index = second
+        else:
+            index = spares[self._pick_spare(s, spares)]
+        spares.remove(index)
+        slots[s] = index
+    return np.array(slots)
+
+"""
+The mean over the slots of the total variation distance between the cogs on that slot in two samples of slot matrices.
+"""
+def mean_slot_distance(slots1, slots2):
+    distances = []
+    for column1, column2 in zip(slots1.T.tolist(), slots2.T.tolist()):
+        counts1, counts2 = Counter(column1), Counter(column2)
+        distances.append(sum(abs(counts1[index] - counts2[index]) for index in counts1.keys() | counts2.keys()))
+    return np.mean(distances) / (2 * len(slots1))
 
 
 class Test_Cog_Array(unittest.TestCase):
@@ -15,6 +75,7 @@ class Test_Cog_Array(unittest.TestCase):
         ]
 
         self.cog_datas_static = [read_cog_datas(filename) for filename in self.cog_datas_static_filenames]
+        self.cogs_static = [cog_factory(cog_data) for cog_data in self.cog_datas_static]
 
         self.empties_datas_static_filenames = [
             "empties_datas_static1.csv",
@@ -43,29 +104,278 @@ class Test_Cog_Array(unittest.TestCase):
                 with self.assertRaises(RuntimeError):
                     cog_array2.instantiate_randomly(cog_data)
 
+    def test_instantiate_from_output(self):
+        random.seed(10)
+        cogs, empties_set = self.cogs_static[0], self.empties_datas_static[0]
+        cog_array = random_cog_array(empties_set, cogs)
+        output_datas = [{"coords": coords, "record": cog.csv_record()} for coords, cog in cog_array]
+        for start in [0, 1]:
+            new_array = Cog_Array(empties_set).instantiate_from_output(cogs, output_datas[start:])
+            self.assertEqual(new_array.get_num_occupied(), cog_array.get_num_occupied())
+            self.assertEqual(set(cog for _, cog in new_array) | set(new_array.spares), set(cogs))
+            for output_data in output_datas[start:]:
+                self.assertEqual(new_array[output_data["coords"]].csv_record(), output_data["record"])
+        with self.assertRaises(RuntimeError):
+            new_array.instantiate_from_output(cogs, output_datas)
+
     def test_get_random_coords(self):
         assert False
 
     def test_cross_breed(self):
-        assert False
+        random.seed(5)
+        for cogs,empties_set in zip(self.cogs_static,self.empties_datas_static):
+            if len(cogs) < len(empties_set.coords_list):
+                continue
+            parent1 = random_cog_array(empties_set, cogs)
+            parent2 = random_cog_array(empties_set, cogs)
+            for cog in cogs:
+                cog.instantiate_strengths(parent1)
+                cog.average_obj = 1.0
+            genome1, genome2 = parent1.genome.copy(), parent2.genome.copy()
+            child = parent1.cross_breed(parent2)
+            self.assertTrue((parent1.genome == genome1).all())
+            self.assertTrue((parent2.genome == genome2).all())
+            placed = [cog for _,cog in child if cog is not None]
+            self.assertEqual(len(placed), len(set(placed)))
+            self.assertEqual(set(placed) | set(child.spares), set(cogs))
+            self.assertEqual(child.get_num_occupied(), len(placed))
+            self.assertEqual(child.get_num_spares(), len(cogs) - len(placed))
+            for coords,cog in child:
+                self.assertTrue(cog is None or cog is parent1[coords] or cog is parent2[coords] or
+                                (parent1[coords] in placed and parent2[coords] in placed))
+            self.assertEqual(parent1.cross_breed(parent1), parent1)
+
+    def test_cross_breed_genomes(self):
+        random.seed(9)
+        cogs, empties_set = self.cogs_static[0], self.empties_datas_static[0]
+        parents = [random_cog_array(empties_set, cogs) for _ in range(6)]
+        for cog in cogs:
+            cog.instantiate_strengths(parents[0])
+            cog.average_obj = 1.0
+        genomes = stack_genomes(parents)
+        pairs = [(0, 1), (1, 0), (2, 2), (3, 5), (5, 4)]
+        children = cross_breed_genomes(parents[0], genomes, pairs)
+        self.assertEqual(children.shape, (len(pairs), genomes.shape[1]))
+        for genome, (i, j) in zip(children, pairs):
+            child = parents[0].from_genome(genome)
+            self.assertEqual(sorted(genome[genome >= 0].tolist()), sorted(genomes[i][genomes[i] >= 0].tolist()))
+            self.assertEqual(child.get_num_occupied(), len(empties_set.coords_list))
+            self.assertEqual(child.get_num_spares(), len(cogs) - len(empties_set.coords_list))
+            if i == j:
+                self.assertEqual(child, parents[i])
+
+    def test_cross_breed_genomes_distribution(self):
+        random.seed(13)
+        cogs, empties_set = self.cogs_static[0], self.empties_datas_static[0]
+        excludes_dict = get_excludes_dict(empties_set, cogs)
+        unrelated = Cog_Array(empties_set, None, excludes_dict).instantiate_randomly(cogs)
+        parent = Cog_Array(empties_set, None, excludes_dict).instantiate_randomly(cogs)
+        related = parent
+        for _ in range(10):
+            related = related.one_point_mutation()[0]
+        partial = Cog_Array(empties_set, None, excludes_dict).instantiate_randomly(cogs)
+        for coords in random.sample(empties_set.coords_list, 10):
+            partial.move_cog_to_spares(coords)
+        for cog in cogs:
+            cog.instantiate_strengths(parent)
+            cog.average_obj = random.uniform(0.5, 2.0)
+        parents = [parent, unrelated, related, partial]
+        genomes = stack_genomes(parents)
+        n, num_children = parent.num_slots, 1000
+        for i, j in [(0, 1), (0, 2), (3, 1), (1, 3)]:
+            children = cross_breed_genomes(parent, genomes, [(i, j)] * num_children)[:, :n]
+            references = [
+                np.array([sequential_cross_breed(parents[i], parents[j]) for _ in range(num_children)])
+                for _ in range(2)
+            ]
+            noise = mean_slot_distance(*references)
+            self.assertLess(mean_slot_distance(children, references[0]), 1.25 * noise + 0.005)
+        random.seed(14)
+        children = cross_breed_genomes(parent, genomes, [(3, 1)])
+        random.seed(14)
+        with mock.patch("cog_array_stuff.MIN_BULK_CHILDREN", 1):
+            self.assertEqual(children.tolist(), cross_breed_genomes(parent, genomes, [(3, 1)]).tolist())
+        partial.cross_breed(unrelated)
+        next(cog for _, cog in unrelated if cog is not None).average_obj = None
+        with self.assertRaises(RuntimeError):
+            partial.cross_breed(unrelated)
 
     def test_one_point_mutation(self):
-        assert False
+        random.seed(3)
+        for cogs,empties_set in zip(self.cogs_static,self.empties_datas_static):
+            parent = random_cog_array(empties_set, cogs)
+            if parent.get_num_spares() == 0 or parent.get_num_occupied() == 0:
+                continue
+            genome = parent.genome.copy()
+            child, coords, old_cog = parent.one_point_mutation()
+            self.assertTrue(child.is_spare(old_cog))
+            self.assertFalse(parent.is_spare(parent[coords]))
+            self.assertIs(parent[coords], old_cog)
+            self.assertTrue((parent.genome == genome).all())
+            self.assertEqual(child.get_num_occupied(), parent.get_num_occupied())
+            self.assertEqual(child.get_num_spares(), parent.get_num_spares())
 
     def test_two_point_mutation(self):
-        assert False
+        random.seed(1)
+        for cogs,empties_set in zip(self.cogs_static,self.empties_datas_static):
+            if len(cogs) < 2 or len(empties_set.coords_list) < 2:
+                continue
+            parent = random_cog_array(empties_set, cogs)
+            parent.get_build_rate(), parent.get_flaggy_rate(), parent.get_total_exp_mult()
+            for _ in range(50):
+                child, coords1, coords2 = parent.two_point_mutation()
+                self.assertIs(child[coords1], parent[coords2])
+                self.assertIs(child[coords2], parent[coords1])
+                self.assertTrue(child.has_rates())
+                fresh = copy.copy(child)
+                self.assertAlmostEqual(child.get_build_rate(), fresh.get_build_rate(), places=8)
+                self.assertAlmostEqual(child.get_flaggy_rate(), fresh.get_flaggy_rate(), places=8)
+                self.assertAlmostEqual(child.get_total_exp_mult(), fresh.get_total_exp_mult(), places=8)
+                parent = child
+
+    def test_derive_rates(self):
+        random.seed(2)
+        def assert_fresh_rates(cog_array):
+            fresh = copy.copy(cog_array)
+            self.assertEqual(fresh.flaggies, cog_array.flaggies)
+            self.assertAlmostEqual(cog_array.get_build_rate(), fresh.get_build_rate(), places=8)
+            self.assertAlmostEqual(cog_array.get_flaggy_rate(), fresh.get_flaggy_rate(), places=8)
+            self.assertAlmostEqual(cog_array.get_total_exp_mult(), fresh.get_total_exp_mult(), places=8)
+        for cogs,empties_set in zip(self.cogs_static,self.empties_datas_static):
+            flaggies = list(empties_set.empties)[:3] + empties_set.coords_list[::3]
+            parent = random_cog_array(empties_set, cogs, flaggies)
+            if parent.get_num_spares() == 0 or parent.get_num_occupied() == 0:
+                continue
+            parent.get_build_rate(), parent.get_flaggy_rate(), parent.get_total_exp_mult()
+            for _ in range(20):
+                assert_fresh_rates(parent.one_point_mutation()[0])
+                assert_fresh_rates(parent.two_point_mutation()[0])
+            for _ in range(50):
+                child = copy.copy(parent)
+                coords = child.get_random_coords()
+                old_cog = child[coords]
+                child.move_cog_from_spares(coords, random.choice(list(child.spares)))
+                child.derive_rates(parent, [coords])
+                self.assertIsNot(child[coords], old_cog)
+                self.assertTrue(child.has_rates())
+                assert_fresh_rates(child)
+                parent = child
+        cogs = cog_factory(read_cog_datas("cog_datas_static1.csv"))
+        empties_set = Empties_Set(read_empties_datas("empties_datas_static1.csv"))
+        flaggies = set(empties_set.coords_list[::2])
+        obj_fxn = Weighted_Obj_Fxn(standard_obj_fxn, 0.2, 0.3, 0.5)
+        controller = (Iteration_Controller()
+            .set_restart_info(1)
+            .set_generation_info(3, 3, 10, 0.01)
+            .set_mutation_info(20)
+            .set_breeding_scheme_info(0.5, 0.25, 0.25))
+        average_std_objs = get_average_std_objs(cogs, empties_set, flaggies, obj_fxn)
+        obj_fxns = [Weighted_Obj_Fxn(standard_obj_fxn, *weights) for weights in [(0.2, 0, 0), (0, 0.3, 0), (0, 0, 0.5)]]
+        evolution = evolve(
+            cogs, empties_set, flaggies, 30, obj_fxn, 2, 4, 16, controller, *obj_fxns, average_std_objs
+        )
+        for pop in evolution:
+            for cog_array in pop.arrays:
+                self.assertEqual(cog_array.flaggies, flaggies)
+                assert_fresh_rates(cog_array)
+                assert_fresh_rates(cog_array.one_point_mutation()[0])
+                assert_fresh_rates(cog_array.two_point_mutation()[0])
+
+    def test_get_placement_hash(self):
+        random.seed(11)
+        cogs, empties_set = self.cogs_static[0], self.empties_datas_static[0]
+        def fresh_hash(cog_array):
+            return Cog_Array(empties_set).instantiate_from_array(cog_array.array).get_placement_hash()
+        cog_array = random_cog_array(empties_set, cogs)
+        self.assertEqual(cog_array.get_placement_hash(), fresh_hash(cog_array))
+        self.assertEqual(Cog_Array(empties_set).extend_spares(cogs).get_placement_hash(), 0)
+        coords_list = empties_set.coords_list
+        for _ in range(50):
+            coords = random.choice(coords_list)
+            if random.random() < 0.3:
+                cog_array.move_cog_to_spares(coords)
+            else:
+                cog_array.move_cog_from_spares(coords, random.choice(list(cog_array.spares)))
+            self.assertEqual(cog_array.get_placement_hash(), fresh_hash(cog_array))
+        children = [cog_array.one_point_mutation()[0] for _ in range(5)] + [cog_array.two_point_mutation()[0] for _ in range(5)]
+        self.assertEqual(get_placement_hashes(children), [fresh_hash(child) for child in children])
+        twins = {}
+        for cog in cogs:
+            twins.setdefault(cog.csv_record(), []).append(cog)
+        cog1, cog2 = next(same for same in twins.values() if len(same) > 1)[:2]
+        cog_array = Cog_Array(empties_set).extend_spares(cogs)
+        cog_array.move_cog_from_spares(coords_list[0], cog1)
+        twin_array = Cog_Array(empties_set).extend_spares(cogs)
+        twin_array.move_cog_from_spares(coords_list[0], cog2)
+        self.assertEqual(cog_array.get_placement_hash(), twin_array.get_placement_hash())
+        twin_array.move_cog_from_spares(coords_list[1], cog1)
+        self.assertNotEqual(cog_array.get_placement_hash(), twin_array.get_placement_hash())
 
     def test_move_cog_from_spares(self):
         assert False
 
     def test_move_random_cog_from_spares(self):
-        assert False
+        random.seed(6)
+        cogs, empties_set = self.cogs_static[0], self.empties_datas_static[0]
+        coords = empties_set.coords_list[0]
+        excluded = set(type(cog) for cog in cogs if isinstance(cog, Boost_Cog)) - {Yang_Cog}
+        excludes_dict = {cog_type: {coords} for cog_type in excluded}
+        for _ in range(20):
+            cog_array = Cog_Array(empties_set, None, excludes_dict).extend_spares(cogs)
+            cog = cog_array.move_random_cog_from_spares(coords)
+            self.assertIs(cog_array[coords], cog)
+            self.assertFalse(cog_array.is_spare(cog))
+            self.assertFalse(cog_array.excludes(coords, cog))
+            self.assertEqual(cog_array.get_num_spares(), len(cogs) - 1)
+        boost_cogs = [cog for cog in cogs if type(cog) in excluded]
+        cog_array = Cog_Array(empties_set, None, excludes_dict).extend_spares(boost_cogs)
+        self.assertIn(cog_array.move_random_cog_from_spares(coords), boost_cogs)
+
+    def test_spare_positions(self):
+        random.seed(8)
+        cogs, empties_set = self.cogs_static[0], self.empties_datas_static[0]
+        cog_array = Cog_Array(empties_set).extend_spares(cogs).extend_spares(cogs[:10])
+        self.assertEqual(list(cog_array.spares), cogs)
+        for _ in range(300):
+            coords = random.choice(empties_set.coords_list)
+            r = random.random()
+            if r < 0.3:
+                cog_array.move_cog_to_spares(coords)
+            elif r < 0.6 and cog_array.get_num_spares() > 0:
+                cog_array.move_cog_from_spares(coords, random.choice(list(cog_array.spares)))
+            elif r < 0.9 and cog_array.get_num_spares() > 0:
+                cog_array.move_random_cog_from_spares(coords)
+            else:
+                cog_array = copy.copy(cog_array)
+            spares = list(cog_array.spares)
+            for cog in cogs:
+                self.assertEqual(cog_array._find_spare(cog), spares.index(cog) if cog in spares else -1)
+            self.assertEqual(cog_array.get_num_occupied(), sum(cog is not None for _, cog in cog_array))
+            fresh = Cog_Array(empties_set).instantiate_from_array(cog_array.array)
+            self.assertEqual(cog_array.get_placement_hash(), fresh.get_placement_hash())
 
     def test_move_cog_to_spares(self):
         assert False
 
     def test_move_all_to_spares(self):
-        assert False
+        for cogs,empties_set in zip(self.cogs_static,self.empties_datas_static):
+            cog_array = random_cog_array(empties_set, cogs).move_all_to_spares()
+            self.assertEqual(cog_array.get_num_occupied(), 0)
+            self.assertEqual(cog_array.get_num_spares(), len(cogs))
+            self.assertEqual(set(cog_array.spares), set(cogs))
+            self.assertTrue(all(cog is None for _,cog in cog_array))
+
+    def test_copy_and_pickle(self):
+        random.seed(4)
+        for cogs,empties_set in zip(self.cogs_static,self.empties_datas_static):
+            cog_array = random_cog_array(empties_set, cogs)
+            copied = copy.copy(cog_array)
+            self.assertEqual(copied, cog_array)
+            self.assertIsNot(copied.genome, cog_array.genome)
+            unpickled = pickle.loads(pickle.dumps(cog_array))
+            self.assertEqual(unpickled.get_num_occupied(), cog_array.get_num_occupied())
+            self.assertEqual(unpickled.get_num_spares(), cog_array.get_num_spares())
+            self.assertEqual(unpickled.get_build_rate(), cog_array.get_build_rate())
 
     def test_add_spare(self):
         assert False
@@ -0,0 +1,43 @@
+import random
+import unittest
+
+import numpy as np
+
+from cog_array_stuff import Cog_Array, Empties_Set
+from cog_factory import cog_factory
+from cog_registry import _cog_registry
+from file_readers import read_cog_datas, read_empties_datas
+
+
+class Test_Cog_Registry(unittest.TestCase):
+
+    def setUp(self):
+        self.cogs = cog_factory(read_cog_datas("cog_datas_static1.csv"))
+        self.cog_array = Cog_Array(Empties_Set(read_empties_datas("empties_datas_static1.csv")))
+        for cog in self.cogs:
+            cog.instantiate_strengths(self.cog_array)
+
+    def test_update_strength_matches_dense_renormalization(self):
+        random.seed(7)
+        coords_list = self.cog_array.empties_set.coords_list
+        for cog in self.cogs[:5]:
+            expected = cog.strengths.copy()
+            for _ in range(500):
+                coords = random.choice(coords_list)
+                factor = random.uniform(0.2, 5)
+                cog.update_strength(coords, factor, 4, 16)
+                factor = min(max(factor, 1/4), 4)
+                max_str = 16 * cog.strength_start_value
+                min_str = cog.strength_start_value / 16
+                expected[coords.x, coords.y] = min(max(expected[coords.x, coords.y] * factor, min_str), max_str)
+                expected /= np.sum(expected)
+            self.assertTrue(np.allclose(cog.strengths, expected, rtol=1e-9, atol=0))
+            self.assertAlmostEqual(np.sum(cog.strengths), 1.0, places=12)
+
+    def test_get_strengths_gathers_a_whole_layout(self):
+        random.seed(8)
+        cog_array = self.cog_array.extend_spares(self.cogs).randomize()
+        for cog in self.cogs:
+            cog.update_strength(random.choice(cog_array.empties_set.coords_list), random.uniform(0.5, 2))
+        strengths = _cog_registry.get_strengths(cog_array.get_slot_indices(), cog_array.empties_set.flat_indices)
+        self.assertEqual(strengths.tolist(), [cog.get_strength(coords) for coords, cog in cog_array])
@@ -0,0 +1,33 @@
+import copy
+import pickle
+import unittest
+
+from constants import NUM_COGS_HORI, NUM_COGS_VERT
+from coords import Coords
+
+
+class Test_Coords(unittest.TestCase):
+
+    def test_in_bounds_coords_are_interned(self):
+        for x in range(NUM_COGS_HORI):
+            for y in range(NUM_COGS_VERT):
+                coords = Coords(x, y)
+                self.assertIs(Coords(x, y), coords)
+                self.assertIs(copy.copy(coords), coords)
+                self.assertIs(pickle.loads(pickle.dumps(coords)), coords)
+                self.assertEqual((coords.x, coords.y), (x, y))
+                self.assertFalse(coords.is_out_of_bounds())
+
+    def test_out_of_bounds_coords(self):
+        coords = Coords(NUM_COGS_HORI - 1, 0) + Coords(1, -1)
+        self.assertTrue(coords.is_out_of_bounds())
+        self.assertEqual(coords, Coords(NUM_COGS_HORI, -1))
+        self.assertEqual(hash(coords), hash(Coords(NUM_COGS_HORI, -1)))
+        self.assertEqual(pickle.loads(pickle.dumps(coords)), coords)
+
+    def test_hash_and_arithmetic(self):
+        self.assertEqual(hash(Coords(3, 4)), hash((3, 4)))
+        self.assertIs(Coords(3, 4) + Coords(1, 1), Coords(4, 5))
+        self.assertIs(Coords(3, 4) - Coords(1, 1), Coords(2, 3))
+        self.assertNotEqual(Coords(3, 4), Coords(4, 3))
+        self.assertIn(Coords(2, 2), {Coords(2, 2)})
@@ -0,0 +1,56 @@
+import itertools
+import random
+import unittest
+
+from cog_array_stuff import Cog_Array, Empties_Set
+from cog_factory import cog_factory
+from constants import NUM_COGS_HORI, NUM_COGS_VERT
+from coords import Coords
+from exact_solver import EXACT_MAX_SLOTS, exact_solve
+from file_readers import read_cog_datas
+from fitness_functions import Weighted_Obj_Fxn, standard_obj_fxn
+
+
+def small_empties_set(num_slots, width=3):
+    slots = set(Coords(3 + i % width, 2 + i // width) for i in range(num_slots))
+    return Empties_Set(set(Coords(x, y) for x in range(NUM_COGS_HORI) for y in range(NUM_COGS_VERT)) - slots)
+
+
+def brute_force(cogs, empties_set, flaggies, obj_fxn):
+    best = None
+    pool = cogs + [None] * max(0, len(empties_set.coords_list) - len(cogs))
+    for perm in set(itertools.permutations(pool, len(empties_set.coords_list))):
+        cog_array = Cog_Array(empties_set, flaggies).extend_spares(cogs)
+        for coords, cog in zip(empties_set.coords_list, perm):
+            if cog is not None:
+                cog_array.move_cog_from_spares(coords, cog)
+        value = obj_fxn(cog_array)
+        if best is None or value > best:
+            best = value
+    return best
+
+
+class Test_Exact_Solver(unittest.TestCase):
+
+    def setUp(self):
+        self.cogs = cog_factory(read_cog_datas("cog_datas_static1.csv"))
+        self.obj_fxn = Weighted_Obj_Fxn(standard_obj_fxn, 0.2, 0.3, 0.5)
+
+    def test_exact_solve_matches_brute_force(self):
+        random.seed(11)
+        for num_slots, num_cogs, num_flaggies in [(5, 7, 0), (6, 6, 2), (6, 4, 0), (4, 6, 3)]:
+            cogs = random.sample(self.cogs, num_cogs)
+            empties_set = small_empties_set(num_slots)
+            flaggies = set(sorted(empties_set.empties, key=lambda c: (abs(c.x - 4) + abs(c.y - 3), c.x, c.y))[:num_flaggies])
+            cog_array, value = exact_solve(cogs, empties_set, flaggies, self.obj_fxn)
+            self.assertAlmostEqual(value, brute_force(cogs, empties_set, flaggies, self.obj_fxn), places=9)
+            self.assertAlmostEqual(value, self.obj_fxn(cog_array), places=9)
+            placed = [cog for _, cog in cog_array if cog is not None]
+            self.assertEqual(len(placed), min(num_slots, num_cogs))
+            self.assertEqual(set(placed) | set(cog_array.spares), set(cogs))
+
+    def test_exact_solve_gives_up(self):
+        empties_set = small_empties_set(EXACT_MAX_SLOTS + 1, 6)
+        self.assertIsNone(exact_solve(self.cogs, empties_set, set(), self.obj_fxn))
+        empties_set = small_empties_set(8)
+        self.assertIsNone(exact_solve(self.cogs, empties_set, set(), self.obj_fxn, max_nodes=1))
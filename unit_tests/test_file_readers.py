@@ -1,7 +1,12 @@
+import os
+import random
+import tempfile
 import unittest
 
+from cog_array_stuff import Cog_Array, Empties_Set
+from cog_factory import cog_factory
 from coords import Coords
-from file_readers import read_cog_datas, read_empties_datas, Cog_Data_File_Error
+from file_readers import read_cog_datas, read_empties_datas, read_output_datas, Cog_Data_File_Error
 
 
 class Test_File_Readers(unittest.TestCase):
@@ -220,3 +225,22 @@ class Test_File_Readers(unittest.TestCase):
         for filename in self.empties_datas_with_errors_static_filenames:
             with self.assertRaises(Cog_Data_File_Error):
                 read_empties_datas(filename)
+
+    def test_read_output_datas(self):
+        random.seed(10)
+        cogs = cog_factory(self.cog_datas_static[0])
+        cog_array = Cog_Array(Empties_Set(self.empties_datas_static[0])).instantiate_randomly(cogs)
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, "output.csv")
+            with open(filename, "w") as fh:
+                fh.write(cog_array.csv_record())
+            output_datas = read_output_datas(filename)
+            self.assertEqual(
+                output_datas,
+                [{"coords": coords, "record": cog.csv_record()} for coords, cog in cog_array] +
+                [{"coords": None, "record": cog.csv_record()} for cog in cog_array.spares]
+            )
+            with open(filename, "w") as fh:
+                fh.write(cog_array.csv_record().replace("\n1,", "\n1,%d," % 99, 1))
+            with self.assertRaises(Cog_Data_File_Error):
+                read_output_datas(filename)
@@ -0,0 +1,21 @@
+import unittest
+
+from fitness_cache import Fitness_Cache
+
+
+class Test_Fitness_Cache(unittest.TestCase):
+
+    def test_least_recently_used_entry_is_dropped(self):
+        fitness_cache = Fitness_Cache(2)
+        fitness_cache.put(1, 10.0, None)
+        fitness_cache.put(2, 20.0, None)
+        self.assertEqual(fitness_cache.get(1), (10.0, None))
+        fitness_cache.put(3, 30.0, None)
+        self.assertIsNone(fitness_cache.get(2))
+        self.assertEqual(fitness_cache.get(3), (30.0, None))
+        self.assertEqual(len(fitness_cache), 2)
+        self.assertEqual((fitness_cache.num_hits, fitness_cache.num_misses), (2, 1))
+        self.assertAlmostEqual(fitness_cache.get_hit_rate(), 2 / 3)
+        fitness_cache.clear()
+        self.assertEqual(len(fitness_cache), 0)
+        self.assertEqual(fitness_cache.get_hit_rate(), 0.0)
@@ -0,0 +1,102 @@
+import contextlib
+import io
+import multiprocessing
+import random
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from cog_array_stuff import Empties_Set, get_excludes_dict
+from cog_factory import cog_factory
+from file_readers import read_cog_datas, read_empties_datas
+from fitness_functions import Weighted_Obj_Fxn, standard_obj_fxn
+from island_model import Island_Error, _island_worker, island_learning_algo
+from learning_algo import Iteration_Controller, get_average_std_objs
+from vector_engine import Vector_Engine
+
+
+def failing_island_worker(conn, island, *args):
+    if island == 2:
+        conn.recv()
+        raise RuntimeError("island failure")
+    _island_worker(conn, island, *args)
+
+
+class Test_Island_Model(unittest.TestCase):
+
+    def setUp(self):
+        self.empties_set = Empties_Set(read_empties_datas("empties_datas_static1.csv"))
+        self.flaggies = set(self.empties_set.coords_list[:2])
+        self.obj_fxns = [
+            Weighted_Obj_Fxn(standard_obj_fxn, *weights)
+            for weights in [(0.2, 0.3, 0.5), (0.2, 0, 0), (0, 0.3, 0), (0, 0, 0.5)]
+        ]
+
+    def new_controller(self):
+        return (Iteration_Controller()
+            .set_restart_info(2)
+            .set_generation_info(5, 5, 10, 0.01)
+            .set_mutation_info(10)
+            .set_breeding_scheme_info(0.5, 0.25, 0.25))
+
+    def run_islands(self, num_workers, seed):
+        cogs = cog_factory(read_cog_datas("cog_datas_static1.csv"))
+        random.seed(seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            best_array, best_value = island_learning_algo(
+                cogs, self.empties_set, self.flaggies, 20, self.obj_fxns[0], 2, 4, 16, self.new_controller(),
+                *self.obj_fxns[1:], num_workers, seed, migration_interval=2, num_migrants=3
+            )
+        return cogs, best_array, best_value
+
+    def test_island_learning_algo(self):
+        cogs, best_array, best_value = self.run_islands(2, 5)
+        self.assertEqual(set(cog.csv_record() for _, cog in best_array) | set(cog.csv_record() for cog in best_array.spares),
+                         set(cog.csv_record() for cog in cogs))
+        self.assertEqual(best_array.flaggies, self.flaggies)
+        self.assertAlmostEqual(best_value, self.obj_fxns[0](best_array), places=9)
+        _, other_array, other_value = self.run_islands(2, 5)
+        self.assertEqual((other_array.csv_record(), other_value), (best_array.csv_record(), best_value))
+        _, three_array, three_value = self.run_islands(3, 5)
+        self.assertAlmostEqual(three_value, self.obj_fxns[0](three_array), places=9)
+        self.assertNotEqual((three_array.csv_record(), three_value), (best_array.csv_record(), best_value))
+
+    def test_island_worker_migration(self):
+        cogs, best_array, _ = self.run_islands(2, 5)
+        engine = Vector_Engine(cogs, self.empties_set, self.flaggies)
+        best_genome = engine.get_genome(best_array).tolist()
+        with contextlib.redirect_stdout(io.StringIO()):
+            average_std_objs = get_average_std_objs(cogs, self.empties_set, self.flaggies, self.obj_fxns[0])
+        evolve_args = (
+            cogs, self.empties_set, self.flaggies, 20, self.obj_fxns[0], 2, 4, 16, self.new_controller(),
+            *self.obj_fxns[1:], average_std_objs
+        )
+        conn, worker_conn = multiprocessing.Pipe()
+        worker = threading.Thread(target=_island_worker, args=(worker_conn, 1, 6, 1, 3, evolve_args))
+        worker.start()
+        conn.send([])
+        done, emigrants, _ = conn.recv()
+        self.assertFalse(done)
+        self.assertEqual(len(emigrants), 3)
+        self.assertNotIn(best_genome, emigrants)
+        conn.send([best_genome])
+        done, emigrants, _ = conn.recv()
+        self.assertFalse(done)
+        excludes_dict = get_excludes_dict(self.empties_set, cogs)
+        top_array = engine.get_cog_array(np.array(emigrants[0]), self.flaggies, excludes_dict)
+        self.assertGreaterEqual(self.obj_fxns[0](top_array), self.obj_fxns[0](best_array) - 1e-9)
+        while not done:
+            conn.send([])
+            done, genomes, value = conn.recv()
+        worker.join()
+        self.assertGreaterEqual(value, self.obj_fxns[0](best_array) - 1e-9)
+        self.assertEqual(len(genomes), 1)
+
+    def test_island_failure(self):
+        with mock.patch("island_model._island_worker", failing_island_worker), \
+                contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaisesRegex(Island_Error, "Island 2 "):
+                self.run_islands(3, 5)
+        self.assertEqual(multiprocessing.active_children(), [])
@@ -0,0 +1,142 @@
+import copy
+import random
+import unittest
+
+import numpy as np
+
+from cog_array_stuff import Cog_Array, Empties_Set, get_excludes_dict
+from cog_factory import cog_factory
+from file_readers import read_cog_datas, read_empties_datas
+from fitness_cache import Fitness_Cache
+from fitness_functions import Weighted_Obj_Fxn, standard_obj_fxn
+from learning_algo import WARM_START_MAX_MUTATIONS, Population, get_average_std_objs, get_warm_start_arrays
+
+
+class Test_Learning_Algo(unittest.TestCase):
+
+    def setUp(self):
+        self.cogs = cog_factory(read_cog_datas("cog_datas_static1.csv"))
+        self.empties_set = Empties_Set(read_empties_datas("empties_datas_static1.csv"))
+        self.obj_fxn = Weighted_Obj_Fxn(standard_obj_fxn, 0.2, 0.3, 0.5)
+
+    def test_get_average_std_objs_parallel_matches_serial(self):
+        results = []
+        states = []
+        for num_workers in [1, 3]:
+            cogs = copy.deepcopy(self.cogs)
+            random.seed(1234)
+            average_std_objs = get_average_std_objs(cogs, self.empties_set, set(), self.obj_fxn, num_workers)
+            results.append([average_std_objs[cog] for cog in cogs])
+            states.append(random.getstate())
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(states[0], states[1])
+
+    def test_population_order_statistics(self):
+        rng = random.Random(5)
+        values = [float(rng.randint(0, 50)) for _ in range(101)]
+        arrays = [object() for _ in values]
+        pop = Population(arrays, None, None, None, None, values=values)
+        reference = sorted(zip(values, range(len(values))), key=lambda t: -t[0])
+        self.assertEqual(pop.get_best()[1], max(values))
+        for perc in [0.1, 0.5, 0.5 + 0.3414, 0.99]:
+            self.assertEqual(pop.get_percentile(perc)[1], reference[int((1 - perc) * len(values))][0])
+        top = pop.get_top(10)
+        self.assertEqual([values[arrays.index(array)] for array in top], [v for v, _ in reference[:10]])
+
+        pop.obj_fxn = lambda array: 100.0
+        pop.add(object())
+        self.assertEqual(pop.get_best()[1], 100.0)
+        pop.cull(20)
+        self.assertEqual(pop.get_size(), 20)
+        self.assertEqual(sorted(pop.values.tolist(), reverse=True), [100.0] + [v for v, _ in reference[:19]])
+        self.assertEqual(pop.get_best()[1], 100.0)
+        self.assertTrue(np.all(pop.sort().values[:-1] >= pop.values[1:]))
+
+    def test_population_offer(self):
+        random.seed(6)
+        values = [5.0, 1.0, 3.0, 4.0]
+        arrays = [object() for _ in values]
+        pop = Population(list(arrays), None, None, None, None, values=values)
+        self.assertFalse(pop.offer(object(), 0.5))
+        child = object()
+        self.assertTrue(pop.offer(child, 2.0))
+        self.assertIs(pop.arrays[1], child)
+        self.assertEqual(pop.values.tolist(), [5.0, 2.0, 3.0, 4.0])
+        best = object()
+        self.assertTrue(pop.offer(best, 9.0, "tournament", 4))
+        self.assertEqual(pop.get_size(), 4)
+        self.assertEqual(pop.get_best(), (best, 9.0))
+        self.assertEqual(sorted(pop.values.tolist()), [3.0, 4.0, 5.0, 9.0])
+
+    def test_population_fitness_cache(self):
+        random.seed(8)
+        arrays = [Cog_Array(self.empties_set).instantiate_randomly(self.cogs) for _ in range(4)]
+        fitness_cache = Fitness_Cache()
+        pop = Population(arrays, self.obj_fxn, None, None, None, fitness_cache=fitness_cache)
+        self.assertEqual((fitness_cache.num_hits, fitness_cache.num_misses), (0, 4))
+        children = [copy.copy(arrays[0]), arrays[1].two_point_mutation()[0], copy.copy(arrays[1]), copy.copy(arrays[1])]
+        for child in children:
+            child._reset_rates()
+        values = pop.extend(children)
+        self.assertEqual((fitness_cache.num_hits, fitness_cache.num_misses), (3, 5))
+        self.assertEqual(values, [self.obj_fxn(copy.copy(child)) for child in children])
+        self.assertTrue(all(child.has_rates() for child in children))
+        self.assertEqual(len(fitness_cache), 5)
+
+    def test_population_cull_diversity(self):
+        random.seed(9)
+        best = Cog_Array(self.empties_set).instantiate_randomly(self.cogs)
+        twin = copy.copy(best)
+        neighbor = best.two_point_mutation()[0]
+        stranger = Cog_Array(self.empties_set).instantiate_randomly(self.cogs)
+        arrays = [stranger, neighbor, twin, best]
+        def survivors(pop_size, dedupe, niche_radius=0, niche_capacity=1):
+            pop = Population(arrays, None, None, None, None, values=[1.0, 3.0, 3.9, 4.0])
+            pop.set_cull_info(dedupe, niche_radius, niche_capacity).cull(pop_size)
+            self.assertEqual(pop.values.tolist(), [values[id(array)] for array in pop.arrays])
+            return [names[id(array)] for array in pop.arrays]
+        values = dict(zip(map(id, arrays), [1.0, 3.0, 3.9, 4.0]))
+        names = dict(zip(map(id, arrays), ["stranger", "neighbor", "twin", "best"]))
+        self.assertEqual(survivors(2, False), ["twin", "best"])
+        self.assertEqual(survivors(2, True), ["neighbor", "best"])
+        self.assertEqual(survivors(2, True, 2), ["stranger", "best"])
+        self.assertEqual(survivors(2, True, 2, 2), ["neighbor", "best"])
+        self.assertEqual(survivors(3, True, 2), ["stranger", "twin", "best"])
+        self.assertEqual(survivors(3, False, 2), ["stranger", "twin", "best"])
+
+    def test_get_warm_start_arrays(self):
+        random.seed(13)
+        previous = Cog_Array(self.empties_set).instantiate_randomly(self.cogs)
+        output_datas = [{"coords": coords, "record": cog.csv_record()} for coords, cog in previous if cog is not None]
+        excludes_dict = get_excludes_dict(self.empties_set, self.cogs)
+        arrays = get_warm_start_arrays(self.cogs, self.empties_set, set(), excludes_dict, output_datas, 20)
+        self.assertEqual(len(arrays), 20)
+        placement = lambda cog_array: [cog.csv_record() if cog is not None else None for _, cog in cog_array]
+        self.assertEqual(placement(arrays[0]), placement(previous))
+        for cog_array in arrays[1:]:
+            num_moved = np.count_nonzero(cog_array.get_slot_indices() != arrays[0].get_slot_indices())
+            self.assertTrue(0 < num_moved <= 2 * WARM_START_MAX_MUTATIONS)
+            self.assertEqual(set(cog for _, cog in cog_array if cog is not None) | set(cog_array.spares), set(self.cogs))
+        self.assertEqual(get_warm_start_arrays(self.cogs, self.empties_set, set(), excludes_dict, output_datas, 0), [])
+
+    def test_population_select_indices(self):
+        random.seed(7)
+        values = [1.0, 4.0, 2.0, 3.0]
+        pop = Population([object() for _ in values], None, None, None, None, values=values)
+        num_draws = 40000
+        expected = {
+            "uniform": [1/4, 1/4, 1/4, 1/4],
+            "tournament": [0, 3/4, 0, 1/4],
+            "rank": [1/10, 4/10, 2/10, 3/10],
+            "roulette": [1/10, 4/10, 2/10, 3/10]
+        }
+        for selection, probs in expected.items():
+            counts = np.bincount(
+                [pop.select_indices(1, selection, 3)[0] for _ in range(num_draws)], minlength=len(values)
+            )
+            self.assertTrue(np.allclose(counts / num_draws, probs, atol=0.01), selection)
+            for i, j in pop.select_pairs(50, selection, 3):
+                self.assertNotEqual(i, j)
+            self.assertEqual(sorted(pop.select_indices(4, selection, 3)), [0, 1, 2, 3])
+        with self.assertRaises(ValueError):
+            pop.select_indices(1, "best")
@@ -0,0 +1,44 @@
+import copy
+import random
+import unittest
+
+from cog_array_stuff import Cog_Array, Empties_Set, get_excludes_dict
+from cog_factory import cog_factory
+from file_readers import read_cog_datas, read_empties_datas
+from fitness_functions import Weighted_Obj_Fxn, standard_obj_fxn
+from local_search import COOLING_SCHEDULES, make_cooling_schedule, simulated_annealing
+
+
+class Test_Local_Search(unittest.TestCase):
+
+    def setUp(self):
+        self.cogs = cog_factory(read_cog_datas("cog_datas_static1.csv"))
+        self.empties_set = Empties_Set(read_empties_datas("empties_datas_static1.csv"))
+        self.obj_fxn = Weighted_Obj_Fxn(standard_obj_fxn, 0.2, 0.3, 0.5)
+
+    def new_array(self):
+        excludes_dict = get_excludes_dict(self.empties_set, self.cogs)
+        return Cog_Array(self.empties_set, None, excludes_dict).instantiate_randomly(self.cogs)
+
+    def test_cooling_schedules(self):
+        for name, cooling_class in COOLING_SCHEDULES.items():
+            cooling = cooling_class(2.0, 0.01, 1000)
+            temperatures = [cooling(step) for step in range(1000)]
+            self.assertAlmostEqual(temperatures[0], 2.0, places=9)
+            self.assertAlmostEqual(temperatures[-1], 0.01, places=9)
+            self.assertTrue(all(t1 > t2 for t1, t2 in zip(temperatures, temperatures[1:])))
+        with self.assertRaises(ValueError):
+            make_cooling_schedule("quadratic", self.new_array(), self.obj_fxn, 1000)
+
+    def test_simulated_annealing(self):
+        random.seed(12)
+        start_array = self.new_array()
+        genome = start_array.genome.copy()
+        start_value = self.obj_fxn(copy.copy(start_array))
+        cooling = make_cooling_schedule("geometric", start_array, self.obj_fxn, 3000)
+        best, value = simulated_annealing(start_array, self.obj_fxn, 3000, cooling)
+        self.assertTrue((start_array.genome == genome).all())
+        self.assertGreater(value, start_value)
+        self.assertAlmostEqual(value, self.obj_fxn(copy.copy(best)), places=9)
+        self.assertEqual(set(cog for _, cog in best) | set(best.spares), set(self.cogs))
+        self.assertEqual(simulated_annealing(start_array, self.obj_fxn, 3000, cooling, target=start_value)[0], start_array)
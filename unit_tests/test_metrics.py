@@ -0,0 +1,84 @@
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from cog_array_stuff import Empties_Set
+from cog_factory import cog_factory
+from file_readers import read_cog_datas, read_empties_datas
+from fitness_functions import Weighted_Obj_Fxn, standard_obj_fxn
+from learning_algo import Iteration_Controller, learning_algo
+from metrics import BREEDING_SCHEMES, Metrics_Stream
+
+
+class Test_Metrics(unittest.TestCase):
+
+    def setUp(self):
+        self.empties_set = Empties_Set(read_empties_datas("empties_datas_static1.csv"))
+        self.obj_fxns = [
+            Weighted_Obj_Fxn(standard_obj_fxn, *weights)
+            for weights in [(0.2, 0.3, 0.5), (0.2, 0, 0), (0, 0.3, 0), (0, 0, 0.5)]
+        ]
+
+    def run_learning_algo(self, metrics, replacement=None, fitness_cache_size=1000):
+        cogs = cog_factory(read_cog_datas("cog_datas_static1.csv"))
+        controller = (Iteration_Controller()
+            .set_restart_info(1)
+            .set_generation_info(4, 4, 10, 0.01)
+            .set_mutation_info(20)
+            .set_breeding_scheme_info(0.5, 0.25, 0.25)
+            .set_steady_state_info(replacement)
+            .set_fitness_cache_info(fitness_cache_size)
+            .set_metrics_info(metrics))
+        random.seed(31)
+        with contextlib.redirect_stdout(io.StringIO()):
+            best = learning_algo(cogs, self.empties_set, set(), 30, self.obj_fxns[0], 2, 4, 16, controller,
+                                 *self.obj_fxns[1:])
+        return best[1], controller
+
+    def test_records(self):
+        records = []
+        best_value, controller = self.run_learning_algo(Metrics_Stream(callback=records.append))
+        self.assertEqual([record["generation"] for record in records], list(range(len(records))))
+        self.assertGreater(len(records), 0)
+        for record in records:
+            self.assertEqual(record["restart"], 0)
+            self.assertEqual(record["pop_size"], 30)
+            self.assertGreaterEqual(record["best"], record["p90"])
+            self.assertGreaterEqual(record["p90"], record["median"])
+            self.assertEqual(sum(record["breedings"].values()), 20)
+            self.assertEqual(set(record["breedings"]), set(BREEDING_SCHEMES))
+            self.assertEqual(record["evaluations"], record["cache_misses"])
+            self.assertEqual(record["cache_hits"] + record["cache_misses"], 20)
+            for times in (record["wall"], record["cpu"]):
+                self.assertEqual(set(times), {"status", "breed", "evaluate", "update_strengths", "cull", "total"})
+                self.assertAlmostEqual(times["total"], sum(t for phase, t in times.items() if phase != "total"))
+        self.assertEqual(records[-1]["best"], best_value)
+        self.assertEqual(best_value, self.run_learning_algo(None)[0])
+
+    def test_steady_state_records(self):
+        records = []
+        self.run_learning_algo(Metrics_Stream(callback=records.append), "worst", 0)
+        for record in records:
+            self.assertEqual(sum(record["breedings"].values()), 20)
+            self.assertEqual(record["evaluations"], 20)
+            self.assertNotIn("cache_hits", record)
+            self.assertIn("replace", record["wall"])
+
+    def test_jsonl_file(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, "metrics.jsonl")
+            records = []
+            metrics = Metrics_Stream(filename, records.append)
+            self.run_learning_algo(metrics)
+            metrics.close()
+            with open(filename) as fh:
+                self.assertEqual([json.loads(line) for line in fh], records)
+            metrics = Metrics_Stream(filename, append=True)
+            self.run_learning_algo(metrics)
+            metrics.close()
+            with open(filename) as fh:
+                self.assertEqual(len(fh.readlines()), 2 * len(records))
@@ -0,0 +1,106 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from cog_array_stuff import Empties_Set
+from cog_factory import cog_factory
+from cog_registry import get_stats_key
+from file_readers import read_cog_datas, read_empties_datas
+from fitness_functions import Weighted_Obj_Fxn, standard_obj_fxn
+from learning_algo import get_average_std_objs
+from stats_cache import Stats_Cache, STATS_CACHE_FILENAME
+
+
+class Test_Stats_Cache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, STATS_CACHE_FILENAME)
+        self.empties_set = Empties_Set(read_empties_datas("empties_datas_static1.csv"))
+        self.obj_fxn = Weighted_Obj_Fxn(standard_obj_fxn, 0.2, 0.3, 0.5)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def warm_up(self, cogs, stats_cache):
+        random.seed(1234)
+        return get_average_std_objs(cogs, self.empties_set, set(), self.obj_fxn, 1, stats_cache)
+
+    def test_round_trip(self):
+        cache = Stats_Cache(self.filename)
+        cache.put(1, 2.5, 0.5)
+        cache.put(2**64 - 1, -1.0, 3.0)
+        cache.save()
+        cache = Stats_Cache(self.filename)
+        self.assertEqual(cache.get(1), (2.5, 0.5))
+        self.assertEqual(cache.get(2**64 - 1), (-1.0, 3.0))
+        self.assertIsNone(cache.get(3))
+        self.assertEqual((cache.num_hits, cache.num_misses), (2, 1))
+
+    def test_size_cap_drops_least_recently_used(self):
+        cache = Stats_Cache(self.filename, max_entries=2)
+        cache.put(1, 1.0, 1.0)
+        cache.put(2, 2.0, 2.0)
+        cache.save()
+        cache = Stats_Cache(self.filename, max_entries=2)
+        cache.get(2)
+        cache.put(3, 3.0, 3.0)
+        cache.save()
+        cache = Stats_Cache(self.filename, max_entries=2)
+        self.assertIsNone(cache.get(1))
+        self.assertIsNotNone(cache.get(2))
+        self.assertIsNotNone(cache.get(3))
+
+    def test_outdated_or_corrupt_file_is_ignored(self):
+        np.savez(self.filename, version=-1, keys=np.array([1], dtype=np.uint64), stats=np.ones((1, 2)),
+                 last_used=np.zeros(1, dtype=np.uint64))
+        self.assertIsNone(Stats_Cache(self.filename).get(1))
+        with open(self.filename, "wb") as fh:
+            fh.write(b"not a cache")
+        self.assertIsNone(Stats_Cache(self.filename).get(1))
+
+    def test_clear(self):
+        cache = Stats_Cache(self.filename)
+        cache.put(1, 1.0, 1.0)
+        cache.save().clear()
+        self.assertFalse(os.path.exists(self.filename))
+        self.assertIsNone(Stats_Cache(self.filename).get(1))
+
+    def test_changing_one_cog_only_recomputes_that_cog(self):
+        cog_datas = read_cog_datas("cog_datas_static1.csv")
+        cogs = cog_factory(cog_datas)
+        expected = self.warm_up(cogs, Stats_Cache(self.filename))
+        expected = [expected[cog] for cog in cogs]
+
+        cache = Stats_Cache(self.filename)
+        cogs = cog_factory(cog_datas)
+        cogs[0].build_rate += 1
+        average_std_objs = self.warm_up(cogs, cache)
+        self.assertEqual(cache.num_misses, 1)
+        self.assertEqual([average_std_objs[cog] for cog in cogs[1:]], expected[1:])
+
+    def test_cold_cache_matches_no_cache(self):
+        cog_datas = read_cog_datas("cog_datas_static1.csv")
+        cogs = cog_factory(cog_datas) + cog_factory(cog_datas[:5])
+        without_cache = self.warm_up(cogs, None)
+        cogs = cog_factory(cog_datas) + cog_factory(cog_datas[:5])
+        cache = Stats_Cache(self.filename)
+        with_cache = self.warm_up(cogs, cache)
+        self.assertEqual(list(with_cache.values()), list(without_cache.values()))
+        self.assertEqual(cache.num_misses, len({get_stats_key(cog) for cog in cogs}))
+        self.assertEqual([with_cache[cog] for cog in cogs[-5:]], [with_cache[cog] for cog in cogs[:5]])
+
+    def test_key_depends_on_weights_and_fitness_function(self):
+        cog = cog_factory(read_cog_datas("cog_datas_static1.csv"))[0]
+        keys = {
+            Stats_Cache.get_key(cog, self.empties_set, set(), obj_fxn) for obj_fxn in [
+                self.obj_fxn,
+                Weighted_Obj_Fxn(standard_obj_fxn, 0.3, 0.2, 0.5),
+                Weighted_Obj_Fxn(lambda *args: 0, 0.2, 0.3, 0.5)
+            ]
+        }
+        self.assertEqual(len(keys), 3)
+        self.assertIsNone(Stats_Cache.get_key(cog, self.empties_set, set(), lambda cog_array: 0))
@@ -0,0 +1,111 @@
+import random
+import unittest
+
+from cog_array_stuff import Cog_Array, Coords_Iter, Empties_Set
+from cog_factory import cog_factory
+from file_readers import read_cog_datas, read_empties_datas
+from fitness_functions import standard_obj_fxn, average_affix_conversion_obj_fxn
+from vector_engine import Vector_Engine
+
+
+def random_cog_array(empties_set, cogs, flaggies=None):
+    cog_array = Cog_Array(empties_set, flaggies).extend_spares(cogs)
+    shuffled = random.sample(cogs, len(cogs))
+    for coords, cog in zip(Coords_Iter(cog_array), shuffled):
+        cog_array.move_cog_from_spares(coords, cog)
+    return cog_array
+
+
+class Test_Vector_Engine(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(1234)
+        self.cog_datas_static_filenames = [
+            "cog_datas_static1.csv",
+            "cog_datas_static2.csv",
+            "cog_datas_static3.csv",
+            "cog_datas_static4.csv",
+            "cog_datas_static5.csv"
+        ]
+
+        self.cogs_static = [cog_factory(read_cog_datas(filename)) for filename in self.cog_datas_static_filenames]
+
+        self.empties_datas_static_filenames = [
+            "empties_datas_static1.csv",
+            "empties_datas_static2.csv",
+            "empties_datas_static3.csv",
+            "empties_datas_static4.csv",
+            "empties_datas_static5.csv"
+        ]
+
+        self.empties_static = [read_empties_datas(filename) for filename in self.empties_datas_static_filenames]
+
+    def assert_rates_identical(self, engine, cog_arrays):
+        genomes = engine.get_genomes(cog_arrays)
+        build_rates = engine.get_build_rates(genomes)
+        flaggy_rates = engine.get_flaggy_rates(genomes)
+        total_exp_mults = engine.get_total_exp_mults(genomes)
+        num_occupied = engine.get_num_occupied(genomes)
+        for i, cog_array in enumerate(cog_arrays):
+            self.assertEqual(build_rates[i], cog_array.get_build_rate())
+            self.assertEqual(flaggy_rates[i], cog_array.get_flaggy_rate())
+            self.assertEqual(total_exp_mults[i], cog_array.get_total_exp_mult())
+            self.assertEqual(num_occupied[i], cog_array.get_num_occupied())
+
+    def test_rates_match_cog_array(self):
+        for cogs in self.cogs_static:
+            for empties in self.empties_static:
+                empties_set = Empties_Set(empties)
+                engine = Vector_Engine(cogs, empties_set)
+                cog_arrays = [random_cog_array(empties_set, cogs) for _ in range(10)]
+                self.assert_rates_identical(engine, cog_arrays)
+
+    def test_rates_match_cog_array_with_flaggies(self):
+        for cogs in self.cogs_static:
+            for empties in self.empties_static:
+                flaggies = set(random.sample(sorted(empties, key=lambda c: (c.x, c.y)), min(3, len(empties))))
+                empties_set = Empties_Set(empties)
+                engine = Vector_Engine(cogs, empties_set, flaggies)
+                cog_arrays = [random_cog_array(empties_set, cogs, flaggies) for _ in range(10)]
+                self.assert_rates_identical(engine, cog_arrays)
+
+    def test_partially_filled_array(self):
+        cogs = self.cogs_static[1]
+        empties_set = Empties_Set(self.empties_static[0])
+        engine = Vector_Engine(cogs, empties_set)
+        cog_array = random_cog_array(empties_set, cogs)
+        for coords in Coords_Iter(cog_array, True, 5):
+            cog_array.move_cog_to_spares(coords)
+        self.assert_rates_identical(engine, [cog_array])
+
+    def test_get_genome_rejects_other_empties_set(self):
+        engine = Vector_Engine(self.cogs_static[0], Empties_Set(self.empties_static[0]))
+        cog_array = Cog_Array(Empties_Set(self.empties_static[1]))
+        with self.assertRaises(RuntimeError):
+            engine.get_genome(cog_array)
+
+    def test_evaluate_matches_obj_fxns(self):
+        obj_fxns = [
+            lambda cog_array: standard_obj_fxn(cog_array, 0.2, 0.3, 0.5),
+            lambda cog_array: average_affix_conversion_obj_fxn(cog_array, 0.2, 0.3, 0.5)
+        ]
+        cogs = self.cogs_static[0]
+        empties_set = Empties_Set(self.empties_static[0])
+        engine = Vector_Engine(cogs, empties_set)
+        cog_arrays = [random_cog_array(empties_set, cogs) for _ in range(20)]
+        for obj_fxn in obj_fxns:
+            values = engine.evaluate(engine.get_genomes(cog_arrays), obj_fxn)
+            self.assertEqual(values.shape, (len(cog_arrays),))
+            for value, cog_array in zip(values, cog_arrays):
+                self.assertAlmostEqual(value, obj_fxn(cog_array), places=12)
+
+    def test_evaluate_arrays_caches_rates(self):
+        cogs = self.cogs_static[0]
+        empties_set = Empties_Set(self.empties_static[0])
+        engine = Vector_Engine(cogs, empties_set)
+        cog_arrays = [random_cog_array(empties_set, cogs) for _ in range(5)]
+        engine.evaluate_arrays(cog_arrays, lambda cog_array: standard_obj_fxn(cog_array, 1.0, 1.0, 1.0))
+        for cog_array in cog_arrays:
+            self.assertIsNotNone(cog_array.build_rate)
+            self.assertIsNotNone(cog_array.flaggy_rate)
+            self.assertIsNotNone(cog_array.total_exp_mult)
@@ -0,0 +1,280 @@
+"""
+Cogstruction: Optimizing cog arrays in Legends of Idleon
+    Copyright (C) 2021 Michael P. Lane
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+"""
+
+import numpy as np
+
+from cog_array_stuff import Cog_Array, _cog_registry
+from cog_types import Boost_Cog
+
+"""
+- A `Cog_Table' stores the attributes of a fixed collection of cogs as dense numpy vectors, one entry per cog.
+- `cog_table.indices[cog]' is the row of `cog' in every vector.
+- Every vector has one extra trailing row, `cog_table.empty_index', whose attributes are all zero. Unoccupied slots point
+at this row, so that they contribute nothing to any rate.
+- `cog_table.type_ids[i]' is the position of `type(cogs[i])' in `cog_table.boost_types'. Cogs that are not instances of
+`Boost_Cog' (and the empty row) get the id `len(cog_table.boost_types)'.
+"""
+class Cog_Table:
+    def __init__(self, cogs):
+        self.cogs = list(cogs)
+        self.indices = {cog: i for i, cog in enumerate(self.cogs)}
+        self.empty_index = len(self.cogs)
+        self.boost_types = []
+        for cog in self.cogs:
+            if isinstance(cog, Boost_Cog) and type(cog) not in self.boost_types:
+                self.boost_types.append(type(cog))
+        self.build_rate = self._column(lambda cog: cog.build_rate)
+        self.flaggy_rate = self._column(lambda cog: cog.flaggy_rate)
+        self.exp_mult = self._column(lambda cog: cog.exp_mult)
+        self.build_rate_boost = self._column(lambda cog: cog.build_rate_boost, True)
+        self.flaggy_rate_boost = self._column(lambda cog: cog.flaggy_rate_boost, True)
+        self.flaggy_speed_boost = self._column(lambda cog: cog.flaggy_speed_boost, True)
+        self.type_ids = np.array(
+            [self.boost_types.index(type(cog)) if isinstance(cog, Boost_Cog) else len(self.boost_types)
+             for cog in self.cogs] + [len(self.boost_types)],
+            dtype=np.intp
+        )
+
+    def _column(self, attr, boost_only=False):
+        return np.array(
+            [float(attr(cog)) if not boost_only or isinstance(cog, Boost_Cog) else 0.0 for cog in self.cogs] + [0.0]
+        )
+
+    def __len__(self):
+        return len(self.cogs)
+
+"""
+- An `Influence_Table' is the adjacency structure of one `Empties_Set', for every boost cog type of a `Cog_Table'.
+- Slots are the non-empty coords of the `Empties_Set', numbered in the order of `empties_set.coords_list'.
+- `influence_table.neighbors[t,s]' lists the slots influenced by a cog of type `cog_table.boost_types[t]' placed on slot
+`s', as in `empties_set.influence_slots'. Each row is padded with the
+sentinel slot `influence_table.num_slots', which always holds `cog_table.empty_index'. The last type row is all
+sentinels, for cogs without adjacency bonuses.
+- `influence_table.flaggy_counts[t,s]' is how many of those influenced coords hold a flaggy.
+"""
+class Influence_Table:
+    def __init__(self, empties_set, cog_table, flaggies=None):
+        flaggies = set(flaggies) if flaggies is not None else set()
+        self.num_slots = len(empties_set.coords_list)
+        self.num_flaggies = len(flaggies)
+        num_types = len(cog_table.boost_types)
+        rows = [empties_set.influence_slots[cog_type] for cog_type in cog_table.boost_types]
+        width = max((len(row) for type_rows in rows for row in type_rows), default=0)
+        self.neighbors = np.full((num_types + 1, self.num_slots, width), self.num_slots, dtype=np.intp)
+        self.flaggy_counts = np.zeros((num_types + 1, self.num_slots), dtype=np.intp)
+        for t, cog_type in enumerate(cog_table.boost_types):
+            for s, row in enumerate(rows[t]):
+                self.neighbors[t, s, :len(row)] = row
+                self.flaggy_counts[t, s] = (
+                    sum(empties_set.coords_list[adj_slot] in flaggies for adj_slot in row) +
+                    sum(adj_coords in flaggies for adj_coords in empties_set.influence_empties[cog_type][s])
+                )
+
+"""
+- An alternative to the rate getters of `Cog_Array'. Instead of walking `Coords', it works on genomes.
+- A genome is an integer vector with one entry per slot of `empties_set': the `Cog_Table' index of the cog placed
+there, or `cog_table.empty_index' if the slot is unoccupied. A matrix of genomes, one per row, is evaluated at once.
+- Every rate is accumulated in the same order as the corresponding `Cog_Array' getter, so the results are identical to
+the last bit, not merely close.
+"""
+class Vector_Engine:
+    def __init__(self, cogs, empties_set, flaggies=None):
+        self.cog_table = Cog_Table(cogs)
+        self.empties_set = empties_set
+        self.influence_table = Influence_Table(empties_set, self.cog_table, flaggies)
+        self.num_slots = self.influence_table.num_slots
+        self._registry_lookup = self._get_registry_lookup()
+
+    def get_genome(self, cog_array):
+        if cog_array.empties_set != self.empties_set:
+            raise RuntimeError("Cog_Array does not match the `Empties_Set' of this engine.")
+        slot_indices = cog_array.get_slot_indices()
+        if len(slot_indices) > 0 and slot_indices.max() >= len(self._registry_lookup) - 1:
+            self._registry_lookup = self._get_registry_lookup()
+        genome = self._registry_lookup[slot_indices]
+        if genome.min(initial=0) < 0:
+            raise KeyError("Cog_Array holds a cog that is not in the `Cog_Table' of this engine.")
+        return genome
+
+    """
+    Returns a vector that maps the `Cog_Registry' number of each cog to its `Cog_Table' index, and `-1' (an unoccupied
+    slot) to `cog_table.empty_index'. Cogs outside the `Cog_Table' map to `-1'.
+    """
+    def _get_registry_lookup(self):
+        registry_indices = [_cog_registry.index(cog) for cog in self.cog_table.cogs]
+        lookup = np.full(len(_cog_registry) + 1, -1, dtype=np.intp)
+        lookup[registry_indices] = np.arange(len(self.cog_table))
+        lookup[-1] = self.cog_table.empty_index
+        return lookup
+
+    """
+    The inverse of `get_genome'. Returns a new `Cog_Array' with the cogs of `genome' placed on it; all other cogs of the
+    `Cog_Table' are spares.
+    """
+    def get_cog_array(self, genome, flaggies=None, excludes_dict=None):
+        cog_array = Cog_Array(self.empties_set, flaggies, excludes_dict).extend_spares(self.cog_table.cogs)
+        for coords, index in zip(self.empties_set.coords_list, genome):
+            if index != self.cog_table.empty_index:
+                cog_array.move_cog_from_spares(coords, self.cog_table.cogs[index])
+        return cog_array
+
+    def get_genomes(self, cog_arrays):
+        genomes = np.empty((len(cog_arrays), self.num_slots), dtype=np.intp)
+        for i, cog_array in enumerate(cog_arrays):
+            genomes[i] = self.get_genome(cog_array)
+        return genomes
+
+    def get_build_rates(self, genomes):
+        genomes = np.atleast_2d(genomes)
+        table = self.cog_table
+        return _sequential_sum(self._boost_terms(genomes, table.build_rate, table.build_rate_boost))
+
+    def get_flaggy_rates(self, genomes):
+        total_rate, total_speed = self.get_flaggy_parts(genomes)
+        return total_rate * (1 + total_speed)
+
+    """
+    Returns the flaggy rates before the flaggy speed multiplier is applied, and the flaggy speeds.
+    """
+    def get_flaggy_parts(self, genomes):
+        genomes = np.atleast_2d(genomes)
+        table = self.cog_table
+        total_rate = _sequential_sum(self._boost_terms(genomes, table.flaggy_rate, table.flaggy_rate_boost))
+        return total_rate, _sequential_sum(self._speed_terms(genomes))
+
+    def get_total_exp_mults(self, genomes):
+        genomes = np.atleast_2d(genomes)
+        return _sequential_sum(self.cog_table.exp_mult[genomes])
+
+    def get_num_occupied(self, genomes):
+        genomes = np.atleast_2d(genomes)
+        return np.count_nonzero(genomes != self.cog_table.empty_index, axis=1)
+
+    def get_batch(self, genomes):
+        return Array_Batch(
+            self.get_build_rates(genomes),
+            *self.get_flaggy_parts(genomes),
+            self.get_total_exp_mults(genomes),
+            self.get_num_occupied(genomes)
+        )
+
+    """
+    - `genomes' is an integer matrix of shape `(N, num_slots)'.
+    - `obj_fxn' is any objective function of this project, e.g. `standard_obj_fxn' or
+    `average_affix_conversion_obj_fxn' with its weights bound. It is called exactly once, on an `Array_Batch'.
+    - Returns a `numpy.ndarray' of the N objective values.
+    """
+    def evaluate(self, genomes, obj_fxn):
+        return np.asarray(obj_fxn(self.get_batch(genomes)), dtype=float)
+
+    """
+    - Same as `evaluate', but takes a list of `Cog_Arrays'.
+    - Only the arrays whose rates are not cached already (see `Cog_Array.has_rates') are run through the engine. Their
+    caches are filled in as a side effect.
+    """
+    def evaluate_arrays(self, cog_arrays, obj_fxn):
+        uncached = [cog_array for cog_array in cog_arrays if not cog_array.has_rates()]
+        if len(uncached) > 0:
+            self.get_batch(self.get_genomes(uncached)).cache_rates(uncached)
+        batch = Array_Batch(
+            np.array([cog_array.build_rate for cog_array in cog_arrays], dtype=float),
+            np.array([cog_array.flaggy_base_rate for cog_array in cog_arrays], dtype=float),
+            np.array([cog_array.flaggy_speed for cog_array in cog_arrays], dtype=float),
+            np.array([cog_array.total_exp_mult for cog_array in cog_arrays], dtype=float),
+            np.array([cog_array.get_num_occupied() for cog_array in cog_arrays])
+        )
+        return np.asarray(obj_fxn(batch), dtype=float)
+
+    """
+    - Returns an array of shape `(N, num_slots * (width + 1))'. For each slot in order, it holds the boosts given to
+    each influenced slot (`rates[adj_cog] * boosts[cog]') followed by the slot's own base rate.
+    - Boosts onto unoccupied or non-existent neighbors are zeros, which leave a sequential sum unchanged.
+    """
+    def _boost_terms(self, genomes, rates, boosts):
+        num_arrays = genomes.shape[0]
+        padded = np.empty((num_arrays, self.num_slots + 1), dtype=np.intp)
+        padded[:, :-1] = genomes
+        padded[:, -1] = self.cog_table.empty_index
+        neighbors = self.influence_table.neighbors[self.cog_table.type_ids[genomes], np.arange(self.num_slots)]
+        adj_cogs = padded[np.arange(num_arrays)[:, None, None], neighbors]
+        terms = np.empty(neighbors.shape[:2] + (neighbors.shape[2] + 1,))
+        np.multiply(rates[adj_cogs], boosts[genomes][:, :, None], out=terms[:, :, :-1])
+        terms[:, :, -1] = rates[genomes]
+        return terms.reshape(num_arrays, -1)
+
+    """
+    Each flaggy within the influence of a flaggy speed boost adds `speed / num_flaggies', once per flaggy.
+    """
+    def _speed_terms(self, genomes):
+        num_arrays = genomes.shape[0]
+        if self.influence_table.num_flaggies == 0:
+            return np.zeros((num_arrays, 0))
+        counts = self.influence_table.flaggy_counts[self.cog_table.type_ids[genomes], np.arange(self.num_slots)]
+        width = int(counts.max(initial=0))
+        speeds = self.cog_table.flaggy_speed_boost[genomes] / self.influence_table.num_flaggies
+        terms = np.where(np.arange(width) < counts[:, :, None], speeds[:, :, None], 0.0)
+        return terms.reshape(num_arrays, -1)
+
+"""
+- The rates of N cog arrays, as vectors of length N.
+- It has the same getters as `Cog_Array', so the objective functions in `fitness_functions' can be applied to it
+directly; they then return a vector of N objective values.
+"""
+class Array_Batch:
+    def __init__(self, build_rates, flaggy_base_rates, flaggy_speeds, total_exp_mults, num_occupied):
+        self.build_rates = build_rates
+        self.flaggy_base_rates = flaggy_base_rates
+        self.flaggy_speeds = flaggy_speeds
+        self.flaggy_rates = flaggy_base_rates * (1 + flaggy_speeds)
+        self.total_exp_mults = total_exp_mults
+        self.num_occupied = num_occupied
+
+    def __len__(self):
+        return len(self.build_rates)
+
+    def get_build_rate(self):
+        return self.build_rates
+
+    def get_flaggy_rate(self):
+        return self.flaggy_rates
+
+    def get_total_exp_mult(self):
+        return self.total_exp_mults
+
+    def get_num_occupied(self):
+        return self.num_occupied
+
+    """
+    Store the rates of this batch in the caches of `cog_arrays', so that their getters do not recompute them.
+    """
+    def cache_rates(self, cog_arrays):
+        for cog_array, build_rate, flaggy_base_rate, flaggy_speed, flaggy_rate, total_exp_mult in zip(
+                cog_arrays, self.build_rates.tolist(), self.flaggy_base_rates.tolist(), self.flaggy_speeds.tolist(),
+                self.flaggy_rates.tolist(), self.total_exp_mults.tolist()
+        ):
+            cog_array.build_rate = build_rate
+            cog_array.flaggy_base_rate = flaggy_base_rate
+            cog_array.flaggy_speed = flaggy_speed
+            cog_array.flaggy_rate = flaggy_rate
+            cog_array.total_exp_mult = total_exp_mult
+
+"""
+Sums each row of `terms' strictly left to right, which is how the `Cog_Array' getters accumulate. `np.sum' uses pairwise
+summation, which would round differently.
+"""
+def _sequential_sum(terms):
+    if terms.shape[1] == 0:
+        return np.zeros(terms.shape[0])
+    return np.cumsum(terms, axis=1)[:, -1]